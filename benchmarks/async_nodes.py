@@ -0,0 +1,89 @@
+"""Concurrent conversations served by one worker, with sync vs async assistant nodes.
+
+Builds the assistant -> END graph used by the agents twice, once with a node calling
+`model.invoke` (the old nodes) and once with a node awaiting `model.ainvoke`, and runs
+increasing numbers of concurrent `graph.ainvoke` threads against a fake chat model with a fixed
+round-trip latency. Sync nodes run on the event loop's thread pool, so concurrency is capped by
+its size; async nodes only wait on the loop.
+
+    python benchmarks/async_nodes.py --latency 0.5 --threads 1 8 32 128 512
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langgraph.graph import START, MessagesState, StateGraph
+
+
+class SlowChatModel(BaseChatModel):
+    """Answers every prompt after `latency` seconds, like a remote model would."""
+
+    latency: float = 0.5
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage("ok"))])
+
+    async def _agenerate(
+        self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage("ok"))])
+
+
+def build_graph(model: BaseChatModel, use_async: bool):
+    if use_async:
+
+        async def assistant(state: MessagesState):
+            return {"messages": [await model.ainvoke(state["messages"])]}
+
+    else:
+
+        def assistant(state: MessagesState):
+            return {"messages": [model.invoke(state["messages"])]}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("assistant", assistant)
+    builder.add_edge(START, "assistant")
+    return builder.compile()
+
+
+async def run(graph, threads: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            graph.ainvoke({"messages": [HumanMessage("hi")]}, {"configurable": {"thread_id": str(i)}})
+            for i in range(threads)
+        )
+    )
+    return time.perf_counter() - started
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="model round-trip seconds")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8, 32, 128, 512])
+    args = parser.parse_args()
+
+    model = SlowChatModel(latency=args.latency)
+    print(f"model latency {args.latency:.2f}s")
+    print(f"{'threads':>8} {'sync s':>8} {'sync conv/s':>12} {'async s':>8} {'async conv/s':>13}")
+    for threads in args.threads:
+        sync_s = await run(build_graph(model, use_async=False), threads)
+        async_s = await run(build_graph(model, use_async=True), threads)
+        print(f"{threads:>8} {sync_s:>8.2f} {threads / sync_s:>12.1f} {async_s:>8.2f} {threads / async_s:>13.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
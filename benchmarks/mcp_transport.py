@@ -0,0 +1,118 @@
+"""Tool call throughput and latency of mcp's stdio transport vs the batched one.
+
+Starts this script as a minimal newline-delimited JSON-RPC MCP server with an `echo` tool (`--serve`)
+behind a `PooledSession` of one process, once per transport, and issues `--calls` echo calls
+`--concurrency` at a time, like the tool calls of one graph step. The server answers with orjson
+when it is installed so the client side dominates the measurement.
+
+    python benchmarks/mcp_transport.py --calls 20000 --concurrency 1 16 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+try:
+    import orjson
+
+    dumps, loads = orjson.dumps, orjson.loads
+except ImportError:
+    dumps, loads = (lambda obj: json.dumps(obj).encode()), json.loads
+
+ECHO_TOOL = {
+    "name": "echo",
+    "description": "Returns its text",
+    "inputSchema": {"type": "object", "properties": {"text": {"type": "string"}}, "required": ["text"]},
+}
+
+
+def serve() -> None:
+    """Answers MCP requests on stdin/stdout until EOF."""
+
+    def result(request: dict) -> dict:
+        method = request["method"]
+        if method == "initialize":
+            return {
+                "protocolVersion": request["params"]["protocolVersion"],
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "echo", "version": "1"},
+            }
+        if method == "tools/list":
+            return {"tools": [ECHO_TOOL]}
+        if method == "tools/call":
+            return {"content": [{"type": "text", "text": request["params"]["arguments"]["text"]}], "isError": False}
+        return {}
+
+    out = sys.stdout.buffer
+    for line in sys.stdin.buffer:
+        request = loads(line)
+        if "id" not in request:
+            continue
+        out.write(dumps({"jsonrpc": "2.0", "id": request["id"], "result": result(request)}) + b"\n")
+        out.flush()
+
+
+async def bench(transport_factory, calls: int, concurrency: int, text: str) -> tuple[float, float, float]:
+    from src.tool_node.session_pool import PooledSession
+
+    connection = {"transport": "stdio", "command": sys.executable, "args": [__file__, "--serve"]}
+    session = await PooledSession(
+        "echo", connection, size=1, health_check_interval=None, transport_factory=transport_factory
+    ).start()
+    latencies: list[float] = []
+
+    async def call() -> None:
+        started = time.perf_counter()
+        await session.call_tool("echo", {"text": text})
+        latencies.append(time.perf_counter() - started)
+
+    try:
+        await asyncio.gather(*(call() for _ in range(min(concurrency, 100))))  # warm up
+        latencies.clear()
+        started = time.perf_counter()
+        for _ in range(calls // concurrency):
+            await asyncio.gather(*(call() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await session.aclose()
+    p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else latencies[0]
+    return len(latencies) / elapsed, statistics.median(latencies) * 1000, p99 * 1000
+
+
+async def main() -> None:
+    from src.tool_node.transport import batched_transport, open_transport
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--size", type=int, default=200, help="characters echoed per call")
+    parser.add_argument("--window", type=float, default=0.0, help="batching window of the batched transport")
+    args = parser.parse_args()
+
+    transports = {
+        "stdio": open_transport,
+        "batched": partial(batched_transport, window=args.window),
+    }
+    text = "x" * args.size
+    print(f"{args.calls} calls echoing {args.size} characters")
+    print(f"{'transport':<9} {'concurrency':>11} {'calls/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for concurrency in args.concurrency:
+        for name, factory in transports.items():
+            rate, p50, p99 = await bench(factory, args.calls, concurrency, text)
+            print(f"{name:<9} {concurrency:>11} {rate:>9.0f} {p50:>8.2f} {p99:>8.2f}")
+
+
+if __name__ == "__main__":
+    if "--serve" in sys.argv:
+        serve()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,96 @@
+"""Put and search throughput of the task_maistro store backends with many users.
+
+Writes `--todos` ToDos for each of `--users` users, one `aput` at a time and as one batched
+`abatch` per user, then loads the active ToDos of randomly picked users like `task_mAIstro` does.
+Runs against `SqliteStore` (a fresh database file) and `InMemoryStore` for reference.
+
+    python benchmarks/sqlite_store.py --users 10000 --todos 5 --searches 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from langgraph.store.base import BaseStore, PutOp
+from langgraph.store.memory import InMemoryStore
+
+# task_maistro's modules import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "langgraph_assistant"))
+
+from sqlite_store import SqliteStore  # noqa: E402
+from todo_store import aload_todos  # noqa: E402
+
+STATUSES = ("not started", "in progress", "done", "archived")
+
+
+def todo(user: int, i: int) -> dict:
+    return {
+        "task": f"Task {i} of user {user}",
+        "time_to_complete": 30,
+        "deadline": f"2026-{1 + i % 12:02d}-{1 + i % 28:02d}T09:00:00",
+        "solutions": ["Block time in the calendar", "Ask a colleague for help"],
+        "status": STATUSES[i % len(STATUSES)],
+    }
+
+
+def namespace(user: int) -> tuple[str, ...]:
+    return ("todo", "general", f"user-{user}")
+
+
+async def bench(store: BaseStore, users: int, todos: int, searches: int, concurrency: int) -> dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    async def put_single(user: int) -> None:
+        for i in range(todos):
+            await store.aput(namespace(user), f"single-{i}", todo(user, i))
+
+    async def put_batched(user: int) -> None:
+        await store.abatch([PutOp(namespace(user), f"batched-{i}", todo(user, i)) for i in range(todos)])
+
+    results = {}
+    for name, put in (("put single", put_single), ("put batched", put_batched)):
+        started = time.perf_counter()
+        await asyncio.gather(*(limited(put(user)) for user in range(users)))
+        results[name] = users * todos / (time.perf_counter() - started)
+
+    picked = [random.randrange(users) for _ in range(searches)]
+    started = time.perf_counter()
+    await asyncio.gather(*(limited(aload_todos(store, namespace(user))) for user in picked))
+    results["load active"] = searches / (time.perf_counter() - started)
+    return results
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--todos", type=int, default=5, help="ToDos written per user")
+    parser.add_argument("--searches", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=16, help="operations in flight at once")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "SqliteStore": SqliteStore(os.path.join(tmp, "bench.db")),
+            "InMemoryStore": InMemoryStore(),
+        }
+        print(f"{args.users} users, {args.todos} ToDos each, {args.searches} loads")
+        print(f"{'store':<14} {'put single/s':>13} {'put batched/s':>14} {'loads/s':>9}")
+        for name, store in stores.items():
+            r = await bench(store, args.users, args.todos, args.searches, args.concurrency)
+            print(f"{name:<14} {r['put single']:>13.0f} {r['put batched']:>14.0f} {r['load active']:>9.0f}")
+        stores["SqliteStore"].close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
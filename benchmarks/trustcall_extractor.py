@@ -0,0 +1,57 @@
+"""Per-call setup cost of the Trustcall ToDo extractor used by `update_todos`.
+
+Compares building the extractor on every call, as `update_todos` used to, with attaching a
+per-call listener to an extractor built once. Only setup is timed, no model is called.
+
+    python benchmarks/trustcall_extractor.py --iterations 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import datetime
+from typing import Literal, Optional
+
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, Field
+from trustcall import create_extractor
+
+
+# Same schema as src/langgraph_assistant/task_maistro.py
+class ToDo(BaseModel):
+    task: str = Field(description="The task to be completed.")
+    time_to_complete: Optional[int] = Field(description="Estimated time to complete the task (minutes).")
+    deadline: Optional[datetime] = Field(description="When the task needs to be completed by (if applicable)", default=None)
+    solutions: list[str] = Field(description="List of specific, actionable solutions", min_items=1, default_factory=list)
+    status: Literal["not started", "in progress", "done", "archived"] = Field(default="not started")
+
+
+def listener(run) -> None:
+    pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    model = ChatOpenAI(model="gpt-4o", temperature=0, api_key="unused")
+
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        create_extractor(model, tools=[ToDo], tool_choice="ToDo", enable_inserts=True).with_listeners(on_end=listener)
+    per_call_build = (time.perf_counter() - started) / args.iterations
+
+    extractor = create_extractor(model, tools=[ToDo], tool_choice="ToDo", enable_inserts=True)
+    started = time.perf_counter()
+    for _ in range(args.iterations):
+        extractor.with_listeners(on_end=listener)
+    prebuilt = (time.perf_counter() - started) / args.iterations
+
+    print(f"{'build per call':<20} {per_call_build * 1e3:8.3f} ms")
+    print(f"{'prebuilt + listener':<20} {prebuilt * 1e3:8.3f} ms")
+    print(f"{'speedup':<20} {per_call_build / prebuilt:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
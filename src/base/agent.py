@@ -1,14 +1,15 @@
 # ---- LangGraph Module Definition: integrate MCP tools ----
 from contextlib import asynccontextmanager
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
 
+from src.tool_node.registry import mcp_registry
+
 # Define an async context manager for the LangGraph module
 @asynccontextmanager
 async def math_graph_module():
-    # Connect to the MCP Math server using the adapter
-    async with MultiServerMCPClient({
+    # Connect to the MCP Math server, the registry keeps it running between invocations
+    async with mcp_registry.client({
         "math": {  # Identifier for our math server
             "command": "python", 
             "args": ["/Users/aleibz/langgraph-mcp/src/base/math_server.py"],  # path to the MCP server script
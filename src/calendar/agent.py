@@ -5,10 +5,11 @@ import logging
 import asyncio
 from contextlib import asynccontextmanager
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
 
+from src.tool_node.registry import mcp_registry
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,7 +19,8 @@ llm = ChatOpenAI(model="gpt-4o")
 @asynccontextmanager
 async def calendar_graph_module():
     # Build the absolute path to the MCP server index.js
-    async with MultiServerMCPClient({
+    # The registry starts the server once and shares it between invocations
+    async with mcp_registry.client({
         "calendar": {
             "command": "node",
             "args": ["/Users/aleibz/langgraph-mcp/google-calendar-mcp/build/index.js"],
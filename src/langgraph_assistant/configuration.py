@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass, field, fields
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from langchain_core.runnables import RunnableConfig
 from typing_extensions import Annotated
@@ -12,6 +12,13 @@ class Configuration:
     user_id: str = "default-user"
     todo_category: str = "general" 
     task_maistro_role: str = "You are a helpful task management assistant. You help you create, organize, and manage the user's ToDo list."
+    max_todos: int = 50  # Most active ToDos put in the prompt, the nearest deadlines or most relevant first
+    # Tokens the ToDo table may take in the system prompt. Long solutions are truncated and the ToDos
+    # past the budget left out with a count, nothing is summarised
+    todo_token_budget: int = 1500
+    # "sync": memory updates run before the assistant answers. "deferred": they run in the background
+    # and are acknowledged right away, the next user turn waits for them before reading the memory
+    memory_updates: Literal["sync", "deferred"] = "sync"
 
     @classmethod
     def from_runnable_config(
@@ -26,4 +33,6 @@ class Configuration:
             for f in fields(cls)
             if f.init
         }
-        return cls(**{k: v for k, v in values.items() if v})
\ No newline at end of file
+        # Values from the environment are strings
+        types = {f.name: f.type for f in fields(cls)}
+        return cls(**{k: int(v) if types[k] in (int, "int") else v for k, v in values.items() if v})
\ No newline at end of file
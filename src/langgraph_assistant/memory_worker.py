@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from functools import partial
+
+from langgraph.store.base import BaseStore
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[object]]
+
+# Store namespace prefix of the markers of pending updates, seen by every process sharing the store
+MARKER_NAMESPACE = ("memory_updates",)
+MARKER_KEY = "pending"
+
+
+class _Namespace:
+    def __init__(self):
+        self.job: Job | None = None
+        self.submitted_at = 0.0
+        self.flush = asyncio.Event()
+        self.task: asyncio.Task | None = None
+
+
+class MemoryUpdateQueue:
+    """Runs memory updates in the background, at most one at a time per namespace.
+
+    Updates submitted for a namespace within `debounce` seconds of each other are coalesced: only
+    the latest one runs, since it sees the newest conversation. An update submitted while another
+    one of the same namespace is running runs after it. At most `max_workers` updates run at once
+    across namespaces. Call `flush(namespace)` before reading the namespace from the store to wait
+    for its queued and running updates; `drain()` waits for all of them, e.g. before shutting down.
+
+    Updates only run in the process that queued them. When several processes share the store, e.g.
+    workers of one SQLite database, pass the store to `asubmit` and `flush`: a marker saved in the
+    store while an update is pending makes `flush` in any process wait for it. Markers older than
+    `marker_ttl` are ignored, in case their process exited before the update ran.
+
+    Args:
+        debounce: Seconds to wait for newer updates of the same namespace before running one.
+        max_workers: Maximum number of updates running at once.
+        marker_ttl: Seconds after which a pending marker is considered abandoned.
+        poll_interval: Seconds between checks of another process's pending marker.
+    """
+
+    def __init__(
+        self, *, debounce: float = 1.0, max_workers: int = 4, marker_ttl: float = 120.0, poll_interval: float = 0.1
+    ):
+        self.debounce = debounce
+        self.max_workers = max_workers
+        self.marker_ttl = marker_ttl
+        self.poll_interval = poll_interval
+        self.coalesced = 0
+        self._namespaces: dict[tuple[str, ...], _Namespace] = {}
+        self._workers: asyncio.Semaphore | None = None
+
+    def submit(self, namespace: tuple[str, ...], job: Job) -> None:
+        """Queues `job` for `namespace`, replacing the update queued for it if it hasn't started."""
+        if (state := self._namespaces.get(namespace)) is None:
+            state = self._namespaces[namespace] = _Namespace()
+        if state.job is not None:
+            self.coalesced += 1
+        state.job = job
+        state.submitted_at = asyncio.get_running_loop().time()
+        if state.task is None or state.task.done():
+            state.task = asyncio.create_task(self._run(namespace, state), name=f"memory-update-{namespace}")
+
+    async def asubmit(self, namespace: tuple[str, ...], job: Job, store: BaseStore | None = None) -> None:
+        """Like `submit`, first saving a pending marker of `namespace` in `store` for other processes."""
+        if store is not None:
+            token = uuid.uuid4().hex
+            await store.aput(MARKER_NAMESPACE + namespace, MARKER_KEY, {"token": token, "at": time.time()}, index=False)
+            job = partial(_run_and_unmark, job, store, namespace, token)
+        self.submit(namespace, job)
+
+    async def _run(self, namespace: tuple[str, ...], state: _Namespace) -> None:
+        loop = asyncio.get_running_loop()
+        if self._workers is None:
+            self._workers = asyncio.Semaphore(self.max_workers)
+        try:
+            while state.job is not None:
+                while not state.flush.is_set() and (wait := state.submitted_at + self.debounce - loop.time()) > 0:
+                    try:
+                        await asyncio.wait_for(state.flush.wait(), wait)
+                    except TimeoutError:
+                        pass
+                job, state.job = state.job, None
+                async with self._workers:
+                    try:
+                        await job()
+                    except Exception:
+                        logger.exception("Memory update for %s failed", namespace)
+        finally:
+            if self._namespaces.get(namespace) is state and state.job is None:
+                del self._namespaces[namespace]
+
+    def pending(self, namespace: tuple[str, ...]) -> bool:
+        """Whether an update of `namespace` is queued or running."""
+        return namespace in self._namespaces
+
+    async def flush(self, *namespaces: tuple[str, ...], store: BaseStore | None = None) -> None:
+        """Runs the queued updates of `namespaces` now and waits until none is left.
+
+        With a `store`, also waits for the updates other processes marked as pending in it.
+        """
+        for namespace in namespaces:
+            while (state := self._namespaces.get(namespace)) is not None and not state.task.done():
+                state.flush.set()
+                # asyncio.wait doesn't cancel the update if the reader is cancelled
+                await asyncio.wait({state.task})
+            if store is not None:
+                await self._wait_unmarked(store, namespace)
+
+    async def _wait_unmarked(self, store: BaseStore, namespace: tuple[str, ...]) -> None:
+        while (item := await store.aget(MARKER_NAMESPACE + namespace, MARKER_KEY)) is not None:
+            if time.time() - item.value.get("at", 0) > self.marker_ttl:
+                logger.warning("Ignoring the abandoned pending memory update of %s", namespace)
+                return
+            await asyncio.sleep(self.poll_interval)
+
+    async def drain(self) -> None:
+        """Waits for the updates of every namespace."""
+        await self.flush(*list(self._namespaces))
+
+
+async def _run_and_unmark(job: Job, store: BaseStore, namespace: tuple[str, ...], token: str) -> None:
+    try:
+        await job()
+    finally:
+        # A newer update of the namespace, queued meanwhile, removes its own marker
+        item = await store.aget(MARKER_NAMESPACE + namespace, MARKER_KEY)
+        if item is not None and item.value.get("token") == token:
+            await store.adelete(MARKER_NAMESPACE + namespace, MARKER_KEY)
@@ -0,0 +1,289 @@
+import asyncio
+import json
+import logging
+import queue
+import re
+import sqlite3
+import threading
+from collections.abc import AsyncIterator, Iterable, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from typing import Any
+
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+
+logger = logging.getLogger(__name__)
+
+# Namespaces are stored as their labels each followed by this separator, so that the items under a
+# namespace prefix are a contiguous range of the primary key
+_SEP = "\x1f"
+_AFTER_SEP = chr(ord(_SEP) + 1)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS store (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS store_status ON store (json_extract(value, '$.status'), namespace);
+CREATE INDEX IF NOT EXISTS store_updated ON store (namespace, updated_at);
+"""
+
+_OPERATORS = {"$eq": "=", "$ne": "!=", "$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}
+_SIMPLE_KEY = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _encode_namespace(namespace: tuple[str, ...]) -> str:
+    return "".join(label + _SEP for label in namespace)
+
+
+def _decode_namespace(namespace: str) -> tuple[str, ...]:
+    return tuple(namespace.split(_SEP)[:-1])
+
+
+def _json_path(keys: list[str]) -> str:
+    path = "$"
+    for key in keys:
+        path += f".{key}" if _SIMPLE_KEY.match(key) else '."' + key.replace('"', '\\"') + '"'
+    # Inlined rather than bound so SQLite can use the expression index on json_extract(value, '$.status')
+    return "'" + path.replace("'", "''") + "'"
+
+
+def _sql_value(value: Any) -> Any:
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+def _filter_sql(filter: dict[str, Any], keys: list[str] | None = None) -> tuple[list[str], list[Any]]:
+    """Translates a store filter to SQL conditions on the JSON value, nested dicts become paths."""
+    clauses: list[str] = []
+    params: list[Any] = []
+    for key, expected in filter.items():
+        path = [*(keys or []), key]
+        column = f"json_extract(value, {_json_path(path)})"
+        if isinstance(expected, dict) and any(k.startswith("$") for k in expected):
+            for operator, operand in expected.items():
+                if operator not in _OPERATORS:
+                    raise ValueError(f"Unsupported operator: {operator}")
+                if operand is None:
+                    clauses.append(f"{column} IS {'NOT ' if operator == '$ne' else ''}NULL")
+                else:
+                    clauses.append(f"{column} {_OPERATORS[operator]} ?")
+                    params.append(_sql_value(operand))
+        elif isinstance(expected, dict):
+            nested_clauses, nested_params = _filter_sql(expected, path)
+            clauses += nested_clauses
+            params += nested_params
+        elif expected is None:
+            clauses.append(f"{column} IS NULL")
+        else:
+            clauses.append(f"{column} = ?")
+            params.append(_sql_value(expected))
+    return clauses, params
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class SqliteStore(BaseStore):
+    """A `BaseStore` persisted in a SQLite database in WAL mode, shareable by several processes.
+
+    Each namespace prefix is a contiguous range of the primary key, and the ToDo `status` field has
+    an expression index, so namespace-scoped searches filtered on status never scan other users'
+    items. All the writes of one `batch` are committed in a single transaction. Connections are
+    pooled and used from worker threads by `abatch`, so the event loop never waits on disk I/O.
+    Vector search is not supported: a `query` is ignored and results are ordered by update time.
+
+    Args:
+        path: Path of the database file.
+        pool_size: Maximum number of open connections.
+        busy_timeout: Seconds a write waits for another process's write lock.
+    """
+
+    supports_ttl = False
+
+    def __init__(self, path: str, *, pool_size: int = 4, busy_timeout: float = 5.0):
+        self.path = path
+        self.pool_size = pool_size
+        self.busy_timeout = busy_timeout
+        self._pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._opened = 0
+        self._pool_lock = threading.Lock()
+        self._closed = False
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        if self._closed:
+            raise RuntimeError("SqliteStore is closed")
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                create = self._opened < self.pool_size
+                if create:
+                    self._opened += 1
+            conn = self._connect() if create else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        ops = list(ops)
+        results: list[Result] = [None] * len(ops)
+        # Like InMemoryStore, writes are applied after the reads, and the last write to a key wins
+        puts: dict[tuple[tuple[str, ...], str], PutOp] = {}
+        with self._connection() as conn:
+            for i, op in enumerate(ops):
+                if isinstance(op, GetOp):
+                    results[i] = self._get(conn, op)
+                elif isinstance(op, SearchOp):
+                    results[i] = self._search(conn, op)
+                elif isinstance(op, ListNamespacesOp):
+                    results[i] = self._list_namespaces(conn, op)
+                elif isinstance(op, PutOp):
+                    puts[(op.namespace, op.key)] = op
+                else:
+                    raise ValueError(f"Unknown operation type: {type(op)}")
+            if puts:
+                self._put(conn, puts.values())
+        return results
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        return await asyncio.to_thread(self.batch, list(ops))
+
+    def _get(self, conn: sqlite3.Connection, op: GetOp) -> Item | None:
+        row = conn.execute(
+            "SELECT value, created_at, updated_at FROM store WHERE namespace = ? AND key = ?",
+            (_encode_namespace(op.namespace), op.key),
+        ).fetchone()
+        if row is None:
+            return None
+        return Item(
+            value=json.loads(row[0]), key=op.key, namespace=op.namespace, created_at=row[1], updated_at=row[2]
+        )
+
+    def _search(self, conn: sqlite3.Connection, op: SearchOp) -> list[SearchItem]:
+        prefix = _encode_namespace(op.namespace_prefix)
+        clauses = ["namespace >= ?"]
+        params: list[Any] = [prefix]
+        if prefix:
+            clauses.append("namespace < ?")
+            params.append(prefix[:-1] + _AFTER_SEP)
+        if op.filter:
+            filter_clauses, filter_params = _filter_sql(op.filter)
+            clauses += filter_clauses
+            params += filter_params
+        rows = conn.execute(
+            f"SELECT namespace, key, value, created_at, updated_at FROM store WHERE {' AND '.join(clauses)} "
+            "ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+            (*params, op.limit, op.offset),
+        ).fetchall()
+        return [
+            SearchItem(
+                namespace=_decode_namespace(namespace),
+                key=key,
+                value=json.loads(value),
+                created_at=created_at,
+                updated_at=updated_at,
+            )
+            for namespace, key, value, created_at, updated_at in rows
+        ]
+
+    def _list_namespaces(self, conn: sqlite3.Connection, op: ListNamespacesOp) -> list[tuple[str, ...]]:
+        namespaces = [_decode_namespace(row[0]) for row in conn.execute("SELECT DISTINCT namespace FROM store")]
+        for condition in op.match_conditions or ():
+            path = tuple(condition.path)
+            if condition.match_type == "prefix":
+                namespaces = [ns for ns in namespaces if _matches(ns[: len(path)], path)]
+            else:
+                namespaces = [ns for ns in namespaces if len(ns) >= len(path) and _matches(ns[-len(path) :], path)]
+        if op.max_depth is not None:
+            namespaces = [ns[: op.max_depth] for ns in namespaces]
+        return sorted(set(namespaces))[op.offset : op.offset + op.limit]
+
+    def _put(self, conn: sqlite3.Connection, puts: Iterable[PutOp]) -> None:
+        now = _now()
+        upserts = []
+        deletes = []
+        for op in puts:
+            if op.value is None:
+                deletes.append((_encode_namespace(op.namespace), op.key))
+            else:
+                upserts.append((_encode_namespace(op.namespace), op.key, json.dumps(op.value), now, now))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if deletes:
+                conn.executemany("DELETE FROM store WHERE namespace = ? AND key = ?", deletes)
+            if upserts:
+                conn.executemany(
+                    "INSERT INTO store (namespace, key, value, created_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                    upserts,
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _matches(labels: tuple[str, ...], pattern: tuple[str, ...]) -> bool:
+    return len(labels) == len(pattern) and all(p == "*" or p == label for label, p in zip(labels, pattern))
+
+
+@asynccontextmanager
+async def sqlite_persistence(path: str | None) -> AsyncIterator[tuple[BaseStore | None, Any]]:
+    """Opens a `SqliteStore` and a SQLite checkpointer at `path`.
+
+    Checkpoints go to a separate `<path>.checkpoints` database so that checkpoint writes don't take the
+    store's write lock. Yields (None, None) without a path, leaving persistence to the LangGraph server.
+    Raises ImportError if langgraph-checkpoint-sqlite is missing rather than losing checkpoints on restart.
+    """
+    if path is None:
+        yield None, None
+        return
+    try:
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError as e:
+        raise ImportError(
+            "Persisting checkpoints to SQLite requires langgraph-checkpoint-sqlite and aiosqlite"
+        ) from e
+    store = SqliteStore(path)
+    try:
+        async with AsyncSqliteSaver.from_conn_string(f"{path}.checkpoints") as checkpointer:
+            yield store, checkpointer
+    finally:
+        store.close()
@@ -1,7 +1,9 @@
 import uuid
 import os
+import logging
 from datetime import datetime
 from contextlib import asynccontextmanager
+from functools import partial
 
 from pydantic import BaseModel, Field
 
@@ -11,7 +13,7 @@ from typing import Literal, Optional, TypedDict
 
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import merge_message_runs
-from langchain_core.messages import SystemMessage, HumanMessage
+from langchain_core.messages import SystemMessage, HumanMessage, ToolCall
 
 from langchain_openai import ChatOpenAI
 
@@ -19,13 +21,22 @@ from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, MessagesState, START, END
 from langgraph.store.base import BaseStore
 from langgraph.store.memory import InMemoryStore
-from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
 from dotenv import load_dotenv
 from langgraph.prebuilt import ToolNode
+from langgraph.types import Send
+from mcp.types import Tool
 
 import configuration
+import memory_worker
+import sqlite_store
+import todo_prompt
+import todo_store
+from src.tool_node.catalog import ToolCatalog
+from src.tool_node.registry import mcp_registry
+from src.tool_node.router import ToolRouter
 
-calendar_tools = []
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -47,6 +58,33 @@ class Spy:
                     r.outputs["generations"][0][0]["message"]["kwargs"]["tool_calls"]
                 )
 
+# Reuse models with tools bound across turns, binding converts every tool schema
+class BoundModelCache:
+    def __init__(self, model, max_size=8):
+        self.model = model
+        self.max_size = max_size
+        self._bound = {}
+
+    def get(self, tools, tools_fingerprint, parallel_tool_calls):
+        """Returns the model bound to `tools`, binding it only for a new fingerprint and flag."""
+        key = (tools_fingerprint, parallel_tool_calls)
+        if (bound := self._bound.get(key)) is None:
+            bound = self._bound[key] = self.model.bind_tools(tools, parallel_tool_calls=parallel_tool_calls)
+            # Graphs hold the models they use, only the most recent tool lists are worth sharing
+            while len(self._bound) > self.max_size:
+                del self._bound[next(iter(self._bound))]
+        return bound
+
+    def clear(self):
+        self._bound.clear()
+
+# Text of the latest user message, ToDos are ranked by relevance to it
+def latest_user_text(messages):
+    for message in reversed(messages):
+        if message.type == "human":
+            return message.content if isinstance(message.content, str) else None
+    return None
+
 # Extract information from tool calls for both patches and new memories in Trustcall
 def extract_tool_info(tool_calls, schema_name="Memory"):
     """Extract information from tool calls for both patches and new memories.
@@ -122,6 +160,16 @@ SERVER_CONFIGS = {
     }
 }
 
+# Number of calendar server processes, calendar tool calls are spread across them
+MCP_POOL_SIZE = int(os.environ.get("MCP_POOL_SIZE", "2"))
+# Optional directory for the calendar tool list snapshot. A new process then binds the tools of the
+# last run while the calendar server starts, instead of waiting for it to list its tools
+MCP_CATALOG_DIR = os.environ.get("MCP_CATALOG_DIR")
+
+# SQLite database for the ToDo/instructions store and the checkpoints when running outside the
+# LangGraph server, e.g. TASK_MAISTRO_DB=./task_maistro.db. Unset = the server's persistence
+TASK_MAISTRO_DB = os.environ.get("TASK_MAISTRO_DB")
+
 ## Schema definitions
 
 # ToDo schema
@@ -149,8 +197,24 @@ class UpdateMemory(TypedDict):
     """ Decision on what memory type to update """
     update_type: Literal['todo', 'instructions']
 
+# Input of the memory update nodes, sent by route_message with the UpdateMemory calls they answer
+class MemoryUpdateState(MessagesState):
+    tool_calls: list[ToolCall]
+
 # Initialize the model
 model = ChatOpenAI(model="gpt-4o", temperature=0)
+bound_models = BoundModelCache(model)
+todo_renderer = todo_prompt.TodoRenderer()
+# Memory updates of the "deferred" mode, run in the background
+memory_updates = memory_worker.MemoryUpdateQueue()
+
+# Create the Trustcall extractor for updating the ToDo list once, it compiles a graph and the schemas
+todo_extractor = create_extractor(
+    model,
+    tools=[ToDo],
+    tool_choice="ToDo",
+    enable_inserts=True
+)
 
 ## Prompts 
 
@@ -217,9 +281,36 @@ Your current instructions are:
 {current_instructions}
 </current_instructions>"""
 
+# The calendar tools of one graph, rebuilt when the server's tool list changes
+class CalendarTools:
+    def __init__(self, catalog, name="calendar_tools"):
+        self.name = name
+        self.catalog = catalog
+        self._rebuild(catalog)
+        # Held weakly by the catalog, dropped with the graph
+        catalog.on_change(self._rebuild)
+
+    def _rebuild(self, catalog):
+        self.tools = [
+            convert_mcp_tool_to_langchain_tool(
+                catalog.session,
+                Tool(name=tool["name"], description=tool["description"], inputSchema=tool["parameters"]),
+            )
+            for tool in catalog.cached()
+        ]
+        # Content hash of the tool schemas, the key of the model bound to them
+        self.fingerprint = catalog.fingerprint
+        self.tool_node = ToolNode(self.tools, name=self.name)
+        self.model = bound_models.get([UpdateMemory] + self.tools, self.fingerprint, True) if self.tools else None
+
+    async def run(self, input, config: RunnableConfig):
+        """Graph node answering calendar tool calls with the current tool list."""
+        self.catalog.revalidate()
+        return await self.tool_node.ainvoke(input, config)
+
 ## Node definitions
 
-def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore):
+async def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore, *, calendar: CalendarTools | None = None):
 
     """Load memories from the store and use them to personalize the chatbot's response."""
     
@@ -229,14 +320,22 @@ def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore)
     todo_category = configurable.todo_category
     task_maistro_role = configurable.task_maistro_role
 
-    # Retrieve people memory from the store
+    # A new user turn must see the memory updates deferred in the previous ones, by any worker sharing the store
+    if configurable.memory_updates == "deferred" and state["messages"][-1].type == "human":
+        await memory_updates.flush(
+            ("todo", todo_category, user_id), ("instructions", todo_category, user_id), store=store
+        )
+
+    # Retrieve the active ToDos, the most relevant to the latest message if the store has an index
     namespace = ("todo", todo_category, user_id)
-    memories = store.search(namespace)
-    todo = "\n".join(f"{mem.value}" for mem in memories)
+    memories = await todo_store.aload_todos(
+        store, namespace, query=latest_user_text(state["messages"]), limit=configurable.max_todos
+    )
+    todo = todo_renderer.render(namespace, memories, configurable.todo_token_budget)
 
     # Retrieve custom instructions
     namespace = ("instructions", todo_category, user_id)
-    memories = store.search(namespace)
+    memories = await store.asearch(namespace)
     if memories:
         instructions = memories[0].value
     else:
@@ -244,34 +343,29 @@ def task_mAIstro(state: MessagesState, config: RunnableConfig, store: BaseStore)
     
     system_msg = MODEL_SYSTEM_MESSAGE.format(task_maistro_role=task_maistro_role, todo=todo, instructions=instructions)
 
-    # Bind calendar tools to the model if available
-    global calendar_tools
-    print("Length of calendar tools: ", len(calendar_tools))
-    if calendar_tools:
-        all_tools = [UpdateMemory] + calendar_tools
-        model_with_tools = model.bind_tools(all_tools, parallel_tool_calls=True)
+    # Bind calendar tools to the model if available, refetched in the background once they expire
+    if calendar is not None:
+        calendar.catalog.revalidate()
+    if calendar is not None and calendar.model is not None:
+        model_with_tools = calendar.model
     else:
-        model_with_tools = model.bind_tools([UpdateMemory], parallel_tool_calls=False)
+        model_with_tools = bound_models.get([UpdateMemory], None, False)
 
     # Respond using memory as well as the chat history
-    response = model_with_tools.invoke([SystemMessage(content=system_msg)]+state["messages"])
+    response = await model_with_tools.ainvoke([SystemMessage(content=system_msg)]+state["messages"])
 
     return {"messages": [response]}
 
-def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore):
-
-    """Reflect on the chat history and update the memory collection."""
-    
-    # Get the user ID from the config
-    configurable = configuration.Configuration.from_runnable_config(config)
-    user_id = configurable.user_id
-    todo_category = configurable.todo_category
+async def extract_todos(messages, configurable, store):
+    """Runs Trustcall over the conversation and saves the ToDo changes, returns a summary of them."""
 
     # Define the namespace for the memories
-    namespace = ("todo", todo_category, user_id)
+    namespace = ("todo", configurable.todo_category, configurable.user_id)
 
-    # Retrieve the most recent memories for context
-    existing_items = store.search(namespace)
+    # Retrieve the active memories for context, the ones most relevant to the conversation first
+    existing_items = await todo_store.aload_todos(
+        store, namespace, query=latest_user_text(messages), limit=configurable.max_todos
+    )
 
     # Format the existing memories for the Trustcall extractor
     tool_name = "ToDo"
@@ -283,119 +377,150 @@ def update_todos(state: MessagesState, config: RunnableConfig, store: BaseStore)
 
     # Merge the chat history and the instruction
     TRUSTCALL_INSTRUCTION_FORMATTED=TRUSTCALL_INSTRUCTION.format(time=datetime.now().isoformat())
-    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + state["messages"][:-1]))
+    updated_messages=list(merge_message_runs(messages=[SystemMessage(content=TRUSTCALL_INSTRUCTION_FORMATTED)] + messages[:-1]))
 
-    # Initialize the spy for visibility into the tool calls made by Trustcall
+    # Initialize the spy for visibility into the tool calls made by Trustcall, one per invocation
     spy = Spy()
-    
-    # Create the Trustcall extractor for updating the ToDo list 
-    todo_extractor = create_extractor(
-    model,
-    tools=[ToDo],
-    tool_choice=tool_name,
-    enable_inserts=True
-    ).with_listeners(on_end=spy)
 
-    # Invoke the extractor
-    result = todo_extractor.invoke({"messages": updated_messages, 
-                                         "existing": existing_memories})
+    # Invoke the shared extractor with this invocation's listener
+    result = await todo_extractor.with_listeners(on_end=spy).ainvoke({"messages": updated_messages,
+                                           "existing": existing_memories})
 
-    # Save save the memories from Trustcall to the store
-    for r, rmeta in zip(result["responses"], result["response_metadata"]):
-        store.put(namespace,
-                  rmeta.get("json_doc_id", str(uuid.uuid4())),
-                  r.model_dump(mode="json"),
-            )
+    # Save the memories from Trustcall to the store, all inserts and patches in one batch
+    await todo_store.aput_todos(store, namespace, {
+        rmeta.get("json_doc_id", str(uuid.uuid4())): r.model_dump(mode="json")
+        for r, rmeta in zip(result["responses"], result["response_metadata"])
+    })
+    todo_renderer.invalidate(namespace)
+
+    # Extract the changes made by Trustcall for the ToolMessage returned to task_mAIstro
+    return extract_tool_info(spy.called_tools, tool_name)
+
+async def extract_instructions(messages, configurable, store):
+    """Rewrites the user's instructions for updating the ToDo list from the conversation."""
+
+    namespace = ("instructions", configurable.todo_category, configurable.user_id)
+
+    existing_memory = await store.aget(namespace, "user_instructions")
         
-    # Respond to the tool call made in task_mAIstro, confirming the update    
-    tool_calls = state['messages'][-1].tool_calls
-    tool_call_id = tool_calls[0].get('id')
+    # Format the memory in the system prompt
+    system_msg = CREATE_INSTRUCTIONS.format(current_instructions=existing_memory.value if existing_memory else None)
+    new_memory = await model.ainvoke([SystemMessage(content=system_msg)]+messages[:-1] + [HumanMessage(content="Please update the instructions based on the conversation")])
 
-    # Extract the changes made by Trustcall and add the the ToolMessage returned to task_mAIstro
-    todo_update_msg = extract_tool_info(spy.called_tools, tool_name)
-    return {"messages": [{"role": "tool", "content": todo_update_msg, "tool_call_id": tool_call_id}]}
+    # Overwrite the existing memory in the store 
+    key = "user_instructions"
+    await store.aput(namespace, key, {"memory": new_memory.content})
+    return "updated instructions"
 
-def update_instructions(state: MessagesState, config: RunnableConfig, store: BaseStore):
+async def update_todos(state: MemoryUpdateState, config: RunnableConfig, store: BaseStore):
 
     """Reflect on the chat history and update the memory collection."""
     
     # Get the user ID from the config
     configurable = configuration.Configuration.from_runnable_config(config)
-    user_id = configurable.user_id
-    todo_category = configurable.todo_category
+
+    if configurable.memory_updates == "deferred":
+        # Acknowledge now, the extraction runs in the background and is done before the next turn reads the list
+        namespace = ("todo", configurable.todo_category, configurable.user_id)
+        await memory_updates.asubmit(namespace, partial(extract_todos, state["messages"], configurable, store), store)
+        todo_update_msg = "ToDo list update scheduled"
+    else:
+        todo_update_msg = await extract_todos(state["messages"], configurable, store)
+
+    # Respond to the tool calls made in task_mAIstro, one extraction covers all of them
+    return {"messages": [
+        {"role": "tool", "content": todo_update_msg, "tool_call_id": tool_call["id"]}
+        for tool_call in state["tool_calls"]
+    ]}
+
+async def update_instructions(state: MemoryUpdateState, config: RunnableConfig, store: BaseStore):
+
+    """Reflect on the chat history and update the memory collection."""
     
-    namespace = ("instructions", todo_category, user_id)
+    # Get the user ID from the config
+    configurable = configuration.Configuration.from_runnable_config(config)
 
-    existing_memory = store.get(namespace, "user_instructions")
-        
-    # Format the memory in the system prompt
-    system_msg = CREATE_INSTRUCTIONS.format(current_instructions=existing_memory.value if existing_memory else None)
-    new_memory = model.invoke([SystemMessage(content=system_msg)]+state['messages'][:-1] + [HumanMessage(content="Please update the instructions based on the conversation")])
+    if configurable.memory_updates == "deferred":
+        namespace = ("instructions", configurable.todo_category, configurable.user_id)
+        await memory_updates.asubmit(namespace, partial(extract_instructions, state["messages"], configurable, store), store)
+        content = "instructions update scheduled"
+    else:
+        content = await extract_instructions(state["messages"], configurable, store)
 
-    # Overwrite the existing memory in the store 
-    key = "user_instructions"
-    store.put(namespace, key, {"memory": new_memory.content})
-    tool_calls = state['messages'][-1].tool_calls
-    tool_call_id = tool_calls[0].get('id')
-    # Return tool message with update verification
-    return {"messages": [{"role": "tool", "content": "updated instructions", "tool_call_id": tool_call_id}]}
+    # Return tool messages with update verification
+    return {"messages": [
+        {"role": "tool", "content": content, "tool_call_id": tool_call["id"]}
+        for tool_call in state["tool_calls"]
+    ]}
 
 # Conditional edge
-def route_message(state: MessagesState, config: RunnableConfig, store: BaseStore) -> Literal[END, "update_todos", "update_instructions", "calendar_tools"]:
+def route_message(state: MessagesState, config: RunnableConfig, store: BaseStore, *, router: ToolRouter) -> list[Send] | Literal[END]:
 
-    """Reflect on the memories and chat history to decide whether to update the memory collection."""
+    """Sends every tool call of the last message to the node that answers it, all in one step."""
     message = state['messages'][-1]
     if len(message.tool_calls) == 0:
         return END
-    else:
-        for tool_call in message.tool_calls:
-            print("Tool calls: ", tool_call)
-            # Only route UpdateMemory tool calls - other tool calls (like calendar) 
-            # are handled directly within the task_mAIstro node
-            
-            # Access tool_call properties correctly (as a dictionary)
-            tool_name = tool_call.get('name')
-            print(f"Processing tool: {tool_name}")
-            
-            if tool_name == "UpdateMemory":
-                update_type = tool_call['args'].get('update_type')
-                if update_type == "todo":
-                    return "update_todos"
-                elif update_type == "instructions":
-                    return "update_instructions"
-            elif tool_name == "list_events" or tool_name in ["create_event", "update_event", "delete_event"]:
-                print("TRANSITIONED TO CALENDAR TOOLS")
-                return "calendar_tools"
-            
-            # Check if it's any other calendar tool by checking against calendar_tools list
-            global calendar_tools
-            if calendar_tools and any(getattr(tool, 'name', None) == tool_name for tool in calendar_tools):
-                print(f"Routing calendar tool: {tool_name}")
-                return "calendar_tools"
-                
-            return END
+
+    updates = {"todo": [], "instructions": []}
+    tool_calls = {}
+    for tool_call in message.tool_calls:
+        update_type = tool_call["args"].get("update_type") if tool_call["name"] == "UpdateMemory" else None
+        if update_type in updates:
+            updates[update_type].append(tool_call)
+            continue
+        # Calendar calls, the default tool node answers unknown tool names with an error message
+        route = router.route(tool_call["name"])
+        logger.debug("Routing tool call %s (%s) to %s", tool_call["name"], tool_call["id"], route.node)
+        # The node knows the tool by its own name, not the namespaced one the model used
+        tool_calls.setdefault(route.node, []).append({**tool_call, "name": route.tool_name, "type": "tool_call"})
+
+    # The nodes run concurrently and all lead back to task_mAIstro, which then runs once. Several
+    # updates of the same memory are answered by a single extraction.
+    sends = [Send(node, calls) for node, calls in tool_calls.items()]
+    if updates["todo"]:
+        sends.append(Send("update_todos", {"messages": state["messages"], "tool_calls": updates["todo"]}))
+    if updates["instructions"]:
+        sends.append(Send("update_instructions", {"messages": state["messages"], "tool_calls": updates["instructions"]}))
+    return sends
 
 # Create the graph + all nodes
 @asynccontextmanager
 async def task_mAIstro_graph():
-    async with MultiServerMCPClient(SERVER_CONFIGS) as client:
-        global calendar_tools
-        calendar_tools = client.get_tools()
+    async with (
+        # The calendar server starts in the background, the first calls wait for it
+        mcp_registry.client(SERVER_CONFIGS, size=MCP_POOL_SIZE, load_tools=False, wait=False) as client,
+        sqlite_store.sqlite_persistence(TASK_MAISTRO_DB) as (store, checkpointer),
+    ):
+        catalog = ToolCatalog.for_session(
+            client.sessions["google-calendar"],
+            snapshot_path=os.path.join(MCP_CATALOG_DIR, "google-calendar.json") if MCP_CATALOG_DIR else None,
+        )
+        # Returns the snapshot at once if there is one, else waits for the server
+        await catalog.get()
+        # Tools, bound model and tool node of this graph only
+        calendar = CalendarTools(catalog)
 
         builder = StateGraph(MessagesState, config_schema=configuration.Configuration)
 
         # Define the flow of the memory extraction process
-        builder.add_node(task_mAIstro)
+        builder.add_node("task_mAIstro", partial(task_mAIstro, calendar=calendar))
         builder.add_node(update_todos)
         builder.add_node(update_instructions)
-        builder.add_node("calendar_tools", ToolNode(calendar_tools))
+        builder.add_node("calendar_tools", calendar.run)
 
         # Define the flow 
         builder.add_edge(START, "task_mAIstro")
-        builder.add_conditional_edges("task_mAIstro", route_message)
+        # Routes of this graph only, rebuilt when the calendar server's tool list changes
+        router = ToolRouter(default="calendar_tools")
+        router.add_catalog(catalog, "calendar_tools")
+        builder.add_conditional_edges(
+            "task_mAIstro",
+            partial(route_message, router=router),
+            ["update_todos", "update_instructions", *router.nodes, END],
+        )
         builder.add_edge("update_todos", "task_mAIstro")
         builder.add_edge("update_instructions", "task_mAIstro")
         builder.add_edge("calendar_tools", "task_mAIstro")
 
         # Compile the graph
-        yield builder.compile()
\ No newline at end of file
+        yield builder.compile(checkpointer=checkpointer, store=store)
\ No newline at end of file
@@ -0,0 +1,133 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+
+from langgraph.store.base import Item
+
+logger = logging.getLogger(__name__)
+
+HEADER = "task | status | deadline | minutes | solutions"
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        import tiktoken
+
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        # tiktoken downloads its BPE files on first use, fall back to an estimate when offline
+        logger.warning("No tokenizer for %s, estimating ToDo prompt tokens: %s", model, e)
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o") -> int:
+    """Number of tokens of `text` for `model`, or an estimate of 4 characters per token."""
+    if (encoding := _encoding(model)) is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+
+def _cell(value: str) -> str:
+    return " ".join(str(value).split()).replace("|", "/")
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    text = _cell(text)
+    return text if len(text) <= max_chars else text[: max_chars - 1].rstrip() + "…"
+
+
+def _deadline(value: str | None) -> str:
+    if not value:
+        return "-"
+    try:
+        return datetime.fromisoformat(value).strftime("%Y-%m-%d %H:%M")
+    except (TypeError, ValueError):
+        return _cell(value)
+
+
+class TodoRenderer:
+    """Renders ToDo items as a compact table for the system prompt, within a token budget.
+
+    Each ToDo is one `task | status | deadline | minutes | solutions` row. Solutions are truncated,
+    not summarised: only the first `max_solutions` are kept, each cut to `max_solution_chars`, with
+    a count of the ones left out. Rows are added in the given order until the budget is used, then a last line tells how
+    many ToDos were left out. The rendered block is cached per namespace and reused while the items'
+    keys and update times are unchanged, so any `store.put` to the namespace invalidates it.
+
+    Args:
+        token_budget: Maximum number of tokens of the rendered block.
+        max_solutions: Number of solutions shown per ToDo, the others are only counted.
+        max_solution_chars: Length each shown solution is truncated to.
+        model: Model whose tokenizer counts the tokens.
+        max_namespaces: Number of namespaces whose rendered block is kept.
+    """
+
+    def __init__(
+        self,
+        *,
+        token_budget: int = 1500,
+        max_solutions: int = 2,
+        max_solution_chars: int = 60,
+        model: str = "gpt-4o",
+        max_namespaces: int = 1024,
+    ):
+        self.token_budget = token_budget
+        self.max_solutions = max_solutions
+        self.max_solution_chars = max_solution_chars
+        self.model = model
+        self.max_namespaces = max_namespaces
+        self._cache: OrderedDict[tuple[str, ...], tuple[tuple, str]] = OrderedDict()
+
+    def row(self, todo: dict) -> str:
+        solutions = todo.get("solutions") or []
+        shown = "; ".join(_shorten(s, self.max_solution_chars) for s in solutions[: self.max_solutions])
+        if len(solutions) > self.max_solutions:
+            shown += f" (+{len(solutions) - self.max_solutions} more)"
+        return " | ".join(
+            [
+                _cell(todo.get("task", "")),
+                _cell(todo.get("status", "")),
+                _deadline(todo.get("deadline")),
+                str(todo["time_to_complete"]) if todo.get("time_to_complete") is not None else "-",
+                shown or "-",
+            ]
+        )
+
+    def render(self, namespace: tuple[str, ...], items: list[Item], token_budget: int | None = None) -> str:
+        """The table of `items`, from the cache if they haven't changed since it was rendered."""
+        budget = token_budget if token_budget is not None else self.token_budget
+        signature = (budget, tuple((item.key, item.updated_at) for item in items))
+        if (cached := self._cache.get(namespace)) is not None and cached[0] == signature:
+            self._cache.move_to_end(namespace)
+            return cached[1]
+        rendered = self._render(items, budget)
+        self._cache[namespace] = (signature, rendered)
+        self._cache.move_to_end(namespace)
+        if len(self._cache) > self.max_namespaces:
+            self._cache.popitem(last=False)
+        return rendered
+
+    def _render(self, items: list[Item], budget: int) -> str:
+        if not items:
+            return ""
+        lines = [HEADER]
+        used = count_tokens(HEADER, self.model)
+        for shown, item in enumerate(items):
+            line = self.row(item.value)
+            # +1 for the newline joining the rows
+            tokens = count_tokens(line, self.model) + 1
+            if used + tokens > budget:
+                lines.append(f"... {len(items) - shown} more ToDos not shown")
+                break
+            lines.append(line)
+            used += tokens
+        return "\n".join(lines)
+
+    def invalidate(self, namespace: tuple[str, ...] | None = None) -> None:
+        """Drops the cached block of `namespace`, or of every namespace."""
+        if namespace is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(namespace, None)
@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timezone
+from itertools import chain
+
+from langgraph.store.base import BaseStore, Item, PutOp, SearchOp
+
+# Statuses of ToDos the assistant still works with, "done" and "archived" items are never loaded
+ACTIVE_STATUSES = ("not started", "in progress")
+
+_NO_DEADLINE = datetime.max.replace(tzinfo=timezone.utc)
+
+
+def _deadline(item: Item) -> datetime:
+    deadline = item.value.get("deadline")
+    if not deadline:
+        return _NO_DEADLINE
+    try:
+        parsed = datetime.fromisoformat(deadline)
+    except (TypeError, ValueError):
+        return _NO_DEADLINE
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def supports_query(store: BaseStore) -> bool:
+    """Whether the store was configured with an embedding index, so `query` ranks results."""
+    return bool(getattr(store, "index_config", None))
+
+
+async def aload_todos(
+    store: BaseStore,
+    namespace: tuple[str, ...],
+    *,
+    query: str | None = None,
+    limit: int = 50,
+    page_size: int = 100,
+    max_scanned: int = 1000,
+) -> list[Item]:
+    """Loads the active ToDos of a namespace, at most `limit` of them.
+
+    Items are filtered on their status by the store, which stores with an index on the value
+    (Postgres, SQLite) answer without reading finished items. Without a `query` the active items
+    are paged through, `page_size` at a time and at most `max_scanned` per status, and the `limit`
+    with the nearest deadline are returned. With a `query` and a store with an embedding index,
+    the `limit` items most relevant to it are returned instead, best match first.
+
+    Args:
+        store: The store holding the ToDos.
+        namespace: The ToDo namespace, e.g. ("todo", category, user_id).
+        query: Text to rank items by, e.g. the latest user message. Ignored without an index.
+        limit: Maximum number of items returned.
+        page_size: Number of items fetched per search.
+        max_scanned: Maximum number of items read per status.
+    """
+    if query and supports_query(store):
+        results = await store.abatch(
+            [SearchOp(namespace, {"status": status}, limit, 0, query) for status in ACTIVE_STATUSES]
+        )
+        items = sorted(chain.from_iterable(results), key=lambda item: item.score or 0.0, reverse=True)
+        return items[:limit]
+
+    pages = await asyncio.gather(
+        *(_aload_status(store, namespace, status, page_size, max_scanned) for status in ACTIVE_STATUSES)
+    )
+    items = sorted(chain.from_iterable(pages), key=_deadline)
+    return items[:limit]
+
+
+async def aput_todos(store: BaseStore, namespace: tuple[str, ...], todos: dict[str, dict]) -> None:
+    """Writes ToDos, keyed by document id, in a single store batch.
+
+    One `abatch` is one round-trip, and stores that commit a batch in one transaction (`SqliteStore`,
+    `InMemoryStore`) apply either all the writes or none of them.
+    """
+    if todos:
+        await store.abatch([PutOp(namespace, key, value) for key, value in todos.items()])
+
+
+async def _aload_status(
+    store: BaseStore,
+    namespace: tuple[str, ...],
+    status: str,
+    page_size: int,
+    max_scanned: int,
+) -> list[Item]:
+    items: list[Item] = []
+    while len(items) < max_scanned:
+        page = await store.asearch(
+            namespace,
+            filter={"status": status},
+            limit=min(page_size, max_scanned - len(items)),
+            offset=len(items),
+        )
+        items.extend(page)
+        if len(page) < page_size:
+            break
+    return items
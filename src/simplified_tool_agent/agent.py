@@ -2,7 +2,6 @@ import asyncio
 import os
 from contextlib import asynccontextmanager
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from mcp import ClientSession
 from rich.console import Console
 from mcp.types import InitializeResult
@@ -14,6 +13,8 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.graph import START, StateGraph
 from langgraph.prebuilt import tools_condition
 from langgraph.prebuilt import ToolNode
+
+from src.tool_node.registry import mcp_registry
 load_dotenv()
 
 console = Console()
@@ -49,10 +50,13 @@ SERVER_CONFIGS = {
         }
 }
 
+# Number of processes started per MCP server, calls are spread across them
+MCP_POOL_SIZE = int(os.environ.get("MCP_POOL_SIZE", "2"))
+
 @asynccontextmanager
 async def amain():
     """Async main function to connect to MCP."""
-    async with MultiServerMCPClient(SERVER_CONFIGS) as client:
+    async with mcp_registry.client(SERVER_CONFIGS, size=MCP_POOL_SIZE) as client:
         # Get the session from the client for the "brave-search" server
         llm_tools = client.get_tools()
 
@@ -61,8 +65,8 @@ async def amain():
                                 You can use the google calendar tool to get the user's calendar events.")
 
         # Define assistant function
-        def assistant(state: MessagesState):
-            return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
+        async def assistant(state: MessagesState):
+            return {"messages": [await llm_with_tools.ainvoke([sys_msg] + state["messages"])]}
 
         # Build the graph
         builder = StateGraph(MessagesState)
@@ -2,7 +2,6 @@ import asyncio
 import os
 from contextlib import asynccontextmanager
 
-from langchain_mcp_adapters.client import MultiServerMCPClient
 from mcp import ClientSession
 from rich.console import Console
 from mcp.types import InitializeResult
@@ -14,7 +13,10 @@ from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.graph import START, StateGraph
 from langgraph.prebuilt import tools_condition
 
-from src.tool_node.mcp_tool_node import mcp_tool_list, McpToolNode
+from src.tool_node.catalog import ToolCatalog
+from src.tool_node.multi_server import MultiServerMcpToolNode
+from src.tool_node.registry import mcp_registry
+from src.tool_node.results import FileBlobStore, ResultSizePolicy
 
 load_dotenv()
 
@@ -51,35 +53,49 @@ SERVER_CONFIGS = {
         }
 }
 
+# Number of processes started per MCP server, calls are spread across them
+MCP_POOL_SIZE = int(os.environ.get("MCP_POOL_SIZE", "2"))
+# Optional directory for tool list snapshots. A new process then binds the tools of the last run
+# while its servers start, instead of waiting for them to list their tools
+MCP_CATALOG_DIR = os.environ.get("MCP_CATALOG_DIR")
+# Optional directory keeping the full payloads of tool results too large for the conversation
+MCP_BLOB_DIR = os.environ.get("MCP_BLOB_DIR")
+
 @asynccontextmanager
 async def amain():
     """Async main function to connect to MCP."""
-    async with MultiServerMCPClient(SERVER_CONFIGS) as client:
-        # Get the session from the client for the "brave-search" server
-        session = client.sessions.get("google-calendar")
-        if not session:
-            console.print("Failed to connect to the brave-search server")
-            return
-        
-        try:
-            llm_tools = await mcp_tool_list(session)
-            console.print("MCP Tools:", llm_tools)
-        except Exception as e:
-            llm_tools = []
-            console.print(f"MCP Server reports no tools available: {e}")
-
-        llm_with_tools = llm.bind_tools(llm_tools)
+    # Servers start in the background, the first calls wait for them
+    async with mcp_registry.client(SERVER_CONFIGS, size=MCP_POOL_SIZE, load_tools=False, wait=False) as client:
+        catalogs = {
+            server: ToolCatalog.for_session(
+                session,
+                snapshot_path=os.path.join(MCP_CATALOG_DIR, f"{server}.json") if MCP_CATALOG_DIR else None,
+            )
+            for server, session in client.sessions.items()
+        }
+        result_policy = ResultSizePolicy(blob_store=FileBlobStore(MCP_BLOB_DIR) if MCP_BLOB_DIR else None)
+        # One node for the tools of every server, each server with its own concurrency limits
+        tool_node = await MultiServerMcpToolNode(
+            client,
+            handle_tool_errors=True,
+            stream_results=True,
+            result_policy=result_policy,
+            server_options={server: {"catalog": catalog} for server, catalog in catalogs.items()},
+        ).init_funcs()
+        console.print("MCP Tools:", tool_node.tools)
+
         sys_msg = SystemMessage(content="You are a helpful assistant. Use available tools to assist the user. \
-                                You can use the google calendar tool to get the user's calendar events.")
+                                You can use the google calendar tool to get the user's calendar events \
+                                and the brave search tool to search the web.")
 
-        # Define assistant function
-        def assistant(state: MessagesState):
-            return {"messages": [llm_with_tools.invoke([sys_msg] + state["messages"])]}
+        # Define assistant function, the model is bound again after a server's tool list changed
+        async def assistant(state: MessagesState):
+            return {"messages": [await tool_node.bound_model(llm).ainvoke([sys_msg] + state["messages"])]}
 
         # Build the graph
         builder = StateGraph(MessagesState)
         builder.add_node("assistant", assistant)
-        builder.add_node("tools", await McpToolNode(session, handle_tool_errors=True).init_funcs())
+        builder.add_node("tools", tool_node)
 
         builder.add_edge(START, "assistant")
         builder.add_conditional_edges(
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from mcp.types import CallToolResult
+
+
+def call_key(tool_name: str, args: dict[str, Any] | None) -> str:
+    """Canonical key for a tool call: the tool name plus its args serialized with sorted keys."""
+    return tool_name + ":" + json.dumps(args or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def is_read_only(tool: dict[str, Any]) -> bool:
+    """Whether the tool metadata collected by `mcp_tool_list` marks the tool as read-only."""
+    annotations = tool.get("annotations") or {}
+    return bool(annotations.get("readOnlyHint")) and not annotations.get("destructiveHint")
+
+
+@dataclass
+class _Entry:
+    tool_name: str
+    result: CallToolResult
+    expires_at: float
+    size: int
+
+
+class ToolResultCache:
+    """TTL + LRU cache of successful MCP tool results.
+
+    Only tools on the allow-list are cached. The allow-list is built by `bind` from the tool metadata
+    collected in `McpToolNode.init_funcs`: every tool with an entry in `ttls`, plus, when `default_ttl`
+    is set, every tool whose MCP annotations mark it as read-only. Error results are never cached.
+
+    Calls of the other tools may change what the cached ones return, e.g. `create_event` makes
+    `list_events` stale, so each of them drops the results of the tools listed for it in
+    `invalidates`, or every cached result if it isn't listed. Use one cache per server, so that its
+    calls don't drop the results of another server's tools.
+
+    Args:
+        ttls: Time to live in seconds per tool name.
+        default_ttl: TTL for read-only tools missing from `ttls`. None = only cache tools in `ttls`.
+        max_entries: Maximum number of cached results before the least recently used are evicted.
+        max_bytes: Maximum total size of cached results (serialized JSON) before eviction.
+        per_thread: Scope entries to the `thread_id` of the run instead of sharing them across threads.
+        invalidates: Tools whose results a call of the key tool makes stale, [] for none. Tools missing
+            from it drop every cached result. Defaults to None = every non-cacheable call drops them all.
+
+    Example:
+        ```python
+        cache = ToolResultCache({"list_events": 30, "list_calendars": 300})
+        node = await McpToolNode(session, cache=cache).init_funcs()
+        ```
+    """
+
+    def __init__(
+        self,
+        ttls: dict[str, float] | None = None,
+        *,
+        default_ttl: float | None = None,
+        max_entries: int = 256,
+        max_bytes: int = 8 * 1024 * 1024,
+        per_thread: bool = False,
+        invalidates: dict[str, list[str]] | None = None,
+    ) -> None:
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.per_thread = per_thread
+        self.invalidates = dict(invalidates or {})
+        self.cacheable_tools: dict[str, float] = dict(self.ttls)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        # Bumped by each invalidation, a result fetched before one may be stale and isn't stored
+        self.generation = 0
+
+    def bind(self, tools_by_name: dict[str, dict[str, Any]]) -> ToolResultCache:
+        """Build the allow-list of cacheable tools from the node's tool metadata."""
+        cacheable: dict[str, float] = {}
+        for name, tool in tools_by_name.items():
+            if name in self.ttls:
+                cacheable[name] = self.ttls[name]
+            elif self.default_ttl is not None and is_read_only(tool):
+                cacheable[name] = self.default_ttl
+        self.cacheable_tools = cacheable
+        return self
+
+    def key(self, tool_name: str, args: dict[str, Any] | None, config: RunnableConfig | None = None) -> str | None:
+        """Cache key for the call, or None if the tool is not cacheable."""
+        if tool_name not in self.cacheable_tools:
+            return None
+        key = call_key(tool_name, args)
+        if self.per_thread:
+            thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+            key = f"{thread_id}|{key}"
+        return key
+
+    def get(self, key: str) -> CallToolResult | None:
+        if (entry := self._entries.get(key)) is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.result
+
+    def put(self, key: str, tool_name: str, result: CallToolResult, generation: int | None = None) -> None:
+        """Stores a result, unless the cache was invalidated since `generation` when the call started."""
+        if result.isError or (ttl := self.cacheable_tools.get(tool_name)) is None:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        size = len(result.model_dump_json())
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(tool_name, result, time.monotonic() + ttl, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, tool_name: str | None = None) -> None:
+        """Drop every cached result, or only those of `tool_name`."""
+        self.generation += 1
+        if tool_name is None:
+            self._entries.clear()
+            self._bytes = 0
+            return
+        for key in [k for k, entry in self._entries.items() if entry.tool_name == tool_name]:
+            self._remove(key)
+
+    def invalidate_after(self, tool_name: str) -> None:
+        """Drops the results a call of `tool_name` may have made stale, none if it is cacheable itself."""
+        if tool_name in self.cacheable_tools:
+            return
+        if (stale := self.invalidates.get(tool_name)) is None:
+            self.invalidate()
+            return
+        for name in stale:
+            self.invalidate(name)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Literal, cast
+from weakref import WeakKeyDictionary, WeakMethod
+
+from mcp.types import ListToolsResult, Request, RequestParams, Tool
+from pydantic import BaseModel
+
+from src.tool_node.notifications import TOOLS_LIST_CHANGED, subscribe
+
+logger = logging.getLogger(__name__)
+
+
+class _PaginatedParams(RequestParams):
+    cursor: str | None = None
+
+
+class _ListToolsPageRequest(Request[_PaginatedParams, Literal["tools/list"]]):
+    # mcp's ListToolsRequest can't carry a cursor in its params
+    method: Literal["tools/list"] = "tools/list"
+    params: _PaginatedParams
+
+
+def convert_mcp_tool(tool: Tool) -> dict[str, Any]:
+    """Converts an MCP tool to the OpenAI tool schema dict used by `bind_tools`."""
+    llm_tool = {
+        "name": tool.name,
+        "description": tool.description,
+        "parameters": tool.inputSchema,
+    }
+    # keep behavior hints (readOnlyHint, ...) from servers that send them, bind_tools ignores the extra key
+    if annotations := getattr(tool, "annotations", None):
+        llm_tool["annotations"] = annotations if isinstance(annotations, dict) else annotations.model_dump()
+    return llm_tool
+
+
+async def list_all_tools(session: Any) -> list[Tool]:
+    """Lists the session's tools, following pagination cursors until the last page."""
+    result: ListToolsResult = await session.list_tools()
+    tools = list(result.tools)
+    while result.nextCursor:
+        result = await session.send_request(
+            _ListToolsPageRequest(params=_PaginatedParams(cursor=result.nextCursor)), ListToolsResult
+        )
+        tools.extend(result.tools)
+    return tools
+
+
+def fingerprint(llm_tools: list[dict[str, Any]]) -> str:
+    """Content hash of a converted tool list."""
+    return hashlib.sha256(json.dumps(llm_tools, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# Default of `for_session` arguments, which only conflict with the existing catalog when given
+_UNSET: Any = object()
+
+
+def _log_refresh_error(task: asyncio.Future[Any]) -> None:
+    if not task.cancelled() and (error := task.exception()) is not None:
+        logger.warning("Failed to refresh MCP tool list: %s", error)
+
+
+class ToolCatalog:
+    """Cached, converted tool list of an MCP session.
+
+    The converted OpenAI-schema dicts are kept in memory with a content hash (`fingerprint`) and
+    refetched only when the server sends `notifications/tools/list_changed` or, if `ttl` is set, when
+    they are older than `ttl` seconds. Change listeners registered with `on_change` run only when the
+    content actually changed. Once a list is known, `get()` and `revalidate()` never wait for the
+    server: a stale list is returned as is and refetched in the background, and listeners see the new
+    one. With a `snapshot_path` the last list is persisted to disk. A new process then builds its
+    graph from the snapshot while its server starts (see `McpServerRegistry.client(wait=False)`),
+    and keeps it if the server can't be reached.
+
+    Args:
+        session: A ClientSession, PooledSession or any object with `list_tools` and `send_request`.
+        ttl: Seconds after which the list is refetched on the next `get()` or `revalidate()`.
+            None = only on notifications.
+        snapshot_path: JSON file the list is loaded from at creation and saved to after each change.
+    """
+
+    _catalogs: WeakKeyDictionary[Any, ToolCatalog] = WeakKeyDictionary()
+
+    def __init__(
+        self,
+        session: Any,
+        *,
+        ttl: float | None = 300.0,
+        snapshot_path: str | Path | None = None,
+    ) -> None:
+        self.session = session
+        self.ttl = ttl
+        self.snapshot_path = Path(snapshot_path) if snapshot_path is not None else None
+        self.tools: list[dict[str, Any]] | None = None
+        self.fingerprint: str | None = None
+        self.refreshed_at: float | None = None
+        self._stale = True
+        self._listeners: list[Callable[[], Callable[[ToolCatalog], None] | None]] = []
+        self._lock: asyncio.Lock | None = None
+        self._unsubscribe: Callable[[], None] | None = None
+        self._refresh_task: asyncio.Future[list[dict[str, Any]]] | None = None
+        self._load_snapshot()
+
+    @classmethod
+    def for_session(
+        cls,
+        session: Any,
+        *,
+        ttl: float | None = _UNSET,
+        snapshot_path: str | Path | None = _UNSET,
+    ) -> ToolCatalog:
+        """Returns the catalog shared by everyone using `session`, creating it on first use.
+
+        Raises ValueError if the catalog exists with another `ttl` or `snapshot_path` than the given ones.
+        """
+        if (catalog := cls._catalogs.get(session)) is None:
+            options: dict[str, Any] = {}
+            if ttl is not _UNSET:
+                options["ttl"] = ttl
+            if snapshot_path is not _UNSET:
+                options["snapshot_path"] = snapshot_path
+            catalog = cls._catalogs[session] = cls(session, **options)
+            return catalog
+        if ttl is not _UNSET and ttl != catalog.ttl:
+            raise ValueError(f"The tool catalog of this session already exists with ttl={catalog.ttl}")
+        path = Path(snapshot_path) if snapshot_path not in (_UNSET, None) else snapshot_path
+        if path is not _UNSET and path != catalog.snapshot_path:
+            raise ValueError(f"The tool catalog of this session already exists with snapshot_path={catalog.snapshot_path}")
+        return catalog
+
+    def _load_snapshot(self) -> None:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return
+        try:
+            snapshot = json.loads(self.snapshot_path.read_text())
+            self.tools = snapshot["tools"]
+            self.fingerprint = snapshot["fingerprint"]
+        except (OSError, ValueError, KeyError):
+            logger.warning("Ignoring unreadable tool catalog snapshot %s", self.snapshot_path, exc_info=True)
+
+    def _save_snapshot(self) -> None:
+        if self.snapshot_path is None:
+            return
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"fingerprint": self.fingerprint, "tools": self.tools}))
+        os.replace(tmp, self.snapshot_path)
+
+    def cached(self) -> list[dict[str, Any]]:
+        """The last known tool list (possibly from the snapshot) without any server round-trip."""
+        return list(self.tools or [])
+
+    def on_change(self, callback: Callable[[ToolCatalog], None]) -> None:
+        """Calls `callback(catalog)` after each refresh that changed the tool list.
+
+        Bound methods are held weakly, so registering a node's method doesn't keep the node alive.
+        """
+        if hasattr(callback, "__self__"):
+            self._listeners.append(WeakMethod(callback))
+        else:
+            self._listeners.append(lambda: callback)
+
+    def invalidate(self) -> None:
+        """Marks the list stale so the next `get()` refetches it."""
+        self._stale = True
+
+    def _is_fresh(self) -> bool:
+        if self._stale or self.refreshed_at is None:
+            return False
+        return self.ttl is None or time.monotonic() - self.refreshed_at < self.ttl
+
+    async def get(self) -> list[dict[str, Any]]:
+        """The tool list, only waiting for the server if no list is known yet.
+
+        A stale known list, e.g. a snapshot, is returned at once and refetched in the background.
+        """
+        if self.tools is None:
+            return await self.refresh()
+        self.revalidate()
+        return self.cached()
+
+    def revalidate(self) -> None:
+        """Starts a background refresh if the list is stale and none is running. Never waits."""
+        if self._is_fresh() or (self._refresh_task is not None and not self._refresh_task.done()):
+            return
+        self._refresh_task = asyncio.ensure_future(self.refresh())
+        self._refresh_task.add_done_callback(_log_refresh_error)
+
+    async def refresh(self) -> list[dict[str, Any]]:
+        """Refetches the tool list from the server, notifying listeners if it changed."""
+        if self._unsubscribe is None:
+            self._unsubscribe = subscribe(self.session, TOOLS_LIST_CHANGED, self._on_list_changed)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        requested_at = time.monotonic()
+        async with self._lock:
+            if self._is_fresh() and cast(float, self.refreshed_at) >= requested_at:
+                # Refreshed by a concurrent caller while we waited
+                return self.cached()
+            llm_tools = [convert_mcp_tool(tool) for tool in await list_all_tools(self.session) if isinstance(tool, BaseModel)]
+            self.refreshed_at = time.monotonic()
+            self._stale = False
+            new_fingerprint = fingerprint(llm_tools)
+            if new_fingerprint != self.fingerprint:
+                self.tools = llm_tools
+                self.fingerprint = new_fingerprint
+                self._save_snapshot()
+                for ref in list(self._listeners):
+                    if (listener := ref()) is None:
+                        self._listeners.remove(ref)
+                    else:
+                        listener(self)
+            return self.cached()
+
+    def _on_list_changed(self, _: Any) -> None:
+        self._stale = True
+        # Refresh eagerly so listeners (bound models, routers) see the change before the next turn
+        self._refresh_task = asyncio.ensure_future(self.refresh())
+        self._refresh_task.add_done_callback(_log_refresh_error)
+
+    def close(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
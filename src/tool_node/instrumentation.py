@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import threading
+from bisect import bisect_left
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal
+
+if TYPE_CHECKING:
+    from src.tool_node.resilience import CircuitBreaker, CircuitState
+    from src.tool_node.scheduler import ToolCallScheduler
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # optional dependency
+    otel_trace = None
+
+logger = logging.getLogger(__name__)
+
+CallStatus = Literal["success", "error", "timeout", "rejected"]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+_CIRCUIT_STATE_VALUES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+@dataclass
+class CallRecord:
+    """Measurements of one finished tool call.
+
+    Args:
+        tool_name: Name of the called tool.
+        server: Name of the MCP server, or of the node when the session has none.
+        started: Wall clock time the call started, in epoch seconds.
+        duration: Seconds from the node picking up the call to its ToolMessage.
+        queue_wait: Seconds spent waiting for a scheduler slot.
+        bytes_in: Size of the JSON-encoded arguments.
+        bytes_out: Size of the result content.
+        status: How the call ended.
+        error: Type name of the exception the call failed with, if any.
+        cached: The result came from the result cache.
+        coalesced: The result was shared with an identical concurrent call.
+        attempts: Number of attempts, retries included.
+    """
+
+    tool_name: str
+    server: str
+    started: float
+    duration: float
+    queue_wait: float = 0.0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    status: CallStatus = "success"
+    error: str | None = None
+    cached: bool = False
+    coalesced: bool = False
+    attempts: int = 1
+
+
+def payload_size(payload: Any) -> int:
+    """Approximate size in bytes of tool arguments or result content."""
+    if payload is None:
+        return 0
+    if isinstance(payload, str):
+        return len(payload.encode())
+    return len(json.dumps(payload, default=str).encode())
+
+
+def error_status(error: str) -> CallStatus:
+    """Status of a call that failed with the exception type named `error`."""
+    # Matched by name, the names are what nodes keep in `response_metadata["error"]`
+    if error == "CircuitOpenError":
+        return "rejected"
+    if error.endswith("TimeoutError"):
+        return "timeout"
+    return "error"
+
+
+class Instrumentation:
+    """Receives the measurements of tool nodes. This base class records nothing.
+
+    Nodes only build a `CallRecord` when they are given an instrumentation, so a node without one
+    pays nothing. Subclasses override `record_call`, and `bind` to watch a node's scheduler and
+    circuit breaker.
+    """
+
+    def bind(
+        self,
+        node_name: str,
+        scheduler: ToolCallScheduler | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        """Called once by every node using this instrumentation."""
+
+    def record_call(self, record: CallRecord) -> None:
+        """Called after every tool call, from the event loop running it."""
+
+
+class CompositeInstrumentation(Instrumentation):
+    """Forwards to several instrumentations, e.g. Prometheus metrics and OpenTelemetry spans."""
+
+    def __init__(self, *instrumentations: Instrumentation) -> None:
+        self.instrumentations = instrumentations
+
+    def bind(
+        self,
+        node_name: str,
+        scheduler: ToolCallScheduler | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        for instrumentation in self.instrumentations:
+            instrumentation.bind(node_name, scheduler, circuit_breaker)
+
+    def record_call(self, record: CallRecord) -> None:
+        for instrumentation in self.instrumentations:
+            try:
+                instrumentation.record_call(record)
+            except Exception:
+                logger.exception("Instrumentation %s failed", type(instrumentation).__name__)
+
+
+class _Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: tuple[str, ...]) -> None:
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labels = labels
+        # label values -> [per-bucket counts..., +Inf count], sum
+        self._series: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        if (series := self._series.get(label_values)) is None:
+            series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, (counts, total) in self._series.items():
+            labels = _labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else repr(float(bound))
+                yield f'{self.name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}'
+            yield f"{self.name}_sum{{{labels}}} {total[0]}"
+            yield f"{self.name}_count{{{labels}}} {cumulative}"
+
+
+class _Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...]) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, value: float = 1) -> None:
+        self._values[label_values] = self._values.get(label_values, 0) + value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for label_values, value in self._values.items():
+            yield f"{self.name}{{{_labels(self.labels, label_values)}}} {value}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class PrometheusMetrics(Instrumentation):
+    """Tool call metrics in the Prometheus text exposition format.
+
+    Records per server and tool: call latency and queue wait histograms, argument and result size
+    histograms, and call counts by status (success, error, timeout, rejected by an open circuit).
+    Gauges of in-flight and queued calls are read from the bound schedulers when rendering, and
+    circuit breaker state and transitions are tracked for the bound breakers. Serve `render()` from
+    a `/metrics` endpoint, or pass it to a Prometheus push gateway.
+
+    Example:
+        ```python
+        metrics = PrometheusMetrics()
+        node = McpToolNode(session, instrumentation=metrics)
+        ...
+        print(metrics.render())
+        ```
+    """
+
+    def __init__(
+        self,
+        *,
+        latency_buckets: Sequence[float] = LATENCY_BUCKETS,
+        size_buckets: Sequence[float] = SIZE_BUCKETS,
+    ) -> None:
+        labels = ("server", "tool")
+        self.duration = _Histogram("mcp_tool_call_duration_seconds", "Tool call latency.", latency_buckets, labels)
+        self.queue_wait = _Histogram(
+            "mcp_tool_call_queue_wait_seconds", "Time tool calls waited for a scheduler slot.", latency_buckets, labels
+        )
+        self.request_bytes = _Histogram("mcp_tool_call_request_bytes", "Size of tool call arguments.", size_buckets, labels)
+        self.response_bytes = _Histogram("mcp_tool_call_response_bytes", "Size of tool results.", size_buckets, labels)
+        self.calls = _Counter("mcp_tool_calls_total", "Tool calls by outcome.", ("server", "tool", "status"))
+        self.retries = _Counter("mcp_tool_call_retries_total", "Retried tool call attempts.", labels)
+        self.cache_hits = _Counter("mcp_tool_call_cache_hits_total", "Tool calls answered from the cache.", labels)
+        self.coalesced = _Counter("mcp_tool_calls_coalesced_total", "Tool calls that shared a result.", labels)
+        self.circuit_transitions = _Counter(
+            "mcp_circuit_transitions_total", "Circuit breaker state changes.", ("server", "from", "to")
+        )
+        self._schedulers: dict[str, ToolCallScheduler] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        # record_call may be reached from several event loop threads
+        self._lock = threading.Lock()
+
+    def bind(
+        self,
+        node_name: str,
+        scheduler: ToolCallScheduler | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+    ) -> None:
+        if scheduler is not None:
+            self._schedulers[node_name] = scheduler
+        if circuit_breaker is not None and circuit_breaker.name not in self._breakers:
+            self._breakers[circuit_breaker.name] = circuit_breaker
+            circuit_breaker.on_transition(self._on_transition)
+
+    def _on_transition(self, breaker: CircuitBreaker, from_state: CircuitState, to_state: CircuitState) -> None:
+        with self._lock:
+            self.circuit_transitions.inc(breaker.name, from_state, to_state)
+
+    def record_call(self, record: CallRecord) -> None:
+        key = (record.server, record.tool_name)
+        with self._lock:
+            self.calls.inc(*key, record.status)
+            self.duration.observe(record.duration, *key)
+            self.queue_wait.observe(record.queue_wait, *key)
+            self.request_bytes.observe(record.bytes_in, *key)
+            self.response_bytes.observe(record.bytes_out, *key)
+            if record.attempts > 1:
+                self.retries.inc(*key, value=record.attempts - 1)
+            if record.cached:
+                self.cache_hits.inc(*key)
+            if record.coalesced:
+                self.coalesced.inc(*key)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        with self._lock:
+            lines = [
+                line
+                for metric in (
+                    self.duration,
+                    self.queue_wait,
+                    self.request_bytes,
+                    self.response_bytes,
+                    self.calls,
+                    self.retries,
+                    self.cache_hits,
+                    self.coalesced,
+                    self.circuit_transitions,
+                )
+                for line in metric.render()
+            ]
+        gauges: list[tuple[str, str, str, dict[str, float]]] = [
+            (
+                "mcp_tool_calls_in_flight",
+                "Tool calls holding a scheduler slot.",
+                "node",
+                {name: s.in_flight for name, s in self._schedulers.items()},
+            ),
+            (
+                "mcp_tool_calls_queued",
+                "Tool calls waiting for a scheduler slot.",
+                "node",
+                {name: s.queue_depth for name, s in self._schedulers.items()},
+            ),
+            (
+                "mcp_circuit_state",
+                "Circuit breaker state: 0 closed, 1 half open, 2 open.",
+                "server",
+                {name: _CIRCUIT_STATE_VALUES[b.state] for name, b in self._breakers.items()},
+            ),
+        ]
+        for name, help, label, values in gauges:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+            lines += [f'{name}{{{label}="{_escape(key)}"}} {value}' for key, value in values.items()]
+        return "\n".join(lines) + "\n"
+
+
+class OpenTelemetrySpans(Instrumentation):
+    """Exports every tool call as an OpenTelemetry client span.
+
+    Spans are created when the call finishes, with its real start and end times, under the span that
+    is current in the calling task. Requires the `opentelemetry-api` package and an SDK configured by
+    the application.
+
+    Args:
+        tracer: Tracer to create spans with. Defaults to the global tracer provider's.
+    """
+
+    def __init__(self, tracer: Any | None = None) -> None:
+        if otel_trace is None:
+            raise ImportError("OpenTelemetrySpans requires opentelemetry-api: pip install opentelemetry-api")
+        self.tracer = tracer or otel_trace.get_tracer(__name__)
+
+    def record_call(self, record: CallRecord) -> None:
+        start = int(record.started * 1e9)
+        span = self.tracer.start_span(
+            f"tools/call {record.tool_name}",
+            kind=otel_trace.SpanKind.CLIENT,
+            start_time=start,
+            attributes={
+                "rpc.system": "mcp",
+                "rpc.method": "tools/call",
+                "mcp.server": record.server,
+                "mcp.tool.name": record.tool_name,
+                "mcp.tool.status": record.status,
+                "mcp.tool.queue_wait": record.queue_wait,
+                "mcp.tool.request_bytes": record.bytes_in,
+                "mcp.tool.response_bytes": record.bytes_out,
+                "mcp.tool.cached": record.cached,
+                "mcp.tool.coalesced": record.coalesced,
+                "mcp.tool.attempts": record.attempts,
+            },
+        )
+        if record.status != "success":
+            if record.error is not None:
+                span.set_attribute("error.type", record.error)
+            span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, record.status))
+        span.end(end_time=start + int(record.duration * 1e9))
+
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from collections import deque
+from collections.abc import Awaitable, Callable, Coroutine
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class EventLoopThread:
+    """An event loop running forever in a daemon thread, to drive MCP sessions from sync code.
+
+    MCP sessions are bound to the loop that opened them, so open them on this loop (e.g.
+    `thread.run(mcp_registry.session(...))`) and every sync caller, from any thread, runs its calls
+    there with `run` or `submit`. Submissions are queued and the loop is woken once for all the
+    submissions queued since it last woke, so many threads calling at once cost one wake-up per
+    batch instead of one per call. Use `shared()` for the process-wide instance.
+
+    Args:
+        name: Name of the thread.
+    """
+
+    _shared: EventLoopThread | None = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, name: str = "mcp-event-loop") -> None:
+        self.name = name
+        self.batches = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+        self._pending: deque[tuple[Callable[[], Awaitable[Any]], concurrent.futures.Future[Any]]] = deque()
+        self._wake_scheduled = False
+
+    @classmethod
+    def shared(cls) -> EventLoopThread:
+        """The loop thread shared by every sync caller in this process, started on first use."""
+        with cls._shared_lock:
+            if cls._shared is None or not cls._shared.running:
+                cls._shared = cls().start()
+            return cls._shared
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            raise RuntimeError("EventLoopThread is not started")
+        return self._loop
+
+    def start(self) -> EventLoopThread:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._started.wait()
+        return self
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._started.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def submit(self, fn: Callable[[], Awaitable[T]]) -> concurrent.futures.Future[T]:
+        """Runs the coroutine made by `fn()` on the loop. Safe to call from any thread."""
+        if not self.running:
+            self.start()
+        future: concurrent.futures.Future[T] = concurrent.futures.Future()
+        with self._lock:
+            self._pending.append((fn, future))
+            wake = not self._wake_scheduled
+            self._wake_scheduled = True
+        if wake:
+            self.loop.call_soon_threadsafe(self._drain)
+        return future
+
+    def _drain(self) -> None:
+        with self._lock:
+            batch, self._pending = self._pending, deque()
+            self._wake_scheduled = False
+        self.batches += 1
+        for fn, future in batch:
+            if future.cancelled():
+                continue
+            try:
+                task = asyncio.ensure_future(fn())
+            except BaseException as e:
+                future.set_exception(e)
+                continue
+            task.add_done_callback(_copy_outcome(future))
+            # The future stays pending while the task runs, so a caller can cancel it, which cancels the task
+            future.add_done_callback(self._cancel_with(task))
+
+    def _cancel_with(self, task: asyncio.Future[Any]) -> Callable[[concurrent.futures.Future[Any]], None]:
+        def cancel(future: concurrent.futures.Future[Any]) -> None:
+            if future.cancelled() and not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(task.cancel)
+
+        return cancel
+
+    def run(self, coro: Coroutine[Any, Any, T] | Callable[[], Awaitable[T]], timeout: float | None = None) -> T:
+        """Runs a coroutine on the loop and blocks the calling thread until it is done.
+
+        Raises RuntimeError if called from the loop's own thread, which would wait on itself forever.
+        """
+        if self.in_loop_thread():
+            raise RuntimeError("EventLoopThread.run called from its own loop, await the coroutine instead")
+        fn = coro if callable(coro) else (lambda: coro)
+        future = self.submit(fn)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # Timed out or interrupted: don't leave the call running on the loop
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        """Stops the loop and waits for its thread. Tasks still running are abandoned."""
+        if self._thread is None or self._loop is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+
+
+def _copy_outcome(future: concurrent.futures.Future[T]) -> Callable[[asyncio.Future[T]], None]:
+    """Done callback copying an asyncio task's outcome to a concurrent future."""
+
+    def copy(task: asyncio.Future[T]) -> None:
+        try:
+            if task.cancelled():
+                future.cancel()
+            elif (error := task.exception()) is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(task.result())
+        except concurrent.futures.InvalidStateError:
+            # Cancelled by its caller meanwhile
+            pass
+
+    return copy
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from functools import partial
 from typing import (
     Literal,
     cast,
 )
-from collections.abc import Callable
-from rich.console import Console
+from collections.abc import Callable, Iterable
 from langgraph.prebuilt.tool_node import (
     msg_content_output,
     INVALID_TOOL_NAME_ERROR_TEMPLATE,
@@ -22,26 +26,70 @@ from langchain_core.messages import (
 from langchain_core.runnables import RunnableConfig
 from langchain_core.runnables.utils import Input
 
+from langgraph.constants import CONF, CONFIG_KEY_STREAM_WRITER
 from langgraph.errors import GraphInterrupt
 from langgraph.store.base import BaseStore
+from langgraph.types import StreamWriter
 from langgraph.utils.runnable import RunnableCallable
 from mcp import ClientSession
+from mcp.types import CallToolResult, ProgressNotification, ProgressNotificationParams, ProgressToken
 
 from pydantic import BaseModel
 from typing import Any
 
-console = Console()
+from src.tool_node.cache import ToolResultCache
+from src.tool_node.catalog import ToolCatalog, convert_mcp_tool, list_all_tools
+from src.tool_node.instrumentation import CallRecord, Instrumentation, error_status, payload_size
+from src.tool_node.loop_thread import EventLoopThread
+from src.tool_node.notifications import PROGRESS, NotificationRouter, subscribe
+from src.tool_node.resilience import CircuitBreaker, RetryPolicy
+from src.tool_node.results import ResultSizePolicy
+from src.tool_node.rpc import call_tool
+from src.tool_node.scheduler import CallTiming, ToolCallScheduler
+from src.tool_node.session_pool import PooledSession
+from src.tool_node.singleflight import SingleFlight
+from src.tool_node.validation import ArgumentValidationError, Validator, compile_validator, validate_arguments
 
+logger = logging.getLogger(__name__)
 
-def mcp_tool_node_basic(session: ClientSession):
-    """Basic tool node that makes calls to MCP tools."""
+
+def mcp_tool_node_basic(session: ClientSession | PooledSession, instrumentation: Instrumentation | None = None):
+    """Basic tool node that makes calls to MCP tools.
+
+    Args:
+        session: The MCP session to call the tools with.
+        instrumentation: Optional receiver of per-call latency, payload size and status measurements.
+    """
+    server = getattr(session, "server_name", "tools")
 
     async def my_tool_node(state: dict):
         result = []
-        # console.print("state:", state)
         for tool_call in state["messages"][-1].tool_calls:
-            # console.print("Tool calls:", tool_call)
-            res = await session.call_tool(tool_call["name"], arguments=tool_call["args"])
+            logger.debug("Calling tool %s", tool_call["name"])
+            if instrumentation is None:
+                res = await session.call_tool(tool_call["name"], arguments=tool_call["args"])
+            else:
+                started, clock = time.time(), time.perf_counter()
+                try:
+                    res = await session.call_tool(tool_call["name"], arguments=tool_call["args"])
+                except Exception as e:
+                    status, error, res = error_status(type(e).__name__), type(e).__name__, None
+                    raise
+                else:
+                    status, error = "error" if res.isError else "success", None
+                finally:
+                    instrumentation.record_call(
+                        CallRecord(
+                            tool_name=tool_call["name"],
+                            server=server,
+                            started=started,
+                            duration=time.perf_counter() - clock,
+                            bytes_in=payload_size(tool_call["args"]),
+                            bytes_out=payload_size([c.model_dump() for c in res.content]) if res is not None else 0,
+                            status=status,
+                            error=error,
+                        )
+                    )
             tool_message: ToolMessage = ToolMessage(
                 name=tool_call["name"],
                 tool_call_id=tool_call["id"],
@@ -54,35 +102,94 @@ def mcp_tool_node_basic(session: ClientSession):
     return my_tool_node
 
 
-async def mcp_tool_list(session: ClientSession) -> list[dict[str, Any]]:
-    """Gets list of tools from MCP and converts to OpenAI standard schema."""
+async def mcp_tool_list(session: ClientSession | PooledSession) -> list[dict[str, Any]]:
+    """Gets list of tools from MCP and converts to OpenAI standard schema.
+
+    Use a `ToolCatalog` to avoid a `list_tools` round-trip on every call.
+    """
     try:
-        mcp_tools = (await session.list_tools()).tools
-    except Exception as _:
+        mcp_tools = await list_all_tools(session)
+    except Exception as e:
+        logger.warning("Failed to list MCP tools: %s", e)
         mcp_tools = []
     # map mcp tools to openai spec dict
-    llm_tools = [
-        {
-            "name": tool.name,
-            "description": tool.description,
-            "parameters": tool.inputSchema,
-        }
-        for tool in mcp_tools
-        if isinstance(tool, BaseModel)
-    ]
+    llm_tools = [convert_mcp_tool(tool) for tool in mcp_tools if isinstance(tool, BaseModel)]
     return llm_tools
 
 
+def parse_tool_calls(
+    input: list[AnyMessage] | dict[str, Any] | BaseModel,
+    messages_key: str = "messages",
+) -> tuple[list[ToolCall], Literal["list", "dict"]]:
+    """The tool calls of the last message of a tool node's input, and whether the input was a list or a state."""
+    if isinstance(input, list):
+        output_type: Literal["list", "dict"] = "list"
+        message: AnyMessage = input[-1]
+    elif isinstance(input, dict) and (messages := input.get(messages_key, [])):
+        output_type = "dict"
+        message = messages[-1]
+    elif messages := getattr(input, messages_key, None):
+        # Assume dataclass-like state that can coerce from dict
+        output_type = "dict"
+        message = messages[-1]
+    else:
+        raise ValueError("No message found in input")
+
+    if not isinstance(message, AIMessage):
+        raise ValueError("Last message is not an AIMessage")
+    return message.tool_calls, output_type
+
+
+def unknown_tool_message(call: ToolCall, available_tools: Iterable[str]) -> ToolMessage:
+    """The error ToolMessage answering a call of a tool the node doesn't have."""
+    content = INVALID_TOOL_NAME_ERROR_TEMPLATE.format(
+        requested_tool=call["name"],
+        available_tools=", ".join(available_tools),
+    )
+    return ToolMessage(
+        content,
+        name=call["name"],
+        tool_call_id=call["id"],
+        status="error",
+        response_metadata={"error": "UnknownToolError"},
+    )
+
+
+def record_rejected_call(instrumentation: Instrumentation, call: ToolCall, server: str, tool_message: ToolMessage) -> None:
+    """Records a call answered with an error before reaching a server, like the calls that failed there."""
+    error = tool_message.response_metadata.get("error", "Error")
+    instrumentation.record_call(
+        CallRecord(
+            tool_name=call["name"],
+            server=server,
+            started=time.time(),
+            duration=0.0,
+            bytes_in=payload_size(call["args"]),
+            bytes_out=payload_size(tool_message.content),
+            status=error_status(error),
+            error=error,
+        )
+    )
+
+
+class ToolCallTimeoutError(TimeoutError):
+    """A tool call ran out of its time budget and was cancelled."""
+
+
 class McpToolNode(RunnableCallable):
     """A node that runs the tools called in the last AIMessage.
 
     It can be used either in StateGraph with a "messages" state key (or a custom key passed via ToolNode's 'messages_key').
-    If multiple tool calls are requested, they will be run in parallel. The output will be
-    a list of ToolMessages, one for each tool call.
+    If multiple tool calls are requested, they will be run in parallel, subject to the limits of the
+    node's `ToolCallScheduler`. The output will be a list of ToolMessages, one for each tool call, in
+    the same order as the tool calls. Each ToolMessage reports the time the call spent queued and
+    executing in `response_metadata["timing"]`, or `response_metadata["coalesced"]` when it shared the
+    result of an identical call.
 
 
     Args:
-        mcp_session: An initialized MCP ClientSession.
+        mcp_session: An initialized MCP ClientSession, or a PooledSession to spread calls over several
+            server processes.
         whitelisted_tools: A list of tool names that can be run. Defaults to None = Allow all
         blacklisted_tools: A list of tool names that should not be run. Defaults to None = Allow all
         name: The name of the ToolNode in the graph. Defaults to "tools".
@@ -102,9 +209,59 @@ class McpToolNode(RunnableCallable):
         messages_key: The state key in the input that contains the list of messages.
             The same key will be used for the output from the ToolNode.
             Defaults to "messages".
+        trace: Whether to trace the node's runs with LangChain callbacks. Defaults to False.
+        scheduler: Controls how many calls run at once, per tool and in total, and their call rates.
+            Defaults to a `ToolCallScheduler` with its default global limit and no per-tool limits.
+            Pass the same scheduler to several nodes running on one event loop to make them share the limits.
+        cache: Optional result cache for idempotent tools. Its allow-list is built from the tool
+            metadata in `init_funcs`. Calls of the other tools invalidate the results they may have made
+            stale, see `ToolResultCache`. Defaults to None = no caching.
+        single_flight: Optional coalescing of identical concurrent calls into one `call_tool`. Every
+            caller still gets its own ToolMessage. Share one instance between nodes using the same
+            session to coalesce across graphs. Defaults to None = no coalescing.
+        catalog: Optional cached tool catalog of `mcp_session`. When set, `init_funcs` reads tools from it
+            instead of calling `list_tools`, the node picks up tool list changes automatically, and
+            each run starts a background refresh of the catalog once its `ttl` has expired.
+        stream_results: Emit each ToolMessage on the graph's "custom" stream as soon as its call
+            finishes, and forward the servers' progress notifications while calls run. The node's
+            state update is unchanged and still ordered like the tool calls. Defaults to False.
+
+            Streamed events are dicts: `{"type": "tool_result", "message": ToolMessage}` and
+            `{"type": "tool_progress", "tool_call_id": ..., "name": ..., "progress": ..., "total": ...}`.
+        timeout: Seconds a single tool call may take, queueing included. Defaults to None = no limit.
+        tool_timeouts: Per-tool overrides of `timeout`, keyed by tool name.
+        batch_timeout: Seconds all the tool calls of one node run may take together. Defaults to None.
+
+            A run can also set an absolute deadline (epoch seconds or an aware datetime) in
+            `config["configurable"]["deadline"]`; every call gets at most the time left until then.
+            A call that runs out of time is cancelled, the server is sent `notifications/cancelled`,
+            and the call is reported through `handle_tool_errors` as a `ToolCallTimeoutError`.
+        retry_policy: Retries calls that fail with a transient error, with exponential backoff.
+            Retries share the call's time budget. Defaults to None = no retries.
+        tool_retry_policies: Per-tool overrides of `retry_policy`, keyed by tool name.
+        circuit_breaker: Optional breaker for the node's server. While it is open, calls fail
+            immediately with a `CircuitOpenError` instead of waiting on a dead server. Share it
+            between nodes using the same server.
+        instrumentation: Optional receiver of a `CallRecord` per tool call (latency, queue wait,
+            payload sizes, status), e.g. `PrometheusMetrics` or `OpenTelemetrySpans`. It is also bound
+            to the node's scheduler and circuit breaker for their gauges. Defaults to None = no
+            measurements are taken.
+        result_policy: Caps the size of the results kept in the ToolMessages. Oversized results are
+            truncated, binary content is replaced by a note, and with a blob store the full payloads
+            are stored there and referenced in the ToolMessage's `artifact`, which the model never
+            sees. Defaults to None = results are kept whole.
+        tool_result_policies: Per-tool overrides of `result_policy`, keyed by tool name.
+        validate_args: Check each call's arguments against the tool's `inputSchema` before sending it.
+            Invalid calls are answered at once with an error ToolMessage naming the offending
+            argument, and safe coercions such as "3" -> 3 for an integer are applied. The
+            validators are compiled when the tools are loaded. Defaults to True.
+        loop_thread: The `EventLoopThread` whose loop owns `mcp_session`. Sync runs (`invoke`, sync
+            graphs, threaded workers) submit their calls to it and block until they are done;
+            concurrent sync runs from many threads share the loop and its session. Defaults to None
+            = the node can only be run from the loop that owns the session, with `ainvoke`.
 
     Important:
-        - This node must me used in an async graph. graph.ainvoke()
+        - This node must me used in an async graph. graph.ainvoke(), unless a `loop_thread` is given.
         - Must be called before the first invocation to populate the tools_by_name dictionary.
         - The state MUST contain a list of messages.
         - The last message MUST be an `AIMessage`.
@@ -115,7 +272,7 @@ class McpToolNode(RunnableCallable):
 
     def __init__(
         self,
-        mcp_session: ClientSession,
+        mcp_session: ClientSession | PooledSession,
         *,
         whitelisted_tools: list[str] | None = None,
         blacklisted_tools: list[str] | None = None,
@@ -123,26 +280,90 @@ class McpToolNode(RunnableCallable):
         tags: list[str] | None = None,
         handle_tool_errors: bool | str | Callable[..., str] | tuple[type[Exception], ...] = True,
         messages_key: str = "messages",
+        trace: bool = False,
+        scheduler: ToolCallScheduler | None = None,
+        cache: ToolResultCache | None = None,
+        single_flight: SingleFlight | None = None,
+        catalog: ToolCatalog | None = None,
+        stream_results: bool = False,
+        timeout: float | None = None,
+        tool_timeouts: dict[str, float] | None = None,
+        batch_timeout: float | None = None,
+        retry_policy: RetryPolicy | None = None,
+        tool_retry_policies: dict[str, RetryPolicy] | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        instrumentation: Instrumentation | None = None,
+        result_policy: ResultSizePolicy | None = None,
+        tool_result_policies: dict[str, ResultSizePolicy] | None = None,
+        validate_args: bool = True,
+        loop_thread: EventLoopThread | None = None,
     ) -> None:
-        super().__init__(self._func, self._afunc, name=name, tags=tags, trace=False)
+        super().__init__(self._func, self._afunc, name=name, tags=tags, trace=trace)
         self.tools_by_name: dict[str, dict] = {}
         self.handle_tool_errors = handle_tool_errors
         self.messages_key = messages_key
         self.mcp_session = mcp_session
         self.whitelisted_tools = whitelisted_tools
         self.blacklisted_tools = blacklisted_tools
+        self.scheduler = scheduler or ToolCallScheduler()
+        self.cache = cache
+        self.single_flight = single_flight
+        self.catalog = catalog
+        self.stream_results = stream_results
+        self.timeout = timeout
+        self.tool_timeouts = dict(tool_timeouts or {})
+        self.batch_timeout = batch_timeout
+        self.retry_policy = retry_policy
+        self.tool_retry_policies = dict(tool_retry_policies or {})
+        self.circuit_breaker = circuit_breaker
+        self.instrumentation = instrumentation
+        self.result_policy = result_policy
+        self.tool_result_policies = dict(tool_result_policies or {})
+        self.validate_args = validate_args
+        self.loop_thread = loop_thread
+        self._validators: dict[str, Validator] = {}
+        self.server_name: str = getattr(mcp_session, "server_name", name)
+        if instrumentation is not None:
+            instrumentation.bind(name, self.scheduler, circuit_breaker)
+        # progress token -> callback forwarding the notification to the run's stream
+        self._progress_handlers: dict[ProgressToken, Callable[[ProgressNotificationParams], None]] = {}
+        self._unsubscribe_progress: Callable[[], None] | None = None
 
     async def init_funcs(self) -> McpToolNode:
         """Must be called before the first invocation to populate the tools_by_name dictionary."""
-        llm_tools = await mcp_tool_list(self.mcp_session)
+        if isinstance(self.mcp_session, ClientSession):
+            # Drains what the server sends besides responses, which would otherwise stall the session
+            NotificationRouter.for_session(self.mcp_session)
+        if self.catalog is not None:
+            self._set_tools(await self.catalog.get())
+            self.catalog.on_change(self._on_catalog_change)
+        else:
+            self._set_tools(await mcp_tool_list(self.mcp_session))
+        return self
+
+    def _on_catalog_change(self, catalog: ToolCatalog) -> None:
+        self._set_tools(catalog.cached())
 
+    def _set_tools(self, llm_tools: list[dict[str, Any]]) -> None:
+        tools_by_name: dict[str, dict] = {}
         for tool in llm_tools:
             if self.whitelisted_tools is not None and tool["name"] not in self.whitelisted_tools:
                 continue
             if self.blacklisted_tools is not None and tool["name"] in self.blacklisted_tools:
                 continue
-            self.tools_by_name[tool["name"]] = tool
-        return self
+            tools_by_name[tool["name"]] = tool
+        if self.validate_args:
+            validators: dict[str, Validator] = {}
+            for name, tool in tools_by_name.items():
+                try:
+                    validators[name] = compile_validator(tool.get("parameters"))
+                except Exception:
+                    # Left to the server to validate rather than failing to load every tool
+                    logger.warning("Tool %s: can't compile its input schema, not validating locally", name, exc_info=True)
+            self._validators = validators
+        self.tools_by_name = tools_by_name
+        if self.cache is not None:
+            self.cache.bind(self.tools_by_name)
 
     def _func(
         self,
@@ -151,10 +372,17 @@ class McpToolNode(RunnableCallable):
         *,
         store: BaseStore,
     ) -> Any:
-        raise NotImplementedError("You must use _afunc")
+        return self._loop_thread().run(lambda: self._afunc(input, config, store=store))
+
+    def _loop_thread(self) -> EventLoopThread:
+        if self.loop_thread is None:
+            raise NotImplementedError("Pass loop_thread= to run McpToolNode from sync code, or use ainvoke")
+        return self.loop_thread
 
     def invoke(self, input: Input, config: RunnableConfig | None = None, **kwargs: Any) -> Any:
-        raise NotImplementedError("You must use ainvoke")
+        if "store" not in kwargs:
+            kwargs["store"] = None
+        return super().invoke(input, config, **kwargs)
 
     async def ainvoke(self, input: Input, config: RunnableConfig | None = None, **kwargs: Any) -> Any:
         if "store" not in kwargs:
@@ -168,24 +396,148 @@ class McpToolNode(RunnableCallable):
         *,
         store: BaseStore,
     ) -> Any:
+        if self.catalog is not None:
+            self.catalog.revalidate()
         tool_calls, output_type = self._parse_input(input, store)
-        outputs = await asyncio.gather(*(self._arun_one(call, config) for call in tool_calls))
+        deadline = self._batch_deadline(config)
+        if (writer := self._stream_writer(config)) is not None:
+            outputs = await asyncio.gather(
+                *(self._arun_and_stream(call, config, writer, deadline=deadline) for call in tool_calls)
+            )
+        else:
+            outputs = await asyncio.gather(*(self._arun_one(call, config, deadline=deadline) for call in tool_calls))
         # TypedDict, pydantic, dataclass, etc. should all be able to load from dict
         return outputs if output_type == "list" else {self.messages_key: outputs}
 
+    def _batch_deadline(self, config: RunnableConfig) -> float | None:
+        """Event loop time by which every call of this run must be done, from `batch_timeout` and the run's deadline."""
+        now = asyncio.get_running_loop().time()
+        deadlines = []
+        if self.batch_timeout is not None:
+            deadlines.append(now + self.batch_timeout)
+        if (run_deadline := config.get(CONF, {}).get("deadline")) is not None:
+            if isinstance(run_deadline, datetime):
+                run_deadline = run_deadline.timestamp()
+            deadlines.append(now + float(run_deadline) - time.time())
+        return min(deadlines, default=None)
+
+    def _call_deadline(self, call: ToolCall, deadline: float | None) -> float | None:
+        timeout = self.tool_timeouts.get(call["name"], self.timeout)
+        if timeout is None:
+            return deadline
+        call_deadline = asyncio.get_running_loop().time() + timeout
+        return call_deadline if deadline is None else min(deadline, call_deadline)
+
+    def _stream_writer(self, config: RunnableConfig) -> StreamWriter | None:
+        if not self.stream_results:
+            return None
+        return config.get(CONF, {}).get(CONFIG_KEY_STREAM_WRITER)
+
+    async def _arun_and_stream(
+        self,
+        call: ToolCall,
+        config: RunnableConfig,
+        writer: StreamWriter,
+        *,
+        deadline: float | None = None,
+    ) -> ToolMessage:
+        tool_message = await self._arun_one(call, config, deadline=deadline)
+        writer({"type": "tool_result", "message": tool_message})
+        return tool_message
+
     def _run_one(self, call: ToolCall, config: RunnableConfig) -> ToolMessage:
-        raise NotImplementedError("You must use _arun_one")
+        return self._loop_thread().run(lambda: self._arun_one(call, config, deadline=self._batch_deadline(config)))
+
+    async def _arun_one(self, call: ToolCall, config: RunnableConfig, *, deadline: float | None = None) -> ToolMessage:
+        checked = self._validate_tool_call(call)
+        if isinstance(checked, ToolMessage):
+            if self.instrumentation is not None:
+                record_rejected_call(self.instrumentation, call, self.server_name, checked)
+            return checked
+        call = checked
+
+        metadata: dict[str, Any] = {}
+        if self.instrumentation is None:
+            return await self._arun_call(call, config, metadata, deadline)
+        started, clock = time.time(), time.perf_counter()
+        tool_message: ToolMessage | None = None
+        try:
+            tool_message = await self._arun_call(call, config, metadata, deadline)
+            return tool_message
+        except Exception as e:
+            metadata["error"] = type(e).__name__
+            raise
+        finally:
+            self._record_call(call, started, time.perf_counter() - clock, metadata, tool_message)
 
-    async def _arun_one(self, call: ToolCall, config: RunnableConfig) -> ToolMessage:
-        if invalid_tool_message := self._validate_tool_call(call):
-            return invalid_tool_message
+    def _record_call(
+        self,
+        call: ToolCall,
+        started: float,
+        duration: float,
+        metadata: dict[str, Any],
+        tool_message: ToolMessage | None,
+    ) -> None:
+        error = metadata.get("error")
+        if error is not None:
+            status = error_status(error)
+        else:
+            status = "error" if tool_message is None or tool_message.status == "error" else "success"
+        cast(Instrumentation, self.instrumentation).record_call(
+            CallRecord(
+                tool_name=call["name"],
+                server=self.server_name,
+                started=started,
+                duration=duration,
+                queue_wait=metadata.get("timing", {}).get("queue_wait", 0.0),
+                bytes_in=payload_size(call["args"]),
+                bytes_out=payload_size(tool_message.content) if tool_message is not None else 0,
+                status=status,
+                error=error,
+                cached=metadata.get("cached", False),
+                coalesced=metadata.get("coalesced", False),
+                attempts=metadata.get("attempts", 1),
+            )
+        )
 
+    async def _arun_call(
+        self,
+        call: ToolCall,
+        config: RunnableConfig,
+        metadata: dict[str, Any],
+        deadline: float | None,
+    ) -> ToolMessage:
         try:
-            # console.print(call["args"])
-            res = await self.mcp_session.call_tool(call["name"], arguments=call["args"])
+            cache_key = self.cache.key(call["name"], call["args"], config) if self.cache is not None else None
+            if cache_key is not None and (res := self.cache.get(cache_key)) is not None:
+                metadata["cached"] = True
+            elif self.cache is None:
+                res = await self._timed_call(call, config, metadata, self._call_deadline(call, deadline))
+            else:
+                generation = self.cache.generation
+                try:
+                    res = await self._timed_call(call, config, metadata, self._call_deadline(call, deadline))
+                finally:
+                    # Even a failed or timed out write may have been applied by the server
+                    self.cache.invalidate_after(call["name"])
+                if cache_key is not None:
+                    self.cache.put(cache_key, call["name"], res, generation)
             if res.isError:
                 raise Exception(res.content)
-            tool_message: ToolMessage = ToolMessage(name=call["name"], tool_call_id=call["id"], content=res.content)
+            content: Any = res.content
+            artifact = None
+            if (policy := self.tool_result_policies.get(call["name"], self.result_policy)) is not None:
+                if (trimmed := await policy.apply(res.content)) is not None:
+                    content, artifact = trimmed.content, trimmed.artifact()
+                    metadata["original_bytes"] = trimmed.original_bytes
+                    metadata["truncated"] = trimmed.truncated
+            tool_message: ToolMessage = ToolMessage(
+                name=call["name"],
+                tool_call_id=call["id"],
+                content=content,
+                artifact=artifact,
+                response_metadata=metadata,
+            )
 
             tool_message.content = cast(str | list, msg_content_output(tool_message.content))
             return tool_message
@@ -212,37 +564,148 @@ class McpToolNode(RunnableCallable):
             # Handled
             else:
                 content = _handle_tool_error(e, flag=self.handle_tool_errors)
+                metadata["error"] = type(e).__name__
 
-        return ToolMessage(content=content, name=call["name"], tool_call_id=call["id"], status="error")
+        return ToolMessage(
+            content=content,
+            name=call["name"],
+            tool_call_id=call["id"],
+            status="error",
+            response_metadata=metadata,
+        )
+
+    async def _timed_call(
+        self,
+        call: ToolCall,
+        config: RunnableConfig,
+        metadata: dict[str, Any],
+        deadline: float | None,
+    ) -> CallToolResult:
+        """Calls the tool, cancelling the call if it isn't done by `deadline` (event loop time)."""
+        if deadline is None:
+            return await self._coalesced_call(call, config, metadata, deadline)
+        started = asyncio.get_running_loop().time()
+        try:
+            async with asyncio.timeout_at(deadline):
+                return await self._coalesced_call(call, config, metadata, deadline)
+        except TimeoutError as e:
+            if self.circuit_breaker is not None and metadata.get("timing", {}).get("execution"):
+                # The server had the call and never answered
+                self.circuit_breaker.record_failure()
+            budget = deadline - started
+            raise ToolCallTimeoutError(f"Tool '{call['name']}' did not finish within {budget:.1f}s") from e
+
+    async def _coalesced_call(
+        self,
+        call: ToolCall,
+        config: RunnableConfig,
+        metadata: dict[str, Any],
+        deadline: float | None,
+    ) -> CallToolResult:
+        """Calls the tool, sharing the result of an identical call already in flight if there is one."""
+        if self.single_flight is None or (flight_key := self.single_flight.key(call["name"], call["args"])) is None:
+            return await self._retried_call(call, config, metadata, deadline)
+        res, shared = await self.single_flight.do(
+            flight_key, partial(self._retried_call, call, config, metadata, deadline)
+        )
+        if shared:
+            metadata["coalesced"] = True
+        return res
+
+    async def _retried_call(
+        self,
+        call: ToolCall,
+        config: RunnableConfig,
+        metadata: dict[str, Any],
+        deadline: float | None,
+    ) -> CallToolResult:
+        """Calls the tool, retrying transient failures per its `RetryPolicy` while the deadline allows."""
+        policy = self.tool_retry_policies.get(call["name"], self.retry_policy)
+        if policy is None:
+            return await self._execute(call, config, metadata)
+        loop = asyncio.get_running_loop()
+        attempt = 1
+        while True:
+            error: Exception | None = None
+            try:
+                res = await self._execute(call, config, metadata)
+                if not policy.should_retry_result(res):
+                    return res
+            except Exception as e:
+                if not policy.should_retry_exception(e):
+                    raise
+                error = e
+            delay = policy.backoff(attempt)
+            if attempt >= policy.max_attempts or (deadline is not None and loop.time() + delay >= deadline):
+                if error is not None:
+                    raise error
+                return res
+            logger.info(
+                "Retrying tool %s in %.2fs after attempt %s failed: %s", call["name"], delay, attempt, error or res.content
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+            metadata["attempts"] = attempt
+
+    async def _execute(self, call: ToolCall, config: RunnableConfig, metadata: dict[str, Any]) -> CallToolResult:
+        """Sends the call to the MCP server once the scheduler grants it a slot."""
+        timing = CallTiming()
+        writer = self._stream_writer(config)
+        breaker = self.circuit_breaker.guard() if self.circuit_breaker is not None else nullcontext()
+        try:
+            with breaker:
+                async with self.scheduler.slot(call["name"], timing):
+                    if writer is None:
+                        return await call_tool(self.mcp_session, call["name"], call["args"])
+                    return await self._call_with_progress(call, writer)
+        finally:
+            metadata["timing"] = timing.as_dict()
+
+    async def _call_with_progress(self, call: ToolCall, writer: StreamWriter) -> CallToolResult:
+        """Calls the tool with a progress token and forwards its progress notifications to `writer`."""
+        if self._unsubscribe_progress is None:
+            self._unsubscribe_progress = subscribe(self.mcp_session, PROGRESS, self._on_progress)
+        token = call["id"]
+        self._progress_handlers[token] = lambda params: writer(
+            {
+                "type": "tool_progress",
+                "tool_call_id": call["id"],
+                "name": call["name"],
+                "progress": params.progress,
+                "total": params.total,
+            }
+        )
+        try:
+            return await call_tool(self.mcp_session, call["name"], call["args"], progress_token=token)
+        finally:
+            self._progress_handlers.pop(token, None)
+
+    def _on_progress(self, notification: ProgressNotification) -> None:
+        if (handler := self._progress_handlers.get(notification.params.progressToken)) is not None:
+            handler(notification.params)
 
     def _parse_input(
         self,
         input: list[AnyMessage] | dict[str, Any] | BaseModel,
         store: BaseStore,
     ) -> tuple[list[ToolCall], Literal["list", "dict"]]:
-        if isinstance(input, list):
-            output_type = "list"
-            message: AnyMessage = input[-1]
-        elif isinstance(input, dict) and (messages := input.get(self.messages_key, [])):
-            output_type = "dict"
-            message = messages[-1]
-        elif messages := getattr(input, self.messages_key, None):
-            # Assume dataclass-like state that can coerce from dict
-            output_type = "dict"
-            message = messages[-1]
-        else:
-            raise ValueError("No message found in input")
+        return parse_tool_calls(input, self.messages_key)
 
-        if not isinstance(message, AIMessage):
-            raise ValueError("Last message is not an AIMessage")
-        return message.tool_calls, output_type
-
-    def _validate_tool_call(self, call: ToolCall) -> ToolMessage | None:
+    def _validate_tool_call(self, call: ToolCall) -> ToolCall | ToolMessage:
+        """The call to run, with its arguments coerced to the tool's schema, or the error message answering it."""
         if (requested_tool := call["name"]) not in self.tools_by_name:
-            content = INVALID_TOOL_NAME_ERROR_TEMPLATE.format(
-                requested_tool=requested_tool,
-                available_tools=", ".join(self.tools_by_name.keys()),
+            return unknown_tool_message(call, self.tools_by_name)
+        if (validator := self._validators.get(requested_tool)) is None:
+            return call
+        try:
+            args = validate_arguments(validator, call["args"])
+        except ArgumentValidationError as e:
+            return ToolMessage(
+                f"Error: invalid arguments for tool {requested_tool}, {e}\n Please fix your mistakes.",
+                name=requested_tool,
+                tool_call_id=call["id"],
+                status="error",
+                response_metadata={"error": type(e).__name__},
             )
-            return ToolMessage(content, name=requested_tool, tool_call_id=call["id"], status="error")
-        else:
-            return None
\ No newline at end of file
+        # The AIMessage's tool call is left as the model wrote it
+        return call if args is call["args"] else {**call, "args": args}
\ No newline at end of file
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import Callable
+from typing import Any, Literal
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AnyMessage, ToolCall, ToolMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.utils import Input
+from langgraph.constants import CONF, CONFIG_KEY_STREAM_WRITER
+from langgraph.store.base import BaseStore
+from langgraph.utils.runnable import RunnableCallable
+from pydantic import BaseModel
+
+from src.tool_node.catalog import ToolCatalog
+from src.tool_node.instrumentation import Instrumentation
+from src.tool_node.loop_thread import EventLoopThread
+from src.tool_node.mcp_tool_node import McpToolNode, parse_tool_calls, record_rejected_call, unknown_tool_message
+from src.tool_node.router import Route, qualified_name
+
+logger = logging.getLogger(__name__)
+
+
+class MultiServerMcpToolNode(RunnableCallable):
+    """A node that runs the tools of every server of a `MultiServerMCPClient`.
+
+    Each server gets its own `McpToolNode`, and so its own scheduler, retry policy, circuit breaker
+    and catalog: a slow or failing server queues and fails on its own limits without holding back
+    calls to the others. The tools of all servers are merged into `tools`, the list to bind to the
+    model. With `namespace="collisions"` a tool keeps its name unless another server has a tool
+    of the same name, then both are exposed as `<server>__<tool>`; with `"always"` every tool is.
+    Tool calls are dispatched to their server's node concurrently, under the server's tool name,
+    and answered in the order of the tool calls under the name the model used. The merged list is
+    rebuilt when a server's catalog reports a change; use `bound_model` to get the model bound to
+    the current list on each run.
+
+    Args:
+        client: A `MultiServerMCPClient`, `McpSessionPool` or `SharedMcpClient`: anything with a
+            `sessions` dict of server name to session.
+        name: The name of the node in the graph. The server nodes are named `<name>.<server>`.
+        tags: Optional tags to associate with the node.
+        trace: Whether to trace the node's runs with LangChain callbacks.
+        messages_key: The state key in the input that contains the list of messages.
+        namespace: When to prefix tool names with their server's name, see above.
+        server_options: `McpToolNode` keyword arguments per server name, e.g. its `scheduler`,
+            `circuit_breaker` or `catalog`. They take precedence over `node_options`.
+        **node_options: `McpToolNode` keyword arguments shared by every server's node. Unless given,
+            each node reads its tools from the `ToolCatalog` shared by everyone using its session.
+            With a `loop_thread` this node runs from sync code too. Their `stream_results` and
+            `instrumentation` also apply to the calls of unknown tools, answered by this node.
+
+    Example:
+        ```python
+        node = await MultiServerMcpToolNode(
+            client,
+            handle_tool_errors=True,
+            server_options={"brave-search": {"scheduler": ToolCallScheduler(max_concurrency=2)}},
+        ).init_funcs()
+        llm_with_tools = node.bound_model(llm)
+        ```
+    """
+
+    name: str = "MultiServerToolNode"
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        name: str = "tools",
+        tags: list[str] | None = None,
+        trace: bool = False,
+        messages_key: str = "messages",
+        namespace: Literal["collisions", "always"] = "collisions",
+        server_options: dict[str, dict[str, Any]] | None = None,
+        **node_options: Any,
+    ) -> None:
+        super().__init__(self._func, self._afunc, name=name, tags=tags, trace=trace)
+        self.messages_key = messages_key
+        self.namespace = namespace
+        # The sessions' loop, also given to every server node, for sync runs
+        self.loop_thread: EventLoopThread | None = node_options.get("loop_thread")
+        # Used for the calls of unknown tools, which reach no server node
+        self.stream_results: bool = node_options.get("stream_results", False)
+        self.instrumentation: Instrumentation | None = node_options.get("instrumentation")
+        self.nodes: dict[str, McpToolNode] = {}
+        for server, session in client.sessions.items():
+            options = {**node_options, **(server_options or {}).get(server, {})}
+            options.setdefault("catalog", ToolCatalog.for_session(session))
+            self.nodes[server] = McpToolNode(session, name=f"{name}.{server}", messages_key=messages_key, **options)
+        # Tools of all servers as exposed to the model, and where their calls go
+        self.tools: list[dict[str, Any]] = []
+        self.routes: dict[str, Route] = {}
+        # (model, tools and kwargs it was bound with, bound model) of the last `bound_model` call
+        self._bound: tuple[Any, list[dict[str, Any]], dict[str, Any], Runnable] | None = None
+
+    async def init_funcs(self) -> MultiServerMcpToolNode:
+        """Loads every server's tools. A server whose tools can't be listed is left without tools."""
+        results = await asyncio.gather(*(node.init_funcs() for node in self.nodes.values()), return_exceptions=True)
+        for server, result in zip(self.nodes, results):
+            if isinstance(result, BaseException):
+                logger.warning("MCP server %s reports no tools available: %s", server, result)
+        for node in self.nodes.values():
+            if node.catalog is not None:
+                # Registered after the node's own listener, so the node's tools are updated first
+                node.catalog.on_change(self._on_catalog_change)
+        self._merge()
+        return self
+
+    def _on_catalog_change(self, catalog: ToolCatalog) -> None:
+        self._merge()
+
+    def _merge(self) -> None:
+        counts = Counter(name for node in self.nodes.values() for name in node.tools_by_name)
+        tools: list[dict[str, Any]] = []
+        routes: dict[str, Route] = {}
+        for server, node in self.nodes.items():
+            for tool_name, tool in node.tools_by_name.items():
+                collides = counts[tool_name] > 1
+                exposed = qualified_name(server, tool_name) if self.namespace == "always" or collides else tool_name
+                if collides:
+                    logger.debug("Tool %s of server %s is exposed as %s", tool_name, server, exposed)
+                if exposed in routes:
+                    logger.warning("Tool %s of server %s is shadowed by another server's tool", exposed, server)
+                    continue
+                routes[exposed] = Route(server, tool_name, server)
+                tools.append({**tool, "name": exposed})
+        self.tools, self.routes = tools, routes
+
+    def bound_model(self, model: BaseChatModel, **kwargs: Any) -> Runnable:
+        """`model.bind_tools(self.tools, **kwargs)`, bound again only after the tools changed."""
+        bound = self._bound
+        if bound is None or bound[0] is not model or bound[1] is not self.tools or bound[2] != kwargs:
+            self._bound = (model, self.tools, kwargs, model.bind_tools(self.tools, **kwargs))
+        return self._bound[3]
+
+    def _func(
+        self,
+        input: list[AnyMessage] | dict[str, Any] | BaseModel,
+        config: RunnableConfig,
+        *,
+        store: BaseStore,
+    ) -> Any:
+        if self.loop_thread is None:
+            raise NotImplementedError("Pass loop_thread= to run MultiServerMcpToolNode from sync code, or use ainvoke")
+        return self.loop_thread.run(lambda: self._afunc(input, config, store=store))
+
+    def invoke(self, input: Input, config: RunnableConfig | None = None, **kwargs: Any) -> Any:
+        if "store" not in kwargs:
+            kwargs["store"] = None
+        return super().invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input: Input, config: RunnableConfig | None = None, **kwargs: Any) -> Any:
+        if "store" not in kwargs:
+            kwargs["store"] = None
+        return await super().ainvoke(input, config, **kwargs)
+
+    async def _afunc(
+        self,
+        input: list[AnyMessage] | dict[str, Any] | BaseModel,
+        config: RunnableConfig,
+        *,
+        store: BaseStore,
+    ) -> Any:
+        # Parsing only depends on messages_key, which this node shares with its server nodes
+        for node in self.nodes.values():
+            if node.catalog is not None:
+                node.catalog.revalidate()
+        tool_calls, output_type = parse_tool_calls(input, self.messages_key)
+        deadlines = {server: node._batch_deadline(config) for server, node in self.nodes.items()}
+        outputs = await asyncio.gather(*(self._arun_one(call, config, deadlines) for call in tool_calls))
+        return outputs if output_type == "list" else {self.messages_key: outputs}
+
+    def _stream_writer(self, config: RunnableConfig) -> Callable[[Any], None] | None:
+        if not self.stream_results:
+            return None
+        return config.get(CONF, {}).get(CONFIG_KEY_STREAM_WRITER)
+
+    async def _arun_one(self, call: ToolCall, config: RunnableConfig, deadlines: dict[str, float | None]) -> ToolMessage:
+        if (route := self.routes.get(call["name"])) is None:
+            tool_message = unknown_tool_message(call, self.routes)
+            if self.instrumentation is not None:
+                record_rejected_call(self.instrumentation, call, self.name, tool_message)
+            writer: Callable[[Any], None] | None = self._stream_writer(config)
+        else:
+            node = self.nodes[route.node]
+            server_call = call if route.tool_name == call["name"] else {**call, "name": route.tool_name}
+            tool_message = await node._arun_one(server_call, config, deadline=deadlines[route.node])
+            tool_message.name = call["name"]
+            writer = node._stream_writer(config)
+        if writer is not None:
+            writer({"type": "tool_result", "message": tool_message})
+        return tool_message
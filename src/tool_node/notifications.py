@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+from weakref import WeakKeyDictionary
+
+import anyio
+from mcp import ClientSession
+from mcp.types import ServerNotification
+
+logger = logging.getLogger(__name__)
+
+TOOLS_LIST_CHANGED = "notifications/tools/list_changed"
+PROGRESS = "notifications/progress"
+# Subscribe to every notification
+ANY = "*"
+
+NotificationCallback = Callable[[Any], None]
+
+
+class NotificationRouter:
+    """Dispatches the notifications a server sends on a ClientSession to subscribers, by method.
+
+    The session only exposes notifications through its `incoming_messages` stream, which must have a
+    single reader, so there is one router per session: use `NotificationRouter.for_session`. The
+    stream is unbuffered, and a session nobody reads from stops processing responses as soon as the
+    server sends a notification, so the router drains it for the lifetime of the session.
+    """
+
+    _routers: WeakKeyDictionary[ClientSession, NotificationRouter] = WeakKeyDictionary()
+
+    def __init__(self, session: ClientSession) -> None:
+        self.session = session
+        self._subscribers: dict[str, list[NotificationCallback]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    @classmethod
+    def for_session(cls, session: ClientSession) -> NotificationRouter:
+        """Returns the session's router, starting it on first use. Must be called from the session's event loop."""
+        if (router := cls._routers.get(session)) is None:
+            router = cls._routers[session] = cls(session)
+            router._task = asyncio.create_task(router._drain())
+        return router
+
+    def subscribe(self, method: str, callback: NotificationCallback) -> Callable[[], None]:
+        """Calls `callback(notification)` for every notification with `method` (or any, with `ANY`).
+
+        Returns:
+            A function that removes the subscription.
+        """
+        callbacks = self._subscribers.setdefault(method, [])
+        callbacks.append(callback)
+        return lambda: callbacks.remove(callback) if callback in callbacks else None
+
+    def dispatch(self, notification: Any) -> None:
+        for method in (notification.method, ANY):
+            for callback in list(self._subscribers.get(method, ())):
+                try:
+                    callback(notification)
+                except Exception:
+                    logger.exception("Notification callback failed for %s", notification.method)
+
+    async def _drain(self) -> None:
+        try:
+            async for message in self.session.incoming_messages:
+                if isinstance(message, ServerNotification):
+                    self.dispatch(message.root)
+                elif isinstance(message, Exception):
+                    # Late responses to requests we cancelled arrive with an id the session already dropped
+                    level = logging.DEBUG if "unknown request ID" in str(message) else logging.WARNING
+                    logger.log(level, "MCP session received an error: %s", message)
+        except (anyio.ClosedResourceError, anyio.EndOfStream):
+            pass
+
+
+def subscribe(session: Any, method: str, callback: NotificationCallback) -> Callable[[], None]:
+    """Subscribes to notifications of a ClientSession, or of any session-like object with its own `subscribe`."""
+    if hasattr(session, "subscribe"):
+        return session.subscribe(method, callback)
+    return NotificationRouter.for_session(session).subscribe(method, callback)
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import hashlib
+import json
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, cast
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import SSEConnection, StdioConnection
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import ClientSession
+
+from src.tool_node.session_pool import PooledSession
+from src.tool_node.transport import TransportFactory, batched_transport, open_transport
+
+logger = logging.getLogger(__name__)
+
+
+def _fingerprint(server_name: str, connection: StdioConnection | SSEConnection) -> str:
+    payload = json.dumps([server_name, connection], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+@dataclass
+class _Server:
+    session: PooledSession
+    loop: asyncio.AbstractEventLoop
+    # LangChain tools, loaded on the first `client()` asking for them
+    tools: list[BaseTool] | None = None
+
+
+@dataclass
+class SharedMcpClient:
+    """MultiServerMCPClient-like view over servers owned by a `McpServerRegistry`."""
+
+    sessions: dict[str, PooledSession] = field(default_factory=dict)
+    server_name_to_tools: dict[str, list[BaseTool]] = field(default_factory=dict)
+
+    def get_tools(self) -> list[BaseTool]:
+        """Get a list of all tools from all connected servers."""
+        all_tools: list[BaseTool] = []
+        for server_tools in self.server_name_to_tools.values():
+            all_tools.extend(server_tools)
+        return all_tools
+
+
+class McpServerRegistry:
+    """Process-wide registry that keeps MCP servers warm across graph invocations.
+
+    Each distinct (server name, connection config) pair is started once, on first use, and shared
+    by every graph that asks for it, so graph contexts no longer pay the `npx`/Node boot on entry.
+    Servers are restarted lazily: a server whose processes all died is respawned by its
+    `PooledSession` on the next call. MCP sessions are bound to the event loop that started them,
+    so each loop using a server gets its own processes, e.g. the loop of an `EventLoopThread`
+    serving sync callers and the one of an async graph; a loop's servers are dropped once it
+    closes. Everything still running is shut down at exit.
+
+    Args:
+        size: Default number of processes per server.
+        health_check_interval: Seconds between health checks of each server's processes.
+        transport_factory: Opens the read/write streams of each server process, see `PooledSession`.
+    """
+
+    def __init__(
+        self,
+        *,
+        size: int = 1,
+        health_check_interval: float | None = 15.0,
+        transport_factory: TransportFactory = open_transport,
+    ) -> None:
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.transport_factory = transport_factory
+        # Keyed by config fingerprint and owning loop, see above
+        self._servers: dict[tuple[str, asyncio.AbstractEventLoop], _Server] = {}
+        self._locks: dict[tuple[str, asyncio.AbstractEventLoop], asyncio.Lock] = {}
+
+    def _forget_closed_loops(self) -> None:
+        # A closed loop already tore its subprocess transports down; the servers exit on stdin EOF
+        for key in [key for key in self._servers if key[1].is_closed()]:
+            del self._servers[key]
+        for key in [key for key in self._locks if key[1].is_closed()]:
+            del self._locks[key]
+
+    async def _server(
+        self,
+        server_name: str,
+        connection: StdioConnection | SSEConnection,
+        size: int | None,
+        wait: bool = True,
+    ) -> _Server:
+        key = (_fingerprint(server_name, connection), asyncio.get_running_loop())
+        if (server := self._servers.get(key)) is not None:
+            return server
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            if (server := self._servers.get(key)) is not None:
+                return server
+            self._forget_closed_loops()
+            session = PooledSession(
+                server_name,
+                connection,
+                size=size or self.size,
+                health_check_interval=self.health_check_interval,
+                transport_factory=self.transport_factory,
+            )
+            if wait:
+                await session.start()
+            else:
+                session.start_soon()
+            server = self._servers[key] = _Server(session, key[1])
+            return server
+
+    async def session(
+        self,
+        server_name: str,
+        connection: StdioConnection | SSEConnection,
+        *,
+        size: int | None = None,
+        wait: bool = True,
+    ) -> PooledSession:
+        """Returns the shared session for the server, starting it if needed.
+
+        With `wait=False` a new server is started in the background, see `PooledSession.start_soon`.
+        """
+        return (await self._server(server_name, connection, size, wait)).session
+
+    @asynccontextmanager
+    async def client(
+        self,
+        connections: dict[str, StdioConnection | SSEConnection],
+        *,
+        size: int | None = None,
+        load_tools: bool = True,
+        wait: bool = True,
+    ) -> AsyncIterator[SharedMcpClient]:
+        """Use in place of `MultiServerMCPClient(connections)`. Leaving the context keeps the servers running.
+
+        With `load_tools=False` the servers' tools are not listed, e.g. for graphs reading them from a
+        `ToolCatalog`, and `get_tools()` returns only the ones already loaded for another caller.
+        With `wait=False` as well, servers that aren't running yet are started in the background and
+        the client is returned at once; calls wait for the startup. A graph can then be built from
+        `ToolCatalog` snapshots while its servers boot.
+        """
+        servers = await asyncio.gather(*(self._server(name, conn, size, wait) for name, conn in connections.items()))
+        if load_tools:
+            await asyncio.gather(*(self._load_tools(server) for server in servers))
+        client = SharedMcpClient()
+        for server_name, server in zip(connections, servers):
+            client.sessions[server_name] = server.session
+            client.server_name_to_tools[server_name] = server.tools or []
+        yield client
+
+    async def _load_tools(self, server: _Server) -> None:
+        if server.tools is None:
+            server.tools = await load_mcp_tools(cast(ClientSession, server.session))
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """Startup time and pool stats per running server, `<name>#<n>` for its instances on other loops."""
+        self._forget_closed_loops()
+        metrics: dict[str, dict[str, Any]] = {}
+        for server in self._servers.values():
+            name = server.session.server_name
+            key, n = name, 1
+            while key in metrics:
+                key, n = f"{name}#{n}", n + 1
+            metrics[key] = {
+                "startups": len(server.session.startup_seconds),
+                "startup_seconds": list(server.session.startup_seconds),
+                **server.session.stats(),
+            }
+        return metrics
+
+    async def aclose(self) -> None:
+        """Stops every server owned by the running event loop."""
+        loop = asyncio.get_running_loop()
+        owned = {key: server for key, server in self._servers.items() if server.loop is loop}
+        for key in owned:
+            del self._servers[key]
+        await asyncio.gather(*(server.session.aclose() for server in owned.values()), return_exceptions=True)
+
+    def _shutdown(self) -> None:
+        self._forget_closed_loops()
+        for loop in {server.loop for server in self._servers.values()}:
+            try:
+                if loop.is_running():
+                    # e.g. the loop of an EventLoopThread, still running in its daemon thread
+                    asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(5.0)
+                else:
+                    loop.run_until_complete(self.aclose())
+            except Exception:
+                logger.debug("Failed to stop MCP servers at exit", exc_info=True)
+
+
+# Shared by every graph in this process, concurrent tool calls to a server are written in batches
+mcp_registry = McpServerRegistry(transport_factory=batched_transport)
+atexit.register(mcp_registry._shutdown)
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import logging
+import random
+import time
+from collections import Counter
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Literal
+
+import anyio
+from mcp.types import CallToolResult, TextContent
+
+logger = logging.getLogger(__name__)
+
+# Failures of the connection to the server rather than of the tool. WorkerClosedError and broken
+# pipes are ConnectionErrors; a ClientSession whose streams were closed raises the anyio ones.
+TRANSIENT_ERRORS: tuple[type[BaseException], ...] = (
+    ConnectionError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+# Lowercase fragments of `isError` results that report a temporary condition on the server side
+TRANSIENT_ERROR_TEXT: tuple[str, ...] = (
+    "timed out",
+    "timeout",
+    "temporarily unavailable",
+    "try again",
+    "rate limit",
+    "too many requests",
+    "econnreset",
+    "econnrefused",
+    "503",
+    "502",
+    "429",
+)
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitOpenError(Exception):
+    """The server's circuit breaker is open, so the call was not sent."""
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how often to retry a failed tool call.
+
+    A call is retried when it raises one of `retry_on`, or returns an `isError` result whose text
+    contains one of `retry_on_text`. Delays grow exponentially from `initial_backoff` up to
+    `max_backoff`, and `jitter` randomizes each delay by up to that fraction so calls that failed
+    together don't retry together. Only give a policy to tools that are safe to call twice: a
+    connection error doesn't tell whether the server ran the call before failing.
+
+    Args:
+        max_attempts: Total number of attempts, the first one included.
+        initial_backoff: Seconds before the first retry.
+        max_backoff: Upper bound of the delay between attempts, in seconds.
+        multiplier: Factor applied to the delay after each retry.
+        jitter: Fraction of each delay that is randomized, 0 = fixed delays, 1 = full jitter.
+        retry_on: Exception types that are retried.
+        retry_on_text: Lowercase fragments that make an `isError` result retryable.
+    """
+
+    max_attempts: int = 3
+    initial_backoff: float = 0.2
+    max_backoff: float = 5.0
+    multiplier: float = 2.0
+    jitter: float = 1.0
+    retry_on: tuple[type[BaseException], ...] = TRANSIENT_ERRORS
+    retry_on_text: tuple[str, ...] = TRANSIENT_ERROR_TEXT
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait after the failed `attempt` (1-based) before the next one."""
+        delay = min(self.max_backoff, self.initial_backoff * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+    def should_retry_exception(self, error: BaseException) -> bool:
+        return isinstance(error, self.retry_on) and not isinstance(error, CircuitOpenError)
+
+    def should_retry_result(self, result: CallToolResult) -> bool:
+        if not result.isError or not self.retry_on_text:
+            return False
+        text = " ".join(c.text for c in result.content if isinstance(c, TextContent)).lower()
+        return any(fragment in text for fragment in self.retry_on_text)
+
+
+class CircuitBreaker:
+    """Stops sending calls to a server that keeps failing.
+
+    The breaker starts closed. After `failure_threshold` consecutive connection failures it opens and
+    every call fails immediately with `CircuitOpenError`, instead of queueing behind a dead server.
+    After `recovery_timeout` seconds it lets `half_open_max_calls` probe calls through: one success
+    closes it again, one failure reopens it. Only failures of the connection count (see
+    `TRANSIENT_ERRORS`); a tool returning an error result means the server is alive.
+
+    Every state change is counted in `transitions` and passed to the `on_transition` listeners, e.g.
+    to export them as metrics. Share one breaker between all nodes calling the same server.
+
+    Args:
+        name: Name of the server, used in logs and errors.
+        failure_threshold: Consecutive failures that open the circuit.
+        recovery_timeout: Seconds the circuit stays open before probing the server again.
+        half_open_max_calls: Probe calls allowed at once while half open.
+        failure_types: Exception types that count as failures of the server.
+    """
+
+    def __init__(
+        self,
+        name: str = "mcp",
+        *,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        failure_types: tuple[type[BaseException], ...] = (*TRANSIENT_ERRORS, TimeoutError),
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be >= 1")
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.failure_types = failure_types
+        self.state: CircuitState = "closed"
+        self.failures = 0
+        self.rejected = 0
+        self.opened_at: float | None = None
+        # (from_state, to_state) -> number of transitions
+        self.transitions: Counter[tuple[CircuitState, CircuitState]] = Counter()
+        self._probes = 0
+        self._listeners: list[Callable[[CircuitBreaker, CircuitState, CircuitState], None]] = []
+
+    def on_transition(self, callback: Callable[[CircuitBreaker, CircuitState, CircuitState], None]) -> None:
+        """Calls `callback(breaker, from_state, to_state)` on every state change."""
+        self._listeners.append(callback)
+
+    def _transition(self, state: CircuitState) -> None:
+        previous, self.state = self.state, state
+        self.transitions[(previous, state)] += 1
+        if state == "open":
+            self.opened_at = time.monotonic()
+            logger.warning("Circuit for MCP server %s opened after %s failures", self.name, self.failures)
+        else:
+            logger.info("Circuit for MCP server %s is %s", self.name, state.replace("_", " "))
+        for callback in list(self._listeners):
+            try:
+                callback(self, previous, state)
+            except Exception:
+                logger.exception("Circuit breaker listener failed")
+
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through, 0 if it isn't open."""
+        if self.state != "open" or self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.recovery_timeout - time.monotonic())
+
+    def _admit(self) -> bool:
+        if self.state == "open" and not self.retry_after():
+            self._transition("half_open")
+            self._probes = 0
+        if self.state == "closed":
+            return False
+        if self.state == "half_open" and self._probes < self.half_open_max_calls:
+            self._probes += 1
+            return True
+        self.rejected += 1
+        raise CircuitOpenError(
+            f"MCP server '{self.name}' is unavailable after repeated failures, retry in {self.retry_after():.0f}s"
+        )
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Admits a call or raises `CircuitOpenError`, then records how the call ended."""
+        probe = self._admit()
+        try:
+            yield
+        except BaseException as e:
+            if isinstance(e, self.failure_types):
+                self.record_failure()
+            elif not isinstance(e, Exception):
+                # Cancelled, says nothing about the server
+                pass
+            else:
+                self.record_success()
+            raise
+        else:
+            self.record_success()
+        finally:
+            if probe:
+                self._probes -= 1
+
+    def record_success(self) -> None:
+        self.failures = 0
+        if self.state != "closed":
+            self._transition("closed")
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+            self._transition("open")
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "transitions": {f"{a}->{b}": n for (a, b), n in self.transitions.items()},
+        }
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from mcp.types import BlobResourceContents, EmbeddedResource, ImageContent, TextContent, TextResourceContents
+
+logger = logging.getLogger(__name__)
+
+# Bytes of the view kept for the notes on truncated text and omitted binary content
+_NOTE_RESERVE = 256
+
+
+@dataclass(frozen=True)
+class BlobRef:
+    """Reference to a payload in a `BlobStore`, small enough to keep in the message history."""
+
+    digest: str
+    size: int
+    media_type: str
+    uri: str | None = None
+
+
+class BlobStore:
+    """Content-addressed storage of tool payloads too large for the message history.
+
+    Payloads are keyed by their SHA-256, so storing the same result twice keeps one copy.
+    """
+
+    def put(self, data: bytes, media_type: str, uri: str | None = None) -> BlobRef:
+        raise NotImplementedError
+
+    def get(self, digest: str) -> bytes:
+        """The payload of `digest`. Raises KeyError if it isn't stored."""
+        raise NotImplementedError
+
+    async def aput(self, data: bytes, media_type: str, uri: str | None = None) -> BlobRef:
+        return await asyncio.to_thread(self.put, data, media_type, uri)
+
+    async def aget(self, digest: str) -> bytes:
+        return await asyncio.to_thread(self.get, digest)
+
+
+class MemoryBlobStore(BlobStore):
+    """Keeps blobs in memory, for a single process that doesn't need them after it exits."""
+
+    def __init__(self) -> None:
+        self._blobs: dict[str, bytes] = {}
+
+    def put(self, data: bytes, media_type: str, uri: str | None = None) -> BlobRef:
+        digest = hashlib.sha256(data).hexdigest()
+        self._blobs.setdefault(digest, data)
+        return BlobRef(digest, len(data), media_type, uri)
+
+    def get(self, digest: str) -> bytes:
+        return self._blobs[digest]
+
+
+class FileBlobStore(BlobStore):
+    """Keeps blobs as files under `root`, at `<root>/<digest[:2]>/<digest>`.
+
+    Each blob is written to a temporary file and renamed into place, so readers, including other
+    processes sharing the directory, never see a partial blob.
+
+    Args:
+        root: Directory of the blobs, created if missing.
+    """
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def put(self, data: bytes, media_type: str, uri: str | None = None) -> BlobRef:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        return BlobRef(digest, len(data), media_type, uri)
+
+    def get(self, digest: str) -> bytes:
+        try:
+            return self._path(digest).read_bytes()
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+
+
+@dataclass
+class TrimmedResult:
+    """The view of an oversized result that goes to the model, and where the full payloads went."""
+
+    content: str
+    blobs: list[BlobRef] = field(default_factory=list)
+    original_bytes: int = 0
+    truncated: bool = False
+
+    def artifact(self) -> dict[str, Any]:
+        """ToolMessage artifact: checkpointed with the message but never sent to the model."""
+        return {"blobs": [asdict(blob) for blob in self.blobs], "original_bytes": self.original_bytes}
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _cut(text: str, max_bytes: int) -> str:
+    """The start of `text` within `max_bytes` of UTF-8, ending at a line break when one is near."""
+    head = text.encode()[:max_bytes].decode(errors="ignore")
+    if len(head) < len(text) and (newline := head.rfind("\n")) > len(head) // 2:
+        head = head[:newline]
+    return head
+
+
+@dataclass(frozen=True)
+class ResultSizePolicy:
+    """Caps the size of tool results kept in the message history and sent to the model.
+
+    Results within `max_bytes` (and `max_tokens`, if set) of text and without binary content are
+    left as they are. Otherwise the ToolMessage gets a text view instead: the start of the text, cut
+    at a line break, and a note with the size left out. Images and binary resources are replaced by
+    a note with their type and size, unless `keep_binary` is set and they fit the cap. With a
+    `blob_store` the full text and each binary payload are stored there, the notes name their
+    digests and the ToolMessage artifact lists the `BlobRef`s, so the full result can be loaded on
+    demand without ever being checkpointed or prompted.
+
+    Args:
+        max_bytes: Maximum UTF-8 size of the content kept in the message.
+        max_tokens: Maximum number of tokens of the content kept, counted by `count_tokens`.
+        count_tokens: Token counter of the model. Defaults to an estimate of 4 characters per token.
+        blob_store: Where the full payloads of oversized results go. None = they are dropped.
+        keep_binary: Keep images and binary resources that fit within `max_bytes` as they are.
+    """
+
+    max_bytes: int = 16_000
+    max_tokens: int | None = None
+    count_tokens: Callable[[str], int] | None = None
+    blob_store: BlobStore | None = None
+    keep_binary: bool = False
+
+    def _tokens(self, text: str) -> int:
+        return (self.count_tokens or _estimate_tokens)(text)
+
+    def _fits(self, text: str) -> bool:
+        if len(text.encode()) > self.max_bytes:
+            return False
+        return self.max_tokens is None or self._tokens(text) <= self.max_tokens
+
+    async def _spill(self, data: bytes, media_type: str, uri: str | None, blobs: list[BlobRef]) -> str:
+        if self.blob_store is None:
+            return "it was not kept"
+        blob = await self.blob_store.aput(data, media_type, uri)
+        blobs.append(blob)
+        return f"stored as blob sha256:{blob.digest}"
+
+    async def apply(self, content: list[Any]) -> TrimmedResult | None:
+        """The trimmed view of the `CallToolResult.content` blocks, or None if they are within the caps."""
+        texts: list[str] = []
+        binaries: list[tuple[bytes, str, str | None]] = []
+        for block in content:
+            if isinstance(block, TextContent):
+                texts.append(block.text)
+            elif isinstance(block, ImageContent):
+                binaries.append((base64.b64decode(block.data), block.mimeType, None))
+            elif isinstance(block, EmbeddedResource) and isinstance(block.resource, TextResourceContents):
+                texts.append(block.resource.text)
+            elif isinstance(block, EmbeddedResource) and isinstance(block.resource, BlobResourceContents):
+                resource = block.resource
+                binaries.append(
+                    (base64.b64decode(resource.blob), resource.mimeType or "application/octet-stream", str(resource.uri))
+                )
+        text = "\n".join(texts)
+        binary_bytes = sum(len(data) for data, _, _ in binaries)
+        original_bytes = len(text.encode()) + binary_bytes
+        if self._fits(text) and (not binaries or (self.keep_binary and original_bytes <= self.max_bytes)):
+            return None
+
+        blobs: list[BlobRef] = []
+        notes: list[str] = []
+        for data, media_type, uri in binaries:
+            where = await self._spill(data, media_type, uri, blobs)
+            notes.append(f"[{media_type}{f' {uri}' if uri else ''}, {len(data)} bytes omitted, {where}]")
+
+        truncated = not self._fits(text)
+        if truncated:
+            where = await self._spill(text.encode(), "text/plain", None, blobs)
+            budget = max(self.max_bytes - _NOTE_RESERVE * (len(notes) + 1), 0)
+            view = _cut(text, budget)
+            while view and self.max_tokens is not None and self._tokens(view) > self.max_tokens:
+                view = _cut(view, int(len(view.encode()) * self.max_tokens / self._tokens(view) * 0.9))
+            omitted_lines = text.count("\n") - view.count("\n")
+            notes.append(
+                f"[Result truncated: showing {len(view.encode())} of {len(text.encode())} bytes, "
+                f"{omitted_lines} more lines, the full text was {where}]"
+            )
+            text = view
+        logger.debug("Trimmed a tool result of %d bytes, %d blobs stored", original_bytes, len(blobs))
+        return TrimmedResult("\n".join([text, *notes]) if text else "\n".join(notes), blobs, original_bytes, truncated)
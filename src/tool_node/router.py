@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+from src.tool_node.catalog import ToolCatalog
+
+logger = logging.getLogger(__name__)
+
+# Joins a server namespace and a tool name, OpenAI tool names may only contain [a-zA-Z0-9_-]
+NAMESPACE_SEPARATOR = "__"
+
+
+def qualified_name(namespace: str | None, tool_name: str) -> str:
+    """Name of `tool_name` as exposed to the model when its server's tools are namespaced."""
+    return f"{namespace}{NAMESPACE_SEPARATOR}{tool_name}" if namespace else tool_name
+
+
+@dataclass(frozen=True)
+class Route:
+    """Where a tool call goes: the graph node, and the server and name of the tool there."""
+
+    node: str
+    tool_name: str
+    namespace: str | None = None
+
+
+class ToolRouter:
+    """Maps tool names to the graph nodes that run them, with one dict lookup per tool call.
+
+    Static routes are given at creation, e.g. for tools implemented by the graph itself. Catalogs
+    added with `add_catalog` route all their tools to a node; the table is rebuilt only when one of
+    them reports a changed tool list, and swapped in whole so lookups never see a partial table.
+    Tools of a catalog added with a `namespace` are exposed as `<namespace>__<tool>`, which keeps
+    same-named tools of different servers apart. Without namespaces the first route added for a
+    name wins and the collision is logged. Create one router per graph: it holds no global state.
+
+    Args:
+        routes: Static routes, tool name to node.
+        default: Node for tool calls without a route, e.g. a tool node that answers them with an error.
+    """
+
+    def __init__(self, routes: dict[str, str] | None = None, *, default: str | None = None) -> None:
+        self.default = default
+        self._static = {name: Route(node, name) for name, node in (routes or {}).items()}
+        self._catalogs: list[tuple[ToolCatalog, str, str | None]] = []
+        self._routes: dict[str, Route] = dict(self._static)
+
+    def add_catalog(self, catalog: ToolCatalog, node: str, *, namespace: str | None = None) -> None:
+        """Routes the tools of `catalog` to `node`, now and after each change of its tool list."""
+        self._catalogs.append((catalog, node, namespace))
+        catalog.on_change(self._on_catalog_changed)
+        self.rebuild()
+
+    def _on_catalog_changed(self, catalog: ToolCatalog) -> None:
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """Recomputes the table from the static routes and the catalogs' cached tool lists."""
+        routes = dict(self._static)
+        for catalog, node, namespace in self._catalogs:
+            for tool in catalog.cached():
+                name = qualified_name(namespace, tool["name"])
+                if (existing := routes.get(name)) is not None:
+                    logger.warning(
+                        "Tool %s of node %s is shadowed by the one of node %s, add its catalog with a namespace",
+                        name,
+                        node,
+                        existing.node,
+                    )
+                    continue
+                routes[name] = Route(node, tool["name"], namespace)
+        self._routes = routes
+        logger.debug("Rebuilt tool routes: %d tools to %d nodes", len(routes), len(self.nodes))
+
+    def route(self, tool_name: str) -> Route | None:
+        """The route of `tool_name`, or one to the default node, or None without a default."""
+        if (route := self._routes.get(tool_name)) is not None:
+            return route
+        return Route(self.default, tool_name) if self.default is not None else None
+
+    def __contains__(self, tool_name: str) -> bool:
+        return tool_name in self._routes
+
+    @property
+    def nodes(self) -> list[str]:
+        """Every node a tool call can be routed to, for the graph's conditional edges."""
+        nodes = {route.node for route in self._routes.values()}
+        nodes.update(node for _, node, _ in self._catalogs)
+        if self.default is not None:
+            nodes.add(self.default)
+        return sorted(nodes)
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from mcp.shared.session import BaseSession
+from mcp.types import (
+    CallToolRequest,
+    CallToolRequestParams,
+    CallToolResult,
+    CancelledNotification,
+    CancelledNotificationParams,
+    ClientNotification,
+    ProgressToken,
+    RequestId,
+    RequestParams,
+)
+
+from src.tool_node.notifications import NotificationRouter
+
+logger = logging.getLogger(__name__)
+
+
+# mcp has no public way to cancel a request: send_request neither exposes the id it sends nor tells
+# the server when its caller is cancelled (as of 1.9). The two functions below are the only places
+# touching BaseSession internals for it, and tests/tool_node/test_rpc.py checks them against the
+# installed mcp. If the internals go away, cancelled calls are only abandoned on the client.
+
+
+def _allocated_request_id(session: BaseSession) -> RequestId | None:
+    """The id `send_request` just gave the request it is serializing, or None if it can't be told.
+
+    `send_request` increments `_request_id` and registers the response stream under the old value
+    before it dumps the request, without yielding to the loop in between, so no other sender on the
+    session can have taken an id since.
+    """
+    next_id = getattr(session, "_request_id", None)
+    streams = getattr(session, "_response_streams", None)
+    if not isinstance(next_id, int) or not isinstance(streams, dict) or next_id - 1 not in streams:
+        return None
+    return next_id - 1
+
+
+def _drop_response_stream(session: BaseSession, request_id: RequestId) -> Any:
+    """Removes the stream the session would deliver `request_id`'s response to, if it has one."""
+    streams = getattr(session, "_response_streams", None)
+    return streams.pop(request_id, None) if isinstance(streams, dict) else None
+
+
+class _DirectRequest:
+    """Stands in for a `ClientRequest` in `send_request`, which only calls its `model_dump`.
+
+    Dumping a `ClientRequest` makes pydantic try the members of its union, and the failed matches
+    repr the whole request: about 0.2 ms per call, and 1 ms with 20 kB of arguments. Dumping the
+    request model itself takes a few microseconds. The dump also records the id the request is sent with.
+    """
+
+    def __init__(self, request: CallToolRequest, session: BaseSession) -> None:
+        self.request = request
+        self.session = session
+        self.request_id: RequestId | None = None
+
+    def model_dump(self, **kwargs: Any) -> dict[str, Any]:
+        self.request_id = _allocated_request_id(self.session)
+        return self.request.model_dump(**kwargs)
+
+
+async def call_tool(
+    session: Any,
+    name: str,
+    arguments: dict[str, Any] | None = None,
+    *,
+    progress_token: ProgressToken | None = None,
+) -> CallToolResult:
+    """Sends a tools/call request that is cancelled on the server too if the caller is cancelled.
+
+    If `progress_token` is set the server is asked for progress notifications. Requests are built by
+    hand and sent with `send_request`, since `ClientSession.call_tool` can't attach request metadata
+    and serializes the request through the slow `ClientRequest` union.
+    When the awaiting task is cancelled (e.g. by a timeout) the server gets `notifications/cancelled`
+    for the request and the session stops waiting for its response.
+    """
+    if not isinstance(session, BaseSession):
+        # Session-like wrappers (PooledSession) pick a ClientSession and call back into this function
+        return await session.call_tool(name, arguments, progress_token=progress_token)
+
+    params = CallToolRequestParams(
+        name=name,
+        arguments=arguments,
+        _meta=RequestParams.Meta(progressToken=progress_token) if progress_token is not None else None,
+    )
+    request = _DirectRequest(CallToolRequest(method="tools/call", params=params), session)
+    try:
+        return await session.send_request(request, CallToolResult)  # type: ignore[arg-type]
+    except asyncio.CancelledError:
+        if request.request_id is not None:
+            await asyncio.shield(cancel_request(session, request.request_id, f"Client cancelled the call to {name}"))
+        raise
+
+
+async def cancel_request(session: BaseSession, request_id: RequestId, reason: str | None = None) -> None:
+    """Tells the server to stop working on `request_id` and drops the session's wait for its response.
+
+    A server that answers anyway sends a response the session no longer expects, which it hands to
+    its `incoming_messages` stream. That stream is unbuffered, so it is drained by the session's
+    `NotificationRouter`, started here if nothing else has.
+    """
+    NotificationRouter.for_session(session)
+    if (stream := _drop_response_stream(session, request_id)) is not None:
+        await stream.aclose()
+    try:
+        await session.send_notification(
+            ClientNotification(
+                CancelledNotification(
+                    method="notifications/cancelled",
+                    params=CancelledNotificationParams(requestId=request_id, reason=reason),
+                )
+            )
+        )
+    except Exception:
+        logger.debug("Failed to send cancellation for request %s", request_id, exc_info=True)
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+
+
+@dataclass(frozen=True)
+class ToolLimit:
+    """Limits applied to every call of a single tool.
+
+    Args:
+        max_concurrency: Maximum number of in-flight calls for the tool. None = no per-tool limit.
+        rate: Sustained calls per second allowed by the token bucket. None = no rate limit.
+        burst: Bucket capacity, i.e. how many calls may start back to back before `rate` applies.
+    """
+
+    max_concurrency: int | None = None
+    rate: float | None = None
+    burst: int = 1
+
+
+@dataclass
+class CallTiming:
+    """Time spent by a single tool call waiting for a slot and executing, in seconds."""
+
+    queue_wait: float = 0.0
+    execution: float = 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {"queue_wait": self.queue_wait, "execution": self.execution}
+
+
+@dataclass
+class _TokenBucket:
+    rate: float
+    capacity: float
+    tokens: float = field(init=False)
+    updated: float = field(default_factory=time.monotonic)
+
+    def __post_init__(self) -> None:
+        self.tokens = self.capacity
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class ToolCallScheduler:
+    """Admission control for MCP tool calls.
+
+    Calls are admitted while the global in-flight count is below `max_concurrency` and the
+    tool's own `ToolLimit` allows it. Waiting calls are queued per tool and slots are handed out
+    round-robin across tools, so one tool with many queued calls can't starve the others.
+
+    A scheduler belongs to the event loop it first runs on, like the MCP sessions whose calls it
+    admits. Nodes can share it only if they run on that loop, e.g. all with `ainvoke` in one process
+    or all with the same `EventLoopThread`; using it from another loop raises RuntimeError.
+
+    Args:
+        max_concurrency: Maximum number of tool calls in flight across all tools.
+        tool_limits: Per-tool limits keyed by tool name.
+        default_limit: Limit applied to tools missing from `tool_limits`. Defaults to no limit.
+
+    Example:
+        ```python
+        scheduler = ToolCallScheduler(4, tool_limits={"list_events": ToolLimit(max_concurrency=2, rate=5)})
+        async with scheduler.slot("list_events") as timing:
+            await session.call_tool("list_events", arguments=args)
+        print(timing.queue_wait, timing.execution)
+        ```
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        *,
+        tool_limits: dict[str, ToolLimit] | None = None,
+        default_limit: ToolLimit | None = None,
+    ) -> None:
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.max_concurrency = max_concurrency
+        self.tool_limits = dict(tool_limits or {})
+        self.default_limit = default_limit or ToolLimit()
+        self._in_flight = 0
+        self._in_flight_by_tool: dict[str, int] = {}
+        self._buckets: dict[str, _TokenBucket] = {}
+        self._waiters: dict[str, deque[asyncio.Future[None]]] = {}
+        # Tools with queued calls, in the order they will be offered the next free slot
+        self._rotation: deque[str] = deque()
+        self._timer: asyncio.TimerHandle | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently holding a slot."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of calls waiting for a slot."""
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def _limit(self, tool_name: str) -> ToolLimit:
+        return self.tool_limits.get(tool_name, self.default_limit)
+
+    def _bucket(self, tool_name: str) -> _TokenBucket | None:
+        limit = self._limit(tool_name)
+        if limit.rate is None:
+            return None
+        if (bucket := self._buckets.get(tool_name)) is None:
+            bucket = self._buckets[tool_name] = _TokenBucket(limit.rate, max(1, limit.burst))
+        return bucket
+
+    @asynccontextmanager
+    async def slot(self, tool_name: str, timing: CallTiming | None = None) -> AsyncIterator[CallTiming]:
+        """Wait for a slot to run `tool_name` and hold it for the duration of the block.
+
+        The yielded `CallTiming` (`timing` if given) has `queue_wait` filled on entry and `execution` on exit.
+        """
+        timing = timing if timing is not None else CallTiming()
+        enqueued = time.perf_counter()
+        await self._acquire(tool_name)
+        started = time.perf_counter()
+        timing.queue_wait = started - enqueued
+        try:
+            yield timing
+        finally:
+            timing.execution = time.perf_counter() - started
+            self._release(tool_name)
+
+    async def _acquire(self, tool_name: str) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is None or self._loop.is_closed():
+            self._loop = loop
+        elif self._loop is not loop:
+            raise RuntimeError("ToolCallScheduler is used from another event loop than the one it runs on")
+        waiter: asyncio.Future[None] = loop.create_future()
+        waiters = self._waiters.setdefault(tool_name, deque())
+        if not waiters:
+            self._rotation.append(tool_name)
+        waiters.append(waiter)
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted while we were being cancelled, hand it back
+                self._release(tool_name)
+            else:
+                self._discard(tool_name, waiter)
+            raise
+
+    def _discard(self, tool_name: str, waiter: asyncio.Future[None]) -> None:
+        waiters = self._waiters.get(tool_name)
+        if waiters is None:
+            return
+        try:
+            waiters.remove(waiter)
+        except ValueError:
+            pass
+        if not waiters:
+            del self._waiters[tool_name]
+            try:
+                self._rotation.remove(tool_name)
+            except ValueError:
+                pass
+
+    def _release(self, tool_name: str) -> None:
+        self._in_flight -= 1
+        self._in_flight_by_tool[tool_name] -= 1
+        if not self._in_flight_by_tool[tool_name]:
+            del self._in_flight_by_tool[tool_name]
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand out free slots round-robin across tools with queued calls."""
+        retry_in: float | None = None
+        skipped = 0
+        while self._rotation and self._in_flight < self.max_concurrency and skipped < len(self._rotation):
+            tool_name = self._rotation[0]
+            limit = self._limit(tool_name)
+            now = time.monotonic()
+            if limit.max_concurrency is not None and self._in_flight_by_tool.get(tool_name, 0) >= limit.max_concurrency:
+                # Released slots of this tool will trigger another dispatch
+                self._rotation.rotate(-1)
+                skipped += 1
+                continue
+            bucket = self._bucket(tool_name)
+            if bucket is not None and not bucket.try_take(now):
+                wait = bucket.wait_time(now)
+                retry_in = wait if retry_in is None else min(retry_in, wait)
+                self._rotation.rotate(-1)
+                skipped += 1
+                continue
+
+            waiters = self._waiters[tool_name]
+            waiter = waiters.popleft()
+            self._rotation.popleft()
+            if waiters:
+                self._rotation.append(tool_name)
+            else:
+                del self._waiters[tool_name]
+            skipped = 0
+            if waiter.done():
+                # Cancelled before we got to it, give the token back
+                if bucket is not None:
+                    bucket.tokens += 1
+                continue
+            self._in_flight += 1
+            self._in_flight_by_tool[tool_name] = self._in_flight_by_tool.get(tool_name, 0) + 1
+            waiter.set_result(None)
+
+        if retry_in is not None:
+            loop = asyncio.get_running_loop()
+            if self._timer is not None and self._timer.when() > loop.time() + retry_in:
+                # A token comes earlier than the pending timer would retry
+                self._timer.cancel()
+                self._timer = None
+            if self._timer is None:
+                self._timer = loop.call_later(retry_in, self._on_timer)
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._dispatch()
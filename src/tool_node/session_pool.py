@@ -0,0 +1,460 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable, Callable
+from contextlib import AsyncExitStack
+from types import TracebackType
+from typing import Any, TypeVar, cast
+
+import anyio
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import SSEConnection, StdioConnection
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import ClientSession
+from mcp.types import CallToolResult, EmptyResult, ListToolsResult, ProgressToken
+
+from src.tool_node import rpc
+from src.tool_node.notifications import ANY, NotificationCallback, NotificationRouter
+from src.tool_node.transport import TransportFactory, open_transport
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WorkerClosedError(ConnectionError):
+    """The server process serving a request exited before answering."""
+
+
+class _WatchedReceiveStream:
+    """Read stream handed to the ClientSession that reports when the transport closes it.
+
+    The transports close their read stream when the server's output ends, i.e. when the process
+    exits or the connection drops, which the ClientSession itself doesn't report.
+    """
+
+    def __init__(self, stream: Any, on_close: Callable[[], None]) -> None:
+        self._stream = stream
+        self._on_close = on_close
+
+    async def receive(self) -> Any:
+        try:
+            return await self._stream.receive()
+        except (anyio.EndOfStream, anyio.ClosedResourceError, anyio.BrokenResourceError):
+            self._on_close()
+            raise
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self
+
+    async def __anext__(self) -> Any:
+        try:
+            return await self.receive()
+        except anyio.EndOfStream:
+            raise StopAsyncIteration from None
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+    async def __aenter__(self) -> _WatchedReceiveStream:
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._stream, name)
+
+
+class _Worker:
+    """One server process and the ClientSession talking to it.
+
+    The transport and session are entered and exited inside a dedicated task, since the anyio task
+    groups they create must be closed by the task that opened them. The worker closes itself when
+    the server's output ends, failing its pending requests and calling `on_exit`, but not when it
+    is stopped or its task is cancelled.
+    """
+
+    def __init__(
+        self,
+        server_name: str,
+        connection: StdioConnection | SSEConnection,
+        index: int,
+        on_notification: NotificationCallback | None = None,
+        transport_factory: TransportFactory = open_transport,
+        on_exit: Callable[[_Worker], None] | None = None,
+    ) -> None:
+        self.server_name = server_name
+        self.connection = connection
+        self.index = index
+        self.on_notification = on_notification
+        self.transport_factory = transport_factory
+        self.on_exit = on_exit
+        self.session: ClientSession | None = None
+        self.outstanding = 0
+        self.startup_seconds: float | None = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._disconnected = asyncio.Event()
+        self._closed: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def healthy(self) -> bool:
+        return self.session is not None and not self._closed.done()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=f"mcp-{self.server_name}-{self.index}")
+        ready = asyncio.ensure_future(self._ready.wait())
+        try:
+            await asyncio.wait({self._task, ready}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            ready.cancel()
+        if not self._ready.is_set():
+            # _run only returns before ready if the server failed to start
+            self._task.result()
+            raise WorkerClosedError(f"MCP server '{self.server_name}' exited during startup")
+
+    async def _run(self) -> None:
+        started = time.perf_counter()
+        try:
+            async with AsyncExitStack() as stack:
+                read, write = await stack.enter_async_context(self.transport_factory(self.connection))
+                read = _WatchedReceiveStream(read, self._disconnected.set)
+                session = cast(ClientSession, await stack.enter_async_context(ClientSession(read, write)))
+                await session.initialize()
+                router = NotificationRouter.for_session(session)
+                if self.on_notification is not None:
+                    router.subscribe(ANY, self.on_notification)
+                self.session = session
+                self.startup_seconds = time.perf_counter() - started
+                self._ready.set()
+                stop = asyncio.ensure_future(self._stop.wait())
+                disconnected = asyncio.ensure_future(self._disconnected.wait())
+                try:
+                    await asyncio.wait({stop, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    stop.cancel()
+                    disconnected.cancel()
+                if not self._stop.is_set():
+                    logger.warning("MCP server %s: worker %s exited", self.server_name, self.index)
+                    # Fail pending requests now rather than after the transport has shut down
+                    self._mark_closed()
+                    if self.on_exit is not None:
+                        self.on_exit(self)
+        finally:
+            self._mark_closed()
+
+    def _mark_closed(self) -> None:
+        self.session = None
+        if not self._closed.done():
+            self._closed.set_result(None)
+
+    async def request(self, fn: Callable[[ClientSession], Awaitable[T]]) -> T:
+        """Runs `fn` against the session, failing fast if the worker dies while it waits."""
+        if not self.healthy:
+            raise WorkerClosedError(f"MCP server '{self.server_name}' worker {self.index} is not running")
+        self.outstanding += 1
+        call = asyncio.ensure_future(fn(cast(ClientSession, self.session)))
+        try:
+            await asyncio.wait({call, self._closed}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            call.cancel()
+            raise
+        finally:
+            self.outstanding -= 1
+        if not call.done():
+            call.cancel()
+            raise WorkerClosedError(f"MCP server '{self.server_name}' worker {self.index} exited")
+        return call.result()
+
+    async def aclose(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            try:
+                await self._task
+            except Exception:
+                logger.debug("MCP server %s worker %s exited with an error", self.server_name, self.index, exc_info=True)
+
+
+class PooledSession:
+    """A ClientSession-like facade over several processes of the same MCP server.
+
+    Requests go to the healthy worker with the fewest outstanding requests. A worker whose server
+    process exits fails its pending requests and is replaced in the background. A background task
+    also pings every worker each `health_check_interval` seconds and replaces the ones that stopped
+    answering, and dead workers are replaced when a request finds none healthy.
+
+    Args:
+        server_name: Name of the server, used in logs and errors.
+        connection: MultiServerMCPClient-style connection config (stdio or sse).
+        size: Number of server processes to run.
+        health_check_interval: Seconds between health checks. None = no background checks.
+        ping_timeout: Seconds a worker has to answer a health check ping.
+        transport_factory: Opens a worker's read/write streams from `connection`, e.g.
+            `transport.batched_transport`. Defaults to mcp's stdio and SSE clients.
+    """
+
+    def __init__(
+        self,
+        server_name: str,
+        connection: StdioConnection | SSEConnection,
+        *,
+        size: int = 2,
+        health_check_interval: float | None = 15.0,
+        ping_timeout: float = 5.0,
+        transport_factory: TransportFactory = open_transport,
+    ) -> None:
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        self.server_name = server_name
+        self.connection = connection
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+        self.transport_factory = transport_factory
+        self.workers: list[_Worker] = []
+        self.respawns = 0
+        # Seconds each worker took from spawn to an initialized session, in spawn order
+        self.startup_seconds: list[float] = []
+        self._spawned = 0
+        self._respawn_lock: asyncio.Lock | None = None
+        self._health_task: asyncio.Task[None] | None = None
+        self._respawn_tasks: set[asyncio.Task[None]] = set()
+        self._starting: asyncio.Future[PooledSession] | None = None
+        self._closing = False
+        self._notifications = NotificationRouter(cast(ClientSession, self))
+
+    async def start(self) -> PooledSession:
+        if self._respawn_lock is None:
+            self._respawn_lock = asyncio.Lock()
+        results = await asyncio.gather(*(self._spawn() for _ in range(self.size)), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if len(errors) == self.size:
+            raise errors[0]
+        for error in errors:
+            logger.warning("MCP server %s: a worker failed to start: %s", self.server_name, error)
+        self._start_health_checks()
+        logger.info("Started MCP server %s in %.2fs", self.server_name, max(self.startup_seconds, default=0.0))
+        return self
+
+    def start_soon(self) -> PooledSession:
+        """Starts the workers in the background and returns at once.
+
+        Requests made meanwhile wait for the startup. If no worker could start, they spawn one again,
+        as when every worker died, and fail with its error.
+        """
+        self._respawn_lock = asyncio.Lock()
+        self._starting = asyncio.ensure_future(self.start())
+        self._starting.add_done_callback(self._log_start_error)
+        return self
+
+    def _log_start_error(self, task: asyncio.Future[PooledSession]) -> None:
+        if not task.cancelled() and (error := task.exception()) is not None:
+            logger.warning("MCP server %s failed to start: %s", self.server_name, error)
+
+    def _start_health_checks(self) -> None:
+        if self.health_check_interval is not None and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _spawn(self) -> _Worker:
+        worker = _Worker(
+            self.server_name,
+            self.connection,
+            self._spawned,
+            self._notifications.dispatch,
+            self.transport_factory,
+            on_exit=self._on_worker_exit,
+        )
+        self._spawned += 1
+        await worker.start()
+        self.startup_seconds.append(cast(float, worker.startup_seconds))
+        self.workers.append(worker)
+        return worker
+
+    async def _replace(self, worker: _Worker) -> None:
+        if worker in self.workers:
+            self.workers.remove(worker)
+        await worker.aclose()
+        self.respawns += 1
+        try:
+            await self._spawn()
+        except Exception:
+            logger.warning("MCP server %s: failed to respawn a worker", self.server_name, exc_info=True)
+
+    def _on_worker_exit(self, worker: _Worker) -> None:
+        if self._closing:
+            return
+        task = asyncio.create_task(self._respawn(worker))
+        self._respawn_tasks.add(task)
+        task.add_done_callback(self._respawn_tasks.discard)
+
+    async def _respawn(self, worker: _Worker) -> None:
+        async with cast(asyncio.Lock, self._respawn_lock):
+            # Already replaced by a health check or _pick meanwhile
+            if worker in self.workers and not self._closing:
+                await self._replace(worker)
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(cast(float, self.health_check_interval))
+            await self.check_health()
+
+    async def check_health(self) -> None:
+        """Pings every worker and replaces dead ones, topping the pool back up to `size`."""
+
+        async def ping(worker: _Worker) -> bool:
+            try:
+                await asyncio.wait_for(worker.request(lambda s: s.send_ping()), self.ping_timeout)
+                return True
+            except Exception:
+                return False
+
+        async with cast(asyncio.Lock, self._respawn_lock):
+            alive = await asyncio.gather(*(ping(w) for w in self.workers))
+            dead = [w for w, ok in zip(self.workers, alive) if not ok]
+            for worker in dead:
+                logger.warning("MCP server %s: worker %s is unhealthy, respawning", self.server_name, worker.index)
+            await asyncio.gather(*(self._replace(w) for w in dead))
+            missing = self.size - len(self.workers)
+            if missing > 0:
+                await asyncio.gather(*(self._spawn() for _ in range(missing)), return_exceptions=True)
+
+    async def _pick(self) -> _Worker:
+        if self._starting is not None and not self._starting.done():
+            # Not cancelled with the request; a failed startup is handled below like dead workers
+            await asyncio.wait({self._starting})
+        healthy = [w for w in self.workers if w.healthy]
+        if not healthy:
+            async with cast(asyncio.Lock, self._respawn_lock):
+                healthy = [w for w in self.workers if w.healthy]
+                if not healthy:
+                    for worker in list(self.workers):
+                        self.workers.remove(worker)
+                        await worker.aclose()
+                    self.respawns += 1
+                    healthy = [await self._spawn()]
+                    self._start_health_checks()
+        return min(healthy, key=lambda w: w.outstanding)
+
+    async def request(self, fn: Callable[[ClientSession], Awaitable[T]]) -> T:
+        """Runs `fn` with the session of the least busy healthy worker."""
+        return await (await self._pick()).request(fn)
+
+    async def call_tool(
+        self,
+        name: str,
+        arguments: dict | None = None,
+        *,
+        progress_token: ProgressToken | None = None,
+    ) -> CallToolResult:
+        return await self.request(lambda s: rpc.call_tool(s, name, arguments, progress_token=progress_token))
+
+    async def list_tools(self) -> ListToolsResult:
+        return await self.request(lambda s: s.list_tools())
+
+    async def send_ping(self) -> EmptyResult:
+        return await self.request(lambda s: s.send_ping())
+
+    async def send_request(self, request: Any, result_type: type[T]) -> T:
+        return await self.request(lambda s: s.send_request(request, result_type))
+
+    def subscribe(self, method: str, callback: NotificationCallback) -> Callable[[], None]:
+        """Subscribes to notifications sent by any of the server's processes."""
+        return self._notifications.subscribe(method, callback)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": len(self.workers),
+            "healthy": sum(w.healthy for w in self.workers),
+            "outstanding": sum(w.outstanding for w in self.workers),
+            "respawns": self.respawns,
+            "last_startup_seconds": self.startup_seconds[-1] if self.startup_seconds else None,
+        }
+
+    async def aclose(self) -> None:
+        self._closing = True
+        if self._starting is not None:
+            # Cancelling would leave the processes of half-started workers behind
+            await asyncio.wait({self._starting})
+        for task in (self._health_task, *self._respawn_tasks):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await asyncio.gather(*(w.aclose() for w in self.workers))
+        self.workers.clear()
+
+
+class McpSessionPool:
+    """Drop-in replacement for MultiServerMCPClient that runs `size` processes per server.
+
+    `sessions` maps each server name to a `PooledSession`, which can be passed to `McpToolNode` in
+    place of a single ClientSession. `get_tools()` returns LangChain tools that call through the pool.
+
+    Example:
+        ```python
+        async with McpSessionPool(SERVER_CONFIGS, size=4) as pool:
+            node = await McpToolNode(pool.sessions["google-calendar"]).init_funcs()
+        ```
+    """
+
+    def __init__(
+        self,
+        connections: dict[str, StdioConnection | SSEConnection] | None = None,
+        *,
+        size: int = 2,
+        health_check_interval: float | None = 15.0,
+        ping_timeout: float = 5.0,
+        transport_factory: TransportFactory = open_transport,
+    ) -> None:
+        self.connections = connections or {}
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+        self.transport_factory = transport_factory
+        self.sessions: dict[str, PooledSession] = {}
+        self.server_name_to_tools: dict[str, list[BaseTool]] = {}
+
+    async def __aenter__(self) -> McpSessionPool:
+        try:
+            for server_name, connection in self.connections.items():
+                session = PooledSession(
+                    server_name,
+                    connection,
+                    size=self.size,
+                    health_check_interval=self.health_check_interval,
+                    ping_timeout=self.ping_timeout,
+                    transport_factory=self.transport_factory,
+                )
+                self.sessions[server_name] = await session.start()
+                self.server_name_to_tools[server_name] = await load_mcp_tools(cast(ClientSession, session))
+            return self
+        except Exception:
+            await self.aclose()
+            raise
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(session.aclose() for session in self.sessions.values()))
+        self.sessions.clear()
+
+    def get_tools(self) -> list[BaseTool]:
+        """Get a list of all tools from all connected servers."""
+        all_tools: list[BaseTool] = []
+        for server_tools in self.server_name_to_tools.values():
+            all_tools.extend(server_tools)
+        return all_tools
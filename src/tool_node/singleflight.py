@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Collection
+from typing import Any, Generic, TypeVar
+
+from src.tool_node.cache import call_key
+
+T = TypeVar("T")
+
+
+class _Flight(Generic[T]):
+    def __init__(self, task: asyncio.Task[T]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces identical concurrent tool calls into a single underlying call.
+
+    The first caller for a key starts the call; callers arriving with the same key while it is
+    still running await the same result instead of issuing their own. The call is cancelled only
+    when every caller waiting on it has been cancelled. Share one instance between all nodes that
+    use the same MCP session to coalesce across concurrent graph runs.
+
+    Args:
+        tools: Names of the tools whose calls may be coalesced. Defaults to None = all tools.
+            Restrict this to idempotent tools if duplicated writes must all reach the server.
+    """
+
+    def __init__(self, tools: Collection[str] | None = None) -> None:
+        self.tools = set(tools) if tools is not None else None
+        self.coalesced = 0
+        self._flights: dict[str, _Flight[Any]] = {}
+
+    def key(self, tool_name: str, args: dict[str, Any] | None) -> str | None:
+        """Key identifying the call, or None if calls to `tool_name` must not be coalesced."""
+        if self.tools is not None and tool_name not in self.tools:
+            return None
+        return call_key(tool_name, args)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Run `fn` unless a call with the same key is already running.
+
+        Returns:
+            The result and whether it was shared from a call started by another caller.
+        """
+        shared = key in self._flights
+        if shared:
+            flight = self._flights[key]
+            self.coalesced += 1
+        else:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda _: self._flights.pop(key, None))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        except asyncio.CancelledError:
+            if not flight.task.done() and flight.waiters == 1:
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import logging
+import sys
+from collections.abc import AsyncIterator
+from contextlib import AbstractAsyncContextManager, asynccontextmanager
+from typing import Callable
+
+import anyio
+import anyio.lowlevel
+import mcp.types as types
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from langchain_mcp_adapters.client import SSEConnection, StdioConnection
+from mcp import StdioServerParameters
+from mcp.client.sse import sse_client
+from mcp.client.stdio import get_default_environment, stdio_client
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+Streams = tuple[
+    MemoryObjectReceiveStream["types.JSONRPCMessage | Exception"],
+    MemoryObjectSendStream[types.JSONRPCMessage],
+]
+TransportFactory = Callable[[StdioConnection | SSEConnection], AbstractAsyncContextManager[Streams]]
+
+
+def _encode(message: types.JSONRPCMessage) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(message.model_dump(by_alias=True, exclude_none=True, mode="json"))
+    return message.model_dump_json(by_alias=True, exclude_none=True).encode()
+
+
+def _decode(line: bytes | bytearray | memoryview) -> types.JSONRPCMessage:
+    if orjson is not None:
+        # orjson + model_validate is about twice as fast as pydantic's own JSON parsing of responses
+        return types.JSONRPCMessage.model_validate(orjson.loads(line))
+    # pydantic only parses str, bytes and bytearray
+    return types.JSONRPCMessage.model_validate_json(bytes(line) if isinstance(line, memoryview) else line)
+
+
+def _stdio_parameters(connection: StdioConnection) -> StdioServerParameters:
+    return StdioServerParameters(
+        command=connection["command"],
+        args=connection["args"],
+        env=connection.get("env"),
+        encoding=connection.get("encoding", "utf-8"),
+        encoding_error_handler=connection.get("encoding_error_handler", "strict"),
+    )
+
+
+def open_transport(connection: StdioConnection | SSEConnection) -> AbstractAsyncContextManager[Streams]:
+    """Opens the read/write streams for a MultiServerMCPClient-style connection config."""
+    connection = dict(connection)
+    transport = connection.pop("transport", "stdio")
+    if transport == "sse":
+        return sse_client(connection["url"])
+    if transport == "stdio":
+        return stdio_client(_stdio_parameters(connection))
+    raise ValueError(f"Unsupported transport: {transport}. Must be 'stdio' or 'sse'")
+
+
+def batched_transport(
+    connection: StdioConnection | SSEConnection,
+    *,
+    window: float = 0.0,
+    max_batch_bytes: int = 1 << 20,
+) -> AbstractAsyncContextManager[Streams]:
+    """Like `open_transport`, but stdio servers get a `batched_stdio_client`.
+
+    Use `functools.partial(batched_transport, window=...)` to pass a window to a session pool.
+    """
+    if connection.get("transport", "stdio") == "stdio" and connection.get("encoding", "utf-8").lower() in ("utf-8", "utf8"):
+        return batched_stdio_client(_stdio_parameters(connection), window=window, max_batch_bytes=max_batch_bytes)
+    return open_transport(connection)
+
+
+@asynccontextmanager
+async def batched_stdio_client(
+    server: StdioServerParameters,
+    *,
+    window: float = 0.0,
+    max_batch_bytes: int = 1 << 20,
+) -> AsyncIterator[Streams]:
+    """Drop-in replacement for mcp's `stdio_client` that batches writes and parses bytes directly.
+
+    Messages sent while the writer is busy, e.g. the tool calls of one graph step started together,
+    are serialized into one reused buffer and written to the server's stdin with a single write and
+    drain. With a `window` the writer also waits `window` seconds after the first message of a batch
+    for more to join it, trading that much latency for fewer writes. Responses are split on
+    newlines in a reused byte buffer without decoding to text first, and parsed with orjson when it
+    is installed. The ClientSession still matches responses to requests by their id.
+
+    Newline-delimited JSON-RPC over stdio must be UTF-8, so the server's `encoding` is not used.
+
+    Args:
+        server: The server process to spawn.
+        window: Seconds to wait for more messages before writing a batch. 0 = only what is queued.
+        max_batch_bytes: Size at which a batch is written without waiting for more messages.
+    """
+    read_stream_writer, read_stream = anyio.create_memory_object_stream[types.JSONRPCMessage | Exception](0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream[types.JSONRPCMessage](0)
+
+    process = await anyio.open_process(
+        [server.command, *server.args],
+        env=server.env if server.env is not None else get_default_environment(),
+        stderr=sys.stderr,
+    )
+
+    async def stdout_reader() -> None:
+        assert process.stdout, "Opened process is missing stdout"
+        buffer = bytearray()
+        try:
+            async with read_stream_writer:
+                while True:
+                    try:
+                        buffer += await process.stdout.receive(65536)
+                    except (anyio.EndOfStream, anyio.ClosedResourceError):
+                        break
+                    start = 0
+                    while (end := buffer.find(b"\n", start)) != -1:
+                        line = memoryview(buffer)[start:end]
+                        start = end + 1
+                        try:
+                            message: types.JSONRPCMessage | Exception = _decode(line)
+                        except Exception as exc:
+                            message = exc
+                        finally:
+                            line.release()
+                        await read_stream_writer.send(message)
+                    del buffer[:start]
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    async def stdin_writer() -> None:
+        assert process.stdin, "Opened process is missing stdin"
+        batch = bytearray()
+        try:
+            async with write_stream_reader:
+                async for message in write_stream_reader:
+                    batch += _encode(message)
+                    batch += b"\n"
+                    if window > 0:
+                        # Senders block meanwhile and are picked up below, none is lost to a cancelled receive
+                        await anyio.sleep(window)
+                    while len(batch) < max_batch_bytes:
+                        try:
+                            message = write_stream_reader.receive_nowait()
+                        except (anyio.WouldBlock, anyio.EndOfStream):
+                            break
+                        batch += _encode(message)
+                        batch += b"\n"
+                    # The pipe transport writes or copies the data before send returns, so the buffer is reused
+                    await process.stdin.send(batch)
+                    del batch[:]
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+
+    async with anyio.create_task_group() as tg, process:
+        tg.start_soon(stdout_reader)
+        tg.start_soon(stdin_writer)
+        yield read_stream, write_stream
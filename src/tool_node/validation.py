@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+from collections.abc import Callable
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Validates a value and returns it, coerced if needed. The input is returned as is, not copied,
+# when nothing in it was coerced.
+Validator = Callable[[Any, str], Any]
+
+_INTEGER = re.compile(r"^[+-]?\d+$")
+_BOOLEANS = {"true": True, "false": False}
+
+
+class ArgumentValidationError(ValueError):
+    """Tool call arguments don't match the tool's input schema."""
+
+    def __init__(self, path: str, message: str) -> None:
+        super().__init__(f"{path}: {message}")
+        self.path = path
+
+
+def _describe(value: Any) -> str:
+    text = repr(value)
+    return text if len(text) <= 60 else text[:57] + "..."
+
+
+def _is_type(value: Any, type_name: str) -> bool:
+    if type_name == "string":
+        return isinstance(value, str)
+    if type_name == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if type_name == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if type_name == "boolean":
+        return isinstance(value, bool)
+    if type_name == "object":
+        return isinstance(value, dict)
+    if type_name == "array":
+        return isinstance(value, list)
+    if type_name == "null":
+        return value is None
+    return True
+
+
+def _coerce(value: Any, type_name: str) -> tuple[bool, Any]:
+    """Lossless conversions of values models commonly get wrong, e.g. "3" for an integer."""
+    if isinstance(value, str):
+        text = value.strip()
+        if type_name == "integer" and _INTEGER.match(text):
+            return True, int(text)
+        if type_name == "number":
+            try:
+                number = float(text)
+            except ValueError:
+                return False, value
+            if math.isfinite(number):
+                return True, int(number) if _INTEGER.match(text) else number
+        if type_name == "boolean" and text.lower() in _BOOLEANS:
+            return True, _BOOLEANS[text.lower()]
+    elif type_name == "integer" and isinstance(value, float) and value.is_integer():
+        return True, int(value)
+    return False, value
+
+
+class _Compiler:
+    def __init__(self, root: dict[str, Any]) -> None:
+        self.root = root
+        self._refs: dict[str, Validator] = {}
+
+    def _resolve(self, ref: str) -> Validator:
+        if ref in self._refs:
+            return self._refs[ref]
+        if not ref.startswith("#/"):
+            logger.debug("Not validating against external schema %s", ref)
+            return lambda value, path: value
+        target: Any = self.root
+        try:
+            for part in ref[2:].split("/"):
+                target = target[part.replace("~1", "/").replace("~0", "~")]
+        except (KeyError, IndexError, TypeError):
+            logger.warning("Not validating against unresolvable schema reference %s", ref)
+            return lambda value, path: value
+        # Compiled lazily so recursive schemas don't recurse forever
+        compiled: list[Validator] = []
+
+        def validate_ref(value: Any, path: str) -> Any:
+            if not compiled:
+                compiled.append(self.compile(target))
+            return compiled[0](value, path)
+
+        self._refs[ref] = validate_ref
+        return validate_ref
+
+    def compile(self, schema: Any) -> Validator:
+        if schema is False:
+            return _reject
+        if not isinstance(schema, dict) or not schema:
+            return lambda value, path: value
+        if "$ref" in schema:
+            return self._resolve(schema["$ref"])
+
+        checks: list[Validator] = []
+        types = schema.get("type")
+        if types is not None:
+            checks.append(_type_check([types] if isinstance(types, str) else list(types)))
+        if "enum" in schema:
+            checks.append(_enum_check(schema["enum"]))
+        if "const" in schema:
+            checks.append(_enum_check([schema["const"]]))
+        checks += _string_checks(schema)
+        checks += _number_checks(schema)
+        if "properties" in schema or "required" in schema or "additionalProperties" in schema:
+            checks.append(self._object_check(schema))
+        if "items" in schema or "minItems" in schema or "maxItems" in schema:
+            checks.append(self._array_check(schema))
+        for keyword in ("anyOf", "oneOf"):
+            if keyword in schema:
+                checks.append(self._any_of([self.compile(s) for s in schema[keyword]]))
+        for sub in schema.get("allOf", ()):
+            checks.append(self.compile(sub))
+
+        if len(checks) == 1:
+            return checks[0]
+
+        def validate(value: Any, path: str) -> Any:
+            for check in checks:
+                value = check(value, path)
+            return value
+
+        return validate
+
+    def _object_check(self, schema: dict[str, Any]) -> Validator:
+        properties = {name: self.compile(sub) for name, sub in schema.get("properties", {}).items()}
+        required = tuple(schema.get("required", ()))
+        additional = schema.get("additionalProperties", True)
+        extra = self.compile(additional) if isinstance(additional, dict) else None
+
+        def validate(value: Any, path: str) -> Any:
+            if not isinstance(value, dict):
+                return value
+            for name in required:
+                if name not in value:
+                    raise ArgumentValidationError(path, f"missing required property '{name}'")
+            coerced: dict[str, Any] | None = None
+            for name, item in value.items():
+                if (check := properties.get(name)) is None:
+                    if additional is False:
+                        raise ArgumentValidationError(
+                            path, f"unexpected property '{name}', expected one of {sorted(properties)}"
+                        )
+                    if extra is None:
+                        continue
+                    check = extra
+                new = check(item, f"{path}.{name}")
+                if new is not item:
+                    if coerced is None:
+                        coerced = dict(value)
+                    coerced[name] = new
+            return value if coerced is None else coerced
+
+        return validate
+
+    def _array_check(self, schema: dict[str, Any]) -> Validator:
+        items = self.compile(schema["items"]) if isinstance(schema.get("items"), dict) else None
+        min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+
+        def validate(value: Any, path: str) -> Any:
+            if not isinstance(value, list):
+                return value
+            if min_items is not None and len(value) < min_items:
+                raise ArgumentValidationError(path, f"expected at least {min_items} items, got {len(value)}")
+            if max_items is not None and len(value) > max_items:
+                raise ArgumentValidationError(path, f"expected at most {max_items} items, got {len(value)}")
+            if items is None:
+                return value
+            coerced: list[Any] | None = None
+            for i, item in enumerate(value):
+                new = items(item, f"{path}[{i}]")
+                if new is not item:
+                    if coerced is None:
+                        coerced = list(value)
+                    coerced[i] = new
+            return value if coerced is None else coerced
+
+        return validate
+
+    def _any_of(self, options: list[Validator]) -> Validator:
+        def validate(value: Any, path: str) -> Any:
+            errors = []
+            coerced: list[Any] = []
+            for option in options:
+                try:
+                    result = option(value, path)
+                except ArgumentValidationError as e:
+                    errors.append(str(e).removeprefix(f"{path}: "))
+                    continue
+                # An option the value matches as is wins over one it has to be coerced to
+                if result is value:
+                    return value
+                coerced.append(result)
+            if coerced:
+                return coerced[0]
+            raise ArgumentValidationError(path, "matches none of the allowed schemas: " + "; ".join(errors))
+
+        return validate
+
+
+def _reject(value: Any, path: str) -> Any:
+    raise ArgumentValidationError(path, "no value is allowed here")
+
+
+def _type_check(types: list[str]) -> Validator:
+    expected = " or ".join(types)
+
+    def validate(value: Any, path: str) -> Any:
+        if any(_is_type(value, type_name) for type_name in types):
+            return value
+        for type_name in types:
+            ok, coerced = _coerce(value, type_name)
+            if ok:
+                return coerced
+        raise ArgumentValidationError(path, f"expected {expected}, got {_describe(value)}")
+
+    return validate
+
+
+def _enum_check(allowed: list[Any]) -> Validator:
+    def validate(value: Any, path: str) -> Any:
+        # bool is an int subclass: True must not match 1
+        if any(value == option and isinstance(value, bool) == isinstance(option, bool) for option in allowed):
+            return value
+        raise ArgumentValidationError(path, f"expected one of {allowed}, got {_describe(value)}")
+
+    return validate
+
+
+def _compile_pattern(pattern: Any) -> re.Pattern[str] | None:
+    """The compiled ECMA-262 `pattern`, or None if `re` can't compile it, e.g. Unicode property escapes."""
+    try:
+        return re.compile(pattern)
+    except (re.error, TypeError) as e:
+        logger.warning("Not validating against pattern %r: %s", pattern, e)
+        return None
+
+
+def _string_checks(schema: dict[str, Any]) -> list[Validator]:
+    min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+    pattern = _compile_pattern(schema["pattern"]) if "pattern" in schema else None
+    if min_length is None and max_length is None and pattern is None:
+        return []
+
+    def validate(value: Any, path: str) -> Any:
+        if not isinstance(value, str):
+            return value
+        if min_length is not None and len(value) < min_length:
+            raise ArgumentValidationError(path, f"expected at least {min_length} characters, got {len(value)}")
+        if max_length is not None and len(value) > max_length:
+            raise ArgumentValidationError(path, f"expected at most {max_length} characters, got {len(value)}")
+        if pattern is not None and not pattern.search(value):
+            raise ArgumentValidationError(path, f"{_describe(value)} does not match {pattern.pattern!r}")
+        return value
+
+    return [validate]
+
+
+def _number_checks(schema: dict[str, Any]) -> list[Validator]:
+    bounds = [
+        (keyword, schema[keyword], compare)
+        for keyword, compare in (
+            ("minimum", lambda v, b: v >= b),
+            ("maximum", lambda v, b: v <= b),
+            ("exclusiveMinimum", lambda v, b: v > b),
+            ("exclusiveMaximum", lambda v, b: v < b),
+        )
+        # draft 4 booleans modify minimum/maximum, which are then checked inclusively
+        if keyword in schema and not isinstance(schema[keyword], bool)
+    ]
+    if not bounds:
+        return []
+
+    def validate(value: Any, path: str) -> Any:
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            return value
+        for keyword, bound, compare in bounds:
+            if not compare(value, bound):
+                raise ArgumentValidationError(path, f"{value} violates {keyword} {bound}")
+        return value
+
+    return [validate]
+
+
+def compile_validator(schema: dict[str, Any] | None) -> Validator:
+    """Compiles a tool's JSON Schema `inputSchema` to a validator of its arguments.
+
+    Supports the keywords tool schemas use: type, properties, required, additionalProperties,
+    items, enum, const, string and number bounds, pattern, anyOf/oneOf/allOf and local $refs.
+    Other keywords are not checked, so a call is never rejected for a keyword the server may not
+    care about, and neither are patterns Python's `re` can't compile or $refs that don't resolve.
+    Safe coercions are applied instead of failing: numeric strings to integers and
+    numbers, integral floats to integers, and "true"/"false" to booleans. The validator returns
+    the arguments, the same object when nothing was coerced, and raises `ArgumentValidationError`
+    naming the offending path otherwise.
+    """
+    return _Compiler(schema or {}).compile(schema or {})
+
+
+def validate_arguments(validator: Validator, args: dict[str, Any] | None) -> dict[str, Any]:
+    """Runs `validator` on tool call arguments, None being no arguments."""
+    return validator(args if args is not None else {}, "args")
@@ -0,0 +1,11 @@
+import os
+
+import pytest
+
+# task_maistro creates its ChatOpenAI model at import, the tests never call it
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
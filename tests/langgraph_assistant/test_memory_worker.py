@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+import anyio
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.store.memory import InMemoryStore
+
+import memory_worker
+import task_maistro
+from memory_worker import MemoryUpdateQueue
+
+pytestmark = pytest.mark.anyio
+
+NAMESPACE = ("todo", "general", "user")
+
+
+def recorder(runs, name, seconds=0.0):
+    async def job():
+        await asyncio.sleep(seconds)
+        runs.append(name)
+
+    return job
+
+
+async def test_updates_submitted_within_the_debounce_are_coalesced():
+    queue, runs = MemoryUpdateQueue(debounce=0.05), []
+    for name in ["first", "second", "third"]:
+        queue.submit(NAMESPACE, recorder(runs, name))
+        await asyncio.sleep(0.01)
+    await queue.drain()
+    assert runs == ["third"]
+    assert queue.coalesced == 2
+    assert not queue.pending(NAMESPACE)
+
+
+async def test_an_update_submitted_while_one_runs_runs_after_it():
+    queue, runs = MemoryUpdateQueue(debounce=0), []
+    queue.submit(NAMESPACE, recorder(runs, "running", 0.05))
+    await asyncio.sleep(0.01)
+    queue.submit(NAMESPACE, recorder(runs, "next"))
+    queue.submit(("instructions", "general", "user"), recorder(runs, "other namespace"))
+    await queue.drain()
+    assert runs == ["other namespace", "running", "next"]
+
+
+async def test_flush_runs_queued_updates_without_waiting_for_the_debounce():
+    queue, runs = MemoryUpdateQueue(debounce=10), []
+    queue.submit(NAMESPACE, recorder(runs, "queued"))
+    queue.submit(("other",), recorder(runs, "untouched"))
+    with anyio.fail_after(1):
+        await queue.flush(NAMESPACE)
+    assert runs == ["queued"]
+    assert queue.pending(("other",))
+    with anyio.fail_after(1):
+        await queue.drain()
+    assert runs == ["queued", "untouched"]
+
+
+async def test_a_failed_update_does_not_stop_the_next_one():
+    queue, runs = MemoryUpdateQueue(debounce=0), []
+
+    async def fail():
+        raise RuntimeError("model down")
+
+    queue.submit(NAMESPACE, fail)
+    await queue.flush(NAMESPACE)
+    queue.submit(NAMESPACE, recorder(runs, "after"))
+    await queue.flush(NAMESPACE)
+    assert runs == ["after"]
+
+
+async def test_max_workers_bounds_updates_across_namespaces():
+    queue = MemoryUpdateQueue(debounce=0, max_workers=2)
+    running = peak = 0
+
+    async def job():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    for i in range(5):
+        queue.submit(("todo", str(i)), job)
+    await queue.drain()
+    assert peak == 2
+
+
+async def test_another_process_waits_for_the_pending_marker():
+    store, runs = InMemoryStore(), []
+    writer = MemoryUpdateQueue(debounce=0.05)
+    reader = MemoryUpdateQueue(poll_interval=0.01)
+    await writer.asubmit(NAMESPACE, recorder(runs, "written", 0.05), store)
+    assert await store.aget(memory_worker.MARKER_NAMESPACE + NAMESPACE, memory_worker.MARKER_KEY) is not None
+
+    # The reader has nothing queued itself, the marker makes it wait for the writer
+    with anyio.fail_after(1):
+        await reader.flush(NAMESPACE, store=store)
+    assert runs == ["written"]
+    assert await store.aget(memory_worker.MARKER_NAMESPACE + NAMESPACE, memory_worker.MARKER_KEY) is None
+
+
+async def test_an_abandoned_marker_is_ignored():
+    store = InMemoryStore()
+    marker = {"token": "gone", "at": time.time() - 10}
+    await store.aput(memory_worker.MARKER_NAMESPACE + NAMESPACE, memory_worker.MARKER_KEY, marker)
+    with anyio.fail_after(1):
+        await MemoryUpdateQueue(marker_ttl=5).flush(NAMESPACE, store=store)
+
+
+async def test_a_deferred_update_is_acknowledged_then_read_by_the_next_turn(monkeypatch):
+    store = InMemoryStore()
+    monkeypatch.setattr(task_maistro, "memory_updates", MemoryUpdateQueue(debounce=10))
+
+    async def extract_todos(messages, configurable, store):
+        await asyncio.sleep(0.05)
+        await store.aput(NAMESPACE, "new", {"task": "water the plants", "status": "not started"})
+        return "ToDo added"
+
+    monkeypatch.setattr(task_maistro, "extract_todos", extract_todos)
+    prompts = []
+
+    class Model:
+        async def ainvoke(self, messages):
+            prompts.append(messages[0].content)
+            return AIMessage("ok")
+
+    monkeypatch.setattr(task_maistro.bound_models, "get", lambda *args: Model())
+    config = {"configurable": {"user_id": "user", "memory_updates": "deferred"}}
+    call = {"name": "UpdateMemory", "args": {"update_type": "todo"}, "id": "1"}
+
+    acknowledged = await task_maistro.update_todos(
+        {"messages": [HumanMessage("remind me to water the plants")], "tool_calls": [call]}, config, store
+    )
+    assert acknowledged["messages"][0]["content"] == "ToDo list update scheduled"
+    assert await store.aget(NAMESPACE, "new") is None
+
+    # The next user turn runs the queued update before loading the list
+    with anyio.fail_after(1):
+        await task_maistro.task_mAIstro({"messages": [HumanMessage("what's on my list?")]}, config, store)
+    assert "water the plants" in prompts[0]
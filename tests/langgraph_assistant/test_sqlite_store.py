@@ -0,0 +1,160 @@
+import sqlite3
+
+import pytest
+from langgraph.store.base import GetOp, PutOp, SearchOp
+from langgraph.store.memory import InMemoryStore
+
+import sqlite_store
+from sqlite_store import SqliteStore
+
+pytestmark = pytest.mark.anyio
+
+ITEMS = {
+    ("todo", "general", "ada"): {
+        "a": {"status": "not started", "minutes": 10, "meta": {"owner": "ada"}, "tags": ["x"]},
+        "b": {"status": "done", "minutes": 30, "meta": {"owner": "bob"}, "deadline": None},
+        "c": {"status": "in progress", "minutes": 20, "meta": {"owner": "ada", "odd key": 1}},
+    },
+    ("todo", "general", "ada2"): {"d": {"status": "not started", "minutes": 5}},
+    ("todo", "work", "ada"): {"e": {"status": "not started", "minutes": 60}},
+    ("todo2",): {"f": {"status": "not started"}},
+    ("instructions", "general", "ada"): {"user_instructions": {"memory": "be brief"}},
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SqliteStore(str(tmp_path / "store.db"))
+    yield store
+    store.close()
+
+
+def fill(store):
+    store.batch([PutOp(namespace, key, value) for namespace, items in ITEMS.items() for key, value in items.items()])
+    return store
+
+
+def keys(store, prefix, filter=None):
+    return sorted(item.key for item in store.search(prefix, filter=filter, limit=100))
+
+
+@pytest.mark.parametrize(
+    "filter",
+    [
+        {"status": "not started"},
+        {"status": {"$ne": "done"}},
+        {"minutes": {"$gt": 10, "$lte": 30}},
+        {"minutes": {"$lt": 20}},
+        {"meta": {"owner": "ada"}},
+        {"meta": {"odd key": 1}},
+        {"tags": ["x"]},
+    ],
+)
+def test_filters_select_what_the_in_memory_store_selects(store, filter):
+    fill(store)
+    expected = fill(InMemoryStore())
+    assert keys(store, ("todo",), filter) == keys(expected, ("todo",), filter)
+
+
+def test_null_filters_and_unknown_operators(store):
+    fill(store)
+    assert keys(store, ("todo", "general"), {"deadline": None}) == ["a", "b", "c", "d"]
+    assert keys(store, ("todo", "general"), {"deadline": {"$ne": None}}) == []
+    with pytest.raises(ValueError, match="Unsupported operator"):
+        store.search(("todo",), filter={"minutes": {"$in": [1]}})
+
+
+@pytest.mark.parametrize(
+    "prefix, expected",
+    [
+        (("todo", "general", "ada"), ["a", "b", "c"]),
+        (("todo", "general"), ["a", "b", "c", "d"]),
+        (("todo",), ["a", "b", "c", "d", "e"]),
+        (("todo2",), ["f"]),
+        ((), ["a", "b", "c", "d", "e", "f", "user_instructions"]),
+    ],
+)
+def test_a_namespace_prefix_matches_whole_labels_only(store, prefix, expected):
+    fill(store)
+    assert keys(store, prefix) == expected
+
+
+def test_status_searches_use_the_namespace_range_and_the_index(store):
+    clauses, params = sqlite_store._filter_sql({"status": "not started"})
+    prefix = sqlite_store._encode_namespace(("todo", "general", "ada"))
+    with store._connection() as conn:
+        plan = conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT key FROM store WHERE namespace >= ? AND namespace < ? AND {clauses[0]}",
+            (prefix, prefix[:-1] + sqlite_store._AFTER_SEP, *params),
+        ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "SEARCH" in details and "SCAN" not in details
+
+
+def test_a_batch_reads_before_it_writes_and_the_last_write_wins(store):
+    fill(store)
+    namespace = ("todo", "general", "ada")
+    before, _, _, _ = store.batch(
+        [
+            GetOp(namespace, "a"),
+            PutOp(namespace, "a", {"status": "done"}),
+            PutOp(namespace, "a", {"status": "archived"}),
+            PutOp(namespace, "b", None),
+        ]
+    )
+    assert before.value["status"] == "not started"
+    assert store.get(namespace, "a").value == {"status": "archived"}
+    assert store.get(namespace, "b") is None
+    assert store.get(namespace, "a").created_at < store.get(namespace, "a").updated_at
+
+
+def test_a_failed_batch_writes_nothing(store):
+    fill(store)
+    with store._connection() as conn:
+        conn.execute(
+            "CREATE TRIGGER reject_bad BEFORE INSERT ON store WHEN NEW.key = 'bad' "
+            "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+        )
+    namespace = ("todo", "general", "ada")
+    with pytest.raises(sqlite3.IntegrityError, match="rejected"):
+        store.batch(
+            [
+                PutOp(namespace, "a", {"status": "done"}),
+                PutOp(namespace, "new", {"status": "not started"}),
+                PutOp(namespace, "bad", {"status": "not started"}),
+            ]
+        )
+    assert store.get(namespace, "a").value["status"] == "not started"
+    assert store.get(namespace, "new") is None
+    # The connection is usable again
+    store.put(namespace, "new", {"status": "not started"})
+    assert store.get(namespace, "new") is not None
+
+
+async def test_async_batches_and_other_connections_see_the_writes(store):
+    await store.abatch([PutOp(("todo", "general", "ada"), "a", {"status": "not started"})])
+    [page] = await store.abatch([SearchOp(("todo",), {"status": "not started"}, 10, 0)])
+    assert [item.key for item in page] == ["a"]
+
+    other = SqliteStore(store.path)
+    try:
+        assert other.get(("todo", "general", "ada"), "a").value == {"status": "not started"}
+    finally:
+        other.close()
+
+
+def test_list_namespaces(store):
+    fill(store)
+    assert store.list_namespaces(prefix=("todo", "general")) == [("todo", "general", "ada"), ("todo", "general", "ada2")]
+    assert store.list_namespaces(suffix=("*", "ada")) == [
+        ("instructions", "general", "ada"),
+        ("todo", "general", "ada"),
+        ("todo", "work", "ada"),
+    ]
+    assert store.list_namespaces(max_depth=1) == [("instructions",), ("todo",), ("todo2",)]
+
+
+def test_a_closed_store_refuses_operations(store):
+    store.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        store.get(("todo",), "a")
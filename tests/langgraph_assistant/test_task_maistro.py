@@ -0,0 +1,132 @@
+from functools import partial
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import END, START, MessagesState, StateGraph
+from langgraph.store.memory import InMemoryStore
+
+import task_maistro
+from src.tool_node.catalog import ToolCatalog
+from src.tool_node.router import ToolRouter
+from tests.tool_node.fake_server import FakeServer, connect
+
+pytestmark = pytest.mark.anyio
+
+
+def ai_message(*calls):
+    return AIMessage("", tool_calls=[{"name": name, "args": args, "id": str(i)} for i, (name, args) in enumerate(calls)])
+
+
+@pytest.fixture
+def calendar_server() -> FakeServer:
+    server = FakeServer()
+
+    @server.tool(schema={"type": "object", "properties": {"day": {"type": "string"}}})
+    async def list_events(day: str = "") -> str:
+        return f"events on {day}"
+
+    return server
+
+
+async def test_namespaced_calendar_calls_reach_the_tool_by_its_own_name(calendar_server):
+    async with connect(calendar_server) as session:
+        catalog = ToolCatalog(session, ttl=None)
+        await catalog.get()
+        calendar = task_maistro.CalendarTools(catalog)
+        router = ToolRouter(default="calendar_tools")
+        router.add_catalog(catalog, "calendar_tools", namespace="cal")
+
+        state = {"messages": [HumanMessage("hi"), ai_message(("cal__list_events", {"day": "monday"}))]}
+        [send] = task_maistro.route_message(state, {}, InMemoryStore(), router=router)
+        assert send.node == "calendar_tools"
+        assert [call["name"] for call in send.arg] == ["list_events"]
+
+        result = await calendar.run(send.arg, {"configurable": {}})
+    [message] = result["messages"] if isinstance(result, dict) else result
+    assert message.status == "success"
+    assert calendar_server.calls_of("list_events") == [{"day": "monday"}]
+
+
+def test_calls_are_fanned_out_one_send_per_node():
+    router = ToolRouter(default="calendar_tools")
+    todo_calls = [("UpdateMemory", {"update_type": "todo"}), ("UpdateMemory", {"update_type": "todo"})]
+    message = ai_message(
+        ("list_events", {"day": "monday"}),
+        *todo_calls,
+        ("list_events", {"day": "tuesday"}),
+        ("UpdateMemory", {"update_type": "instructions"}),
+    )
+    state = {"messages": [HumanMessage("plan my week"), message]}
+    calendar, todos, instructions = task_maistro.route_message(state, {}, InMemoryStore(), router=router)
+
+    assert calendar.node == "calendar_tools"
+    assert [call["id"] for call in calendar.arg] == ["0", "3"]
+    assert all(call["type"] == "tool_call" for call in calendar.arg)
+    assert todos.node == "update_todos"
+    assert [call["id"] for call in todos.arg["tool_calls"]] == ["1", "2"]
+    assert todos.arg["messages"] == state["messages"]
+    assert instructions.node == "update_instructions"
+    assert [call["id"] for call in instructions.arg["tool_calls"]] == ["4"]
+
+
+def test_a_message_without_tool_calls_ends_the_run():
+    state = {"messages": [HumanMessage("hi"), AIMessage("hello")]}
+    assert task_maistro.route_message(state, {}, InMemoryStore(), router=ToolRouter(default="calendar_tools")) == END
+
+
+async def test_every_call_is_answered_before_the_assistant_runs_again(calendar_server, monkeypatch):
+    replies = [
+        ai_message(
+            ("list_events", {"day": "monday"}),
+            ("list_events", {"day": "tuesday"}),
+            ("UpdateMemory", {"update_type": "todo"}),
+            ("UpdateMemory", {"update_type": "todo"}),
+        ),
+        AIMessage("done"),
+    ]
+    prompts = []
+
+    class Model:
+        async def ainvoke(self, messages):
+            prompts.append(messages)
+            return replies[len(prompts) - 1]
+
+    extractions = []
+
+    async def extract_todos(messages, configurable, store):
+        extractions.append(messages)
+        return "ToDo list updated"
+
+    monkeypatch.setattr(task_maistro, "extract_todos", extract_todos)
+    async with connect(calendar_server) as session:
+        catalog = ToolCatalog(session, ttl=None)
+        await catalog.get()
+        calendar = task_maistro.CalendarTools(catalog)
+        monkeypatch.setattr(calendar, "model", Model())
+
+        router = ToolRouter(default="calendar_tools")
+        router.add_catalog(catalog, "calendar_tools")
+        builder = StateGraph(MessagesState)
+        builder.add_node("task_mAIstro", partial(task_maistro.task_mAIstro, calendar=calendar))
+        builder.add_node(task_maistro.update_todos)
+        builder.add_node(task_maistro.update_instructions)
+        builder.add_node("calendar_tools", calendar.run)
+        builder.add_edge(START, "task_mAIstro")
+        builder.add_conditional_edges(
+            "task_mAIstro",
+            partial(task_maistro.route_message, router=router),
+            ["update_todos", "update_instructions", *router.nodes, END],
+        )
+        for node in ["update_todos", "update_instructions", "calendar_tools"]:
+            builder.add_edge(node, "task_mAIstro")
+        graph = builder.compile(store=InMemoryStore())
+
+        result = await graph.ainvoke({"messages": [HumanMessage("plan my week")]}, {"configurable": {"user_id": "u"}})
+
+    # One step ran both calendar calls and a single extraction, then the assistant answered once
+    assert len(prompts) == 2 and len(extractions) == 1
+    assert sorted(args["day"] for args in calendar_server.calls_of("list_events")) == ["monday", "tuesday"]
+    answers = {message.tool_call_id: message for message in result["messages"] if message.type == "tool"}
+    assert set(answers) == {"0", "1", "2", "3"}
+    assert answers["2"].content == answers["3"].content == "ToDo list updated"
+    assert result["messages"][-1].content == "done"
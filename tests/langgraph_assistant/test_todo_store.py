@@ -0,0 +1,101 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.store.memory import InMemoryStore
+
+import task_maistro
+import todo_store
+
+pytestmark = pytest.mark.anyio
+
+NAMESPACE = ("todo", "general", "user")
+
+
+class CountingStore(InMemoryStore):
+    """An InMemoryStore counting the searches it answers."""
+
+    def __init__(self):
+        super().__init__()
+        self.searches = []
+
+    async def asearch(self, namespace_prefix, /, **kwargs):
+        self.searches.append(kwargs)
+        return await super().asearch(namespace_prefix, **kwargs)
+
+
+class FakeModel:
+    """Stands in for the bound chat model, records the prompts it is given."""
+
+    def __init__(self):
+        self.prompts = []
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages)
+        return AIMessage("ok")
+
+
+def todo(task, status="not started", deadline=None):
+    return {"task": task, "status": status, "deadline": deadline, "time_to_complete": 10, "solutions": []}
+
+
+async def put(store, todos):
+    await todo_store.aput_todos(store, NAMESPACE, {f"key-{i}": value for i, value in enumerate(todos)})
+
+
+async def test_only_active_todos_are_loaded():
+    store = InMemoryStore()
+    await put(store, [todo("a"), todo("b", "in progress"), todo("c", "done"), todo("d", "archived")])
+    items = await todo_store.aload_todos(store, NAMESPACE)
+    assert sorted(item.value["task"] for item in items) == ["a", "b"]
+
+
+async def test_the_nearest_deadlines_come_first_up_to_the_limit():
+    store = InMemoryStore()
+    await put(
+        store,
+        [
+            todo("later", deadline="2030-01-02T00:00:00"),
+            todo("never"),
+            todo("soon", "in progress", deadline="2030-01-01T00:00:00+00:00"),
+            todo("unreadable", deadline="next week"),
+            todo("sooner", deadline="2029-12-31T00:00:00"),
+        ],
+    )
+    items = await todo_store.aload_todos(store, NAMESPACE, limit=3)
+    assert [item.value["task"] for item in items] == ["sooner", "soon", "later"]
+
+
+async def test_active_todos_are_paged_through_up_to_max_scanned():
+    store = CountingStore()
+    await put(store, [todo(f"task {i}") for i in range(7)] + [todo("started", "in progress")])
+
+    items = await todo_store.aload_todos(store, NAMESPACE, page_size=3)
+    assert len(items) == 8
+    not_started = [search for search in store.searches if search["filter"] == {"status": "not started"}]
+    assert [(search["limit"], search["offset"]) for search in not_started] == [(3, 0), (3, 3), (3, 6)]
+
+    store.searches.clear()
+    items = await todo_store.aload_todos(store, NAMESPACE, page_size=3, max_scanned=5)
+    assert len([item for item in items if item.value["status"] == "not started"]) == 5
+    not_started = [search for search in store.searches if search["filter"] == {"status": "not started"}]
+    assert [(search["limit"], search["offset"]) for search in not_started] == [(3, 0), (2, 3)]
+
+
+async def test_a_batch_of_todos_is_written_at_once():
+    store = InMemoryStore()
+    await todo_store.aput_todos(store, NAMESPACE, {"x": todo("x"), "y": todo("y")})
+    await todo_store.aput_todos(store, NAMESPACE, {})
+    assert {item.key for item in await store.asearch(NAMESPACE)} == {"x", "y"}
+
+
+async def test_the_prompt_holds_at_most_max_todos(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(task_maistro.bound_models, "get", lambda *args: model)
+    store = InMemoryStore()
+    await put(store, [todo(f"task {i}", deadline=f"2030-01-0{i + 1}T00:00:00") for i in range(5)])
+
+    config = {"configurable": {"user_id": "user", "max_todos": 2}}
+    await task_maistro.task_mAIstro({"messages": [HumanMessage("what's next?")]}, config, store)
+
+    system_prompt = model.prompts[0][0].content
+    assert "task 0" in system_prompt and "task 1" in system_prompt
+    assert "task 2" not in system_prompt
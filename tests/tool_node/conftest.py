@@ -0,0 +1,29 @@
+import anyio
+import pytest
+
+from tests.tool_node.fake_server import FakeServer
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def server() -> FakeServer:
+    server = FakeServer()
+
+    @server.tool(schema={"type": "object", "properties": {"text": {"type": "string"}}})
+    async def echo(text: str = "") -> str:
+        return text
+
+    @server.tool(schema={"type": "object", "properties": {"seconds": {"type": "number"}}})
+    async def sleep(seconds: float = 0) -> str:
+        await anyio.sleep(seconds)
+        return f"slept {seconds}"
+
+    @server.tool
+    async def fail() -> str:
+        raise RuntimeError("tool failed")
+
+    return server
@@ -0,0 +1,144 @@
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+import anyio
+import mcp.types as types
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
+from langchain_core.messages import AIMessage
+from mcp import ClientSession
+from mcp.shared.memory import create_client_server_memory_streams
+
+ToolFunction = Callable[..., Awaitable[Any]]
+
+
+class FakeServer:
+    """An in-memory MCP server whose tools are async functions returning text or a CallToolResult.
+
+    mcp 1.3's own server shuts down when it is sent `notifications/cancelled`, so this one speaks just
+    enough JSON-RPC for the tests: initialize, tools/list and tools/call. Like many real servers it
+    ignores cancellations, and still answers cancelled requests when their tool returns.
+    """
+
+    def __init__(self) -> None:
+        self.tools: dict[str, tuple[ToolFunction, dict[str, Any]]] = {}
+        # (request id, tool name, arguments) of every tools/call received
+        self.calls: list[tuple[types.RequestId, str, dict[str, Any]]] = []
+        self.cancelled: list[types.RequestId] = []
+        self.running = 0
+        self.max_running = 0
+        # Seconds `transport` takes to connect, like a slow server process boot
+        self.startup_delay = 0.0
+        # Server ends of the open connections, in connection order
+        self.connections: list[tuple[MemoryObjectReceiveStream, MemoryObjectSendStream]] = []
+
+    def tool(self, function: ToolFunction | None = None, *, name: str | None = None, schema: dict | None = None):
+        """Registers `function` as a tool, as a decorator with or without arguments."""
+
+        def register(function: ToolFunction) -> ToolFunction:
+            self.tools[name or function.__name__] = (function, schema or {"type": "object", "properties": {}})
+            return function
+
+        return register(function) if function is not None else register
+
+    def calls_of(self, name: str) -> list[dict[str, Any]]:
+        return [arguments for _, tool, arguments in self.calls if tool == name]
+
+    async def notify(self, method: str, params: dict[str, Any] | None = None) -> None:
+        """Sends a notification to every connected client."""
+        notification = types.JSONRPCNotification(jsonrpc="2.0", method=method, params=params)
+        for _, write_stream in self.connections:
+            await write_stream.send(types.JSONRPCMessage(notification))
+
+    async def disconnect(self, index: int = 0) -> None:
+        """Closes a connection like an exiting server process would."""
+        read_stream, write_stream = self.connections[index]
+        await write_stream.aclose()
+        await read_stream.aclose()
+
+    @asynccontextmanager
+    async def transport(self, connection: Any = None) -> AsyncIterator[Any]:
+        """A `TransportFactory` connecting each worker of a PooledSession to this server."""
+        await anyio.sleep(self.startup_delay)
+        async with create_client_server_memory_streams() as (client_streams, server_streams):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(self.serve, *server_streams)
+                yield client_streams
+                tg.cancel_scope.cancel()
+
+    async def serve(
+        self,
+        read_stream: MemoryObjectReceiveStream[types.JSONRPCMessage | Exception],
+        write_stream: MemoryObjectSendStream[types.JSONRPCMessage],
+    ) -> None:
+        self.connections.append((read_stream, write_stream))
+        async with anyio.create_task_group() as tg:
+            try:
+                async for message in read_stream:
+                    if isinstance(message, Exception):
+                        continue
+                    if isinstance(message.root, types.JSONRPCRequest):
+                        tg.start_soon(self._answer, message.root, write_stream)
+                    elif isinstance(message.root, types.JSONRPCNotification) and message.root.method == "notifications/cancelled":
+                        self.cancelled.append((message.root.params or {})["requestId"])
+            except anyio.ClosedResourceError:
+                pass
+            tg.cancel_scope.cancel()
+
+    async def _answer(self, request: types.JSONRPCRequest, write_stream: MemoryObjectSendStream) -> None:
+        params = request.params or {}
+        result: types.Result
+        if request.method == "initialize":
+            result = types.InitializeResult(
+                protocolVersion=types.LATEST_PROTOCOL_VERSION,
+                capabilities=types.ServerCapabilities(tools=types.ToolsCapability(listChanged=True)),
+                serverInfo=types.Implementation(name="fake", version="0"),
+            )
+        elif request.method == "tools/list":
+            result = types.ListToolsResult(
+                tools=[types.Tool(name=name, inputSchema=schema) for name, (_, schema) in self.tools.items()]
+            )
+        elif request.method == "tools/call":
+            result = await self._call(request.id, params["name"], params.get("arguments") or {})
+        else:
+            result = types.EmptyResult()
+        response = types.JSONRPCResponse(
+            jsonrpc="2.0", id=request.id, result=result.model_dump(by_alias=True, mode="json", exclude_none=True)
+        )
+        try:
+            await write_stream.send(types.JSONRPCMessage(response))
+        except (anyio.BrokenResourceError, anyio.ClosedResourceError):
+            pass
+
+    async def _call(self, request_id: types.RequestId, name: str, arguments: dict[str, Any]) -> types.CallToolResult:
+        self.calls.append((request_id, name, arguments))
+        if name not in self.tools:
+            return types.CallToolResult(content=[types.TextContent(type="text", text=f"Unknown tool {name}")], isError=True)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            result = await self.tools[name][0](**arguments)
+        except Exception as e:
+            return types.CallToolResult(content=[types.TextContent(type="text", text=str(e))], isError=True)
+        finally:
+            self.running -= 1
+        if isinstance(result, types.CallToolResult):
+            return result
+        return types.CallToolResult(content=[types.TextContent(type="text", text=str(result))])
+
+
+@asynccontextmanager
+async def connect(server: FakeServer) -> AsyncIterator[ClientSession]:
+    """An initialized ClientSession talking to `server` over in-memory streams."""
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(server.serve, *server_streams)
+            async with ClientSession(*client_streams) as session:
+                await session.initialize()
+                yield session
+            tg.cancel_scope.cancel()
+
+
+def tool_calls(*calls: tuple[str, dict[str, Any]]) -> list[AIMessage]:
+    """A tool node's list input: one AIMessage calling each (name, args), with ids "0", "1", ..."""
+    return [AIMessage("", tool_calls=[{"name": name, "args": args, "id": str(i)} for i, (name, args) in enumerate(calls)])]
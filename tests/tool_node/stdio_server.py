@@ -0,0 +1,14 @@
+"""A FastMCP server over stdio for the transport tests: python stdio_server.py"""
+
+from mcp.server.fastmcp import FastMCP
+
+server = FastMCP("stdio-test")
+
+
+@server.tool()
+async def echo(text: str) -> str:
+    return text
+
+
+if __name__ == "__main__":
+    server.run()
@@ -0,0 +1,47 @@
+from mcp.types import CallToolResult, TextContent
+
+from src.tool_node.cache import ToolResultCache
+
+
+def result(text: str) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=text)])
+
+
+def cache_with(**options) -> ToolResultCache:
+    cache = ToolResultCache({"list_events": 30, "list_calendars": 30}, **options)
+    for tool in ("list_events", "list_calendars"):
+        key = cache.key(tool, {})
+        cache.put(key, tool, result(tool))
+    return cache
+
+
+def test_unlisted_write_drops_every_result():
+    cache = cache_with()
+    cache.invalidate_after("create_event")
+    assert len(cache) == 0
+
+
+def test_listed_write_drops_only_its_tools():
+    cache = cache_with(invalidates={"create_event": ["list_events"], "get_time": []})
+    cache.invalidate_after("get_time")
+    assert len(cache) == 2
+    cache.invalidate_after("create_event")
+    assert cache.get(cache.key("list_events", {})) is None
+    assert cache.get(cache.key("list_calendars", {})) is not None
+
+
+def test_cacheable_calls_dont_invalidate():
+    cache = cache_with()
+    cache.invalidate_after("list_events")
+    assert len(cache) == 2
+
+
+def test_result_fetched_before_an_invalidation_is_not_stored():
+    cache = ToolResultCache({"list_events": 30})
+    key = cache.key("list_events", {})
+    generation = cache.generation
+    cache.invalidate_after("delete_event")
+    cache.put(key, "list_events", result("stale"), generation)
+    assert cache.get(key) is None
+    cache.put(key, "list_events", result("fresh"), cache.generation)
+    assert cache.get(key) is not None
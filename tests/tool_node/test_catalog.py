@@ -0,0 +1,83 @@
+import anyio
+import pytest
+
+from src.tool_node.catalog import ToolCatalog
+from src.tool_node.mcp_tool_node import McpToolNode
+from src.tool_node.session_pool import PooledSession
+from tests.tool_node.fake_server import connect, tool_calls
+
+pytestmark = pytest.mark.anyio
+
+
+def pool(server, size=1) -> PooledSession:
+    return PooledSession("fake", {}, size=size, health_check_interval=None, transport_factory=server.transport)
+
+
+async def test_known_list_is_served_while_the_server_starts(server, tmp_path):
+    snapshot = tmp_path / "fake.json"
+    async with connect(server) as session:
+        await ToolCatalog(session, snapshot_path=snapshot).get()
+
+    server.startup_delay = 0.5
+    session = pool(server).start_soon()
+    try:
+        with anyio.fail_after(0.2):
+            catalog = ToolCatalog(session, snapshot_path=snapshot)
+            node = await McpToolNode(session, catalog=catalog).init_funcs()
+        assert set(node.tools_by_name) == {"echo", "sleep", "fail"}
+        assert session.workers == []
+
+        # The first call waits for the server
+        [message] = await node.ainvoke(tool_calls(("echo", {"text": "started"})))
+        assert message.status == "success"
+    finally:
+        await session.aclose()
+
+
+async def test_listeners_see_a_changed_list(server, tmp_path):
+    async with connect(server) as session:
+        catalog = ToolCatalog(session, ttl=None)
+        await catalog.get()
+        changes = []
+        catalog.on_change(lambda c: changes.append([tool["name"] for tool in c.cached()]))
+
+        @server.tool
+        async def added() -> str:
+            return "added"
+
+        await catalog.refresh()
+        await catalog.refresh()
+        assert changes == [["echo", "sleep", "fail", "added"]]
+
+
+async def test_list_changed_notification_refreshes_the_list(server):
+    async with connect(server) as session:
+        catalog = ToolCatalog(session, ttl=None)
+        await catalog.get()
+        server.tools.pop("fail")
+        await server.notify("notifications/tools/list_changed")
+        with anyio.fail_after(1):
+            while "fail" in [tool["name"] for tool in catalog.cached()]:
+                await anyio.sleep(0.01)
+        assert len(server.calls) == 0
+
+
+async def test_failed_startup_is_retried_by_the_next_call(server):
+    server.startup_delay = 0.1
+    broken = True
+    transport = server.transport
+
+    def flaky_transport(connection):
+        if broken:
+            raise OSError("command not found")
+        return transport(connection)
+
+    session = PooledSession("fake", {}, size=1, health_check_interval=None, transport_factory=flaky_transport).start_soon()
+    try:
+        with pytest.raises(OSError):
+            await session.call_tool("echo", {"text": "a"})
+        broken = False
+        result = await session.call_tool("echo", {"text": "b"})
+        assert result.content[0].text == "b"
+    finally:
+        await session.aclose()
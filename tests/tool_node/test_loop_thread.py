@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.tool_node.loop_thread import EventLoopThread
+from src.tool_node.mcp_tool_node import McpToolNode
+from src.tool_node.session_pool import PooledSession
+from tests.tool_node.fake_server import tool_calls
+
+
+@pytest.fixture
+def loop_thread():
+    thread = EventLoopThread(name="test-loop").start()
+    yield thread
+    thread.stop()
+
+
+@pytest.fixture
+def node(server, loop_thread):
+    session = PooledSession("fake", {}, size=2, health_check_interval=None, transport_factory=server.transport)
+    loop_thread.run(session.start)
+    node = McpToolNode(session, loop_thread=loop_thread)
+    loop_thread.run(node.init_funcs)
+    yield node
+    loop_thread.run(session.aclose)
+
+
+def test_sync_invoke_from_many_threads_runs_on_the_sessions_loop(server, node):
+    def invoke(i):
+        [message] = node.invoke(tool_calls(("echo", {"text": f"thread {i}"})))
+        return message
+
+    with ThreadPoolExecutor(8) as pool:
+        messages = list(pool.map(invoke, range(32)))
+
+    assert [message.status for message in messages] == ["success"] * 32
+    assert all(f"thread {i}" in message.content for i, message in enumerate(messages))
+    assert len(server.calls_of("echo")) == 32
+
+
+def test_submissions_queued_together_share_a_wake_up(loop_thread):
+    # Hold the loop so the submissions pile up, as when many threads call at once
+    busy = threading.Event()
+    loop_thread.loop.call_soon_threadsafe(busy.wait)
+    batches = loop_thread.batches
+    futures = [loop_thread.submit(lambda i=i: asyncio.sleep(0, i)) for i in range(20)]
+    busy.set()
+
+    assert [future.result(5) for future in futures] == list(range(20))
+    assert loop_thread.batches - batches == 1
+
+
+def test_timed_out_run_cancels_its_coroutine(loop_thread):
+    cancelled = threading.Event()
+
+    async def forever():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        loop_thread.run(forever, timeout=0.05)
+    assert cancelled.wait(1)
+
+
+def test_errors_reach_the_calling_thread(loop_thread):
+    async def fail():
+        raise ValueError("from the loop")
+
+    with pytest.raises(ValueError, match="from the loop"):
+        loop_thread.run(fail())
+
+
+def test_run_from_the_loop_thread_is_refused(loop_thread):
+    async def nested():
+        return loop_thread.run(lambda: asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError, match="its own loop"):
+        loop_thread.run(nested)
+
+
+def test_sync_invoke_without_a_loop_thread_says_how_to_fix_it(server):
+    node = McpToolNode(PooledSession("fake", {}, transport_factory=server.transport))
+    with pytest.raises(NotImplementedError, match="loop_thread"):
+        node.invoke(tool_calls(("echo", {})))
+
+
+def test_a_slow_call_does_not_block_other_threads(node):
+    def invoke(name, args):
+        started = time.monotonic()
+        node.invoke(tool_calls((name, args)))
+        return time.monotonic() - started
+
+    with ThreadPoolExecutor(2) as pool:
+        slow = pool.submit(invoke, "sleep", {"seconds": 0.3})
+        time.sleep(0.05)
+        fast = pool.submit(invoke, "echo", {"text": "x"})
+        assert fast.result() < 0.2
+        assert slow.result() >= 0.3
@@ -0,0 +1,75 @@
+import time
+from datetime import datetime, timezone
+
+import anyio
+import pytest
+
+from src.tool_node.mcp_tool_node import McpToolNode
+from tests.tool_node.fake_server import connect, tool_calls
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_session_keeps_working_after_a_timed_out_call(server):
+    async with connect(server) as session:
+        node = await McpToolNode(session, timeout=0.1).init_funcs()
+        [timed_out] = await node.ainvoke(tool_calls(("sleep", {"seconds": 0.3})))
+        assert timed_out.response_metadata["error"] == "ToolCallTimeoutError"
+        # Let the server answer the cancelled call
+        await anyio.sleep(0.4)
+        assert server.cancelled == [server.calls[0][0]]
+
+        [message] = await node.ainvoke(tool_calls(("echo", {"text": "hi"})))
+        assert message.status == "success"
+        assert "hi" in message.content
+
+
+async def test_tool_timeouts_only_bound_their_own_tool(server):
+    async with connect(server) as session:
+        node = await McpToolNode(session, timeout=1, tool_timeouts={"sleep": 0.05}).init_funcs()
+        slow, echoed = await node.ainvoke(tool_calls(("sleep", {"seconds": 0.3}), ("echo", {"text": "hi"})))
+    assert slow.response_metadata["error"] == "ToolCallTimeoutError"
+    assert echoed.status == "success"
+
+
+async def test_batch_timeout_bounds_the_whole_run(server):
+    async with connect(server) as session:
+        node = await McpToolNode(session, batch_timeout=0.15).init_funcs()
+        started = time.monotonic()
+        quick, slow = await node.ainvoke(tool_calls(("sleep", {"seconds": 0.05}), ("sleep", {"seconds": 1})))
+        elapsed = time.monotonic() - started
+    assert quick.status == "success"
+    assert slow.response_metadata["error"] == "ToolCallTimeoutError"
+    assert 0.15 <= elapsed < 0.5
+
+
+@pytest.mark.parametrize("in_seconds", [True, False], ids=["epoch", "datetime"])
+async def test_run_deadline_caps_every_call(server, in_seconds):
+    deadline = time.time() + 0.1
+    config = {"configurable": {"deadline": deadline if in_seconds else datetime.fromtimestamp(deadline, timezone.utc)}}
+    async with connect(server) as session:
+        node = await McpToolNode(session, timeout=5).init_funcs()
+        [message] = await node.ainvoke(tool_calls(("sleep", {"seconds": 1})), config)
+    assert message.response_metadata["error"] == "ToolCallTimeoutError"
+
+
+async def test_a_passed_deadline_fails_calls_without_waiting(server):
+    config = {"configurable": {"deadline": time.time() - 1}}
+    async with connect(server) as session:
+        node = await McpToolNode(session).init_funcs()
+        with anyio.fail_after(0.5):
+            [message] = await node.ainvoke(tool_calls(("sleep", {"seconds": 1})), config)
+    assert message.response_metadata["error"] == "ToolCallTimeoutError"
+
+
+async def test_cancelling_the_run_cancels_its_calls_on_the_server(server):
+    async with connect(server) as session:
+        node = await McpToolNode(session).init_funcs()
+        with anyio.move_on_after(0.1):
+            await node.ainvoke(tool_calls(("sleep", {"seconds": 0.3}), ("sleep", {"seconds": 0.4})))
+        await anyio.sleep(0.4)
+        assert sorted(server.cancelled) == sorted(request_id for request_id, _, _ in server.calls)
+        assert node.scheduler.in_flight == 0
+
+        [message] = await node.ainvoke(tool_calls(("echo", {"text": "still here"})))
+    assert "still here" in message.content
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+from langgraph.constants import CONF, CONFIG_KEY_STREAM_WRITER
+
+from src.tool_node.instrumentation import Instrumentation
+from src.tool_node.multi_server import MultiServerMcpToolNode
+from tests.tool_node.fake_server import FakeServer, connect, tool_calls
+
+pytestmark = pytest.mark.anyio
+
+
+class Recorder(Instrumentation):
+    def __init__(self):
+        self.records = []
+
+    def record_call(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def other_server() -> FakeServer:
+    other = FakeServer()
+
+    @other.tool
+    async def echo(text: str = "") -> str:
+        return f"other {text}"
+
+    @other.tool
+    async def search(query: str = "") -> str:
+        return f"found {query}"
+
+    return other
+
+
+async def test_colliding_tools_are_namespaced_and_called_by_their_own_name(server, other_server):
+    async with connect(server) as session, connect(other_server) as other_session:
+        node = await MultiServerMcpToolNode(SimpleNamespace(sessions={"a": session, "b": other_session})).init_funcs()
+        assert {tool["name"] for tool in node.tools} == {"a__echo", "b__echo", "sleep", "fail", "search"}
+
+        messages = await node.ainvoke(tool_calls(("b__echo", {"text": "x"}), ("search", {"query": "y"}), ("a__echo", {"text": "z"})))
+        assert [message.name for message in messages] == ["b__echo", "search", "a__echo"]
+        assert "other x" in messages[0].content and "found y" in messages[1].content
+        assert server.calls_of("echo") == [{"text": "z"}]
+        assert other_server.calls_of("echo") == [{"text": "x"}]
+
+
+async def test_unknown_tools_are_answered_like_the_server_nodes_answer_them(server, other_server):
+    streamed, recorder = [], Recorder()
+    async with connect(server) as session, connect(other_server) as other_session:
+        node = await MultiServerMcpToolNode(
+            SimpleNamespace(sessions={"a": session, "b": other_session}), stream_results=True, instrumentation=recorder
+        ).init_funcs()
+        config = {CONF: {CONFIG_KEY_STREAM_WRITER: streamed.append}}
+        unknown, known = await node.ainvoke(tool_calls(("missing", {}), ("search", {"query": "q"})), config)
+
+    assert unknown.status == "error"
+    assert unknown.response_metadata["error"] == "UnknownToolError"
+    assert {event["message"].tool_call_id for event in streamed if event["type"] == "tool_result"} == {"0", "1"}
+    [record] = [record for record in recorder.records if record.tool_name == "missing"]
+    assert (record.server, record.status, record.error) == ("tools", "error", "UnknownToolError")
+    assert known.status == "success"
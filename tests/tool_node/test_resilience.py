@@ -0,0 +1,136 @@
+import time
+
+import anyio
+import pytest
+
+from src.tool_node import rpc
+from src.tool_node.mcp_tool_node import McpToolNode
+from src.tool_node.resilience import CircuitBreaker, RetryPolicy
+from tests.tool_node.fake_server import connect, tool_calls
+
+pytestmark = pytest.mark.anyio
+
+FAST_RETRY = RetryPolicy(max_attempts=3, initial_backoff=0.01, jitter=0)
+
+
+class Unplugged:
+    """A session-like wrapper whose calls fail with a connection error while `down`."""
+
+    def __init__(self, session, down=0):
+        self.session = session
+        # Number of upcoming calls to fail
+        self.down = down
+
+    async def call_tool(self, name, arguments=None, *, progress_token=None):
+        if self.down:
+            self.down -= 1
+            raise ConnectionError("server gone")
+        return await rpc.call_tool(self.session, name, arguments, progress_token=progress_token)
+
+    def __getattr__(self, name):
+        return getattr(self.session, name)
+
+
+@pytest.fixture
+def flaky(server):
+    failures = {"left": 2}
+
+    @server.tool
+    async def flaky() -> str:
+        if failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("503 Service temporarily unavailable")
+        return "ok"
+
+    return failures
+
+
+async def test_transient_error_results_are_retried(server, flaky):
+    async with connect(server) as session:
+        node = await McpToolNode(session, retry_policy=FAST_RETRY).init_funcs()
+        [message] = await node.ainvoke(tool_calls(("flaky", {})))
+    assert message.status == "success"
+    assert message.response_metadata["attempts"] == 3
+    assert len(server.calls_of("flaky")) == 3
+
+
+async def test_other_errors_and_other_tools_are_not_retried(server, flaky):
+    async with connect(server) as session:
+        node = await McpToolNode(session, tool_retry_policies={"flaky": FAST_RETRY}).init_funcs()
+        [failed] = await node.ainvoke(tool_calls(("fail", {})))
+        [flaky_message] = await node.ainvoke(tool_calls(("flaky", {})))
+    assert failed.status == "error" and "attempts" not in failed.response_metadata
+    assert len(server.calls_of("fail")) == 1
+    assert flaky_message.status == "success"
+
+
+async def test_attempts_give_up_when_exhausted_or_out_of_time(server, flaky):
+    async with connect(server) as session:
+        node = await McpToolNode(session, retry_policy=RetryPolicy(max_attempts=2, initial_backoff=0.01, jitter=0)).init_funcs()
+        [exhausted] = await node.ainvoke(tool_calls(("flaky", {})))
+        assert exhausted.status == "error" and exhausted.response_metadata["attempts"] == 2
+
+        flaky["left"] = 1
+        slow_retry = RetryPolicy(initial_backoff=1, jitter=0)
+        node = await McpToolNode(session, retry_policy=slow_retry, timeout=0.2).init_funcs()
+        started = time.monotonic()
+        [out_of_time] = await node.ainvoke(tool_calls(("flaky", {})))
+    # The retry would start after the call's deadline, so the first error is returned right away
+    assert out_of_time.status == "error" and time.monotonic() - started < 0.2
+    assert "503" in out_of_time.content
+
+
+async def test_connection_errors_are_retried(server):
+    async with connect(server) as session:
+        node = await McpToolNode(Unplugged(session, down=1), retry_policy=FAST_RETRY).init_funcs()
+        [message] = await node.ainvoke(tool_calls(("echo", {"text": "back"})))
+    assert message.status == "success" and message.response_metadata["attempts"] == 2
+    assert server.calls_of("echo") == [{"text": "back"}]
+
+
+async def test_breaker_opens_rejects_then_recovers_through_a_probe(server):
+    breaker = CircuitBreaker("fake", failure_threshold=2, recovery_timeout=0.1)
+    changes = []
+    breaker.on_transition(lambda _, before, after: changes.append((before, after)))
+    async with connect(server) as session:
+        unplugged = Unplugged(session, down=2)
+        node = await McpToolNode(unplugged, circuit_breaker=breaker).init_funcs()
+        for _ in range(2):
+            [message] = await node.ainvoke(tool_calls(("echo", {"text": "a"})))
+            assert message.response_metadata["error"] == "ConnectionError"
+        assert breaker.state == "open"
+
+        [rejected] = await node.ainvoke(tool_calls(("echo", {"text": "b"})))
+        assert rejected.response_metadata["error"] == "CircuitOpenError"
+        assert breaker.rejected == 1 and server.calls == []
+
+        await anyio.sleep(0.12)
+        [probe] = await node.ainvoke(tool_calls(("echo", {"text": "c"})))
+    assert probe.status == "success"
+    assert changes == [("closed", "open"), ("open", "half_open"), ("half_open", "closed")]
+    assert breaker.stats()["transitions"] == {"closed->open": 1, "open->half_open": 1, "half_open->closed": 1}
+
+
+async def test_a_failed_probe_reopens_the_breaker(server):
+    breaker = CircuitBreaker("fake", failure_threshold=1, recovery_timeout=0.05)
+    async with connect(server) as session:
+        node = await McpToolNode(Unplugged(session, down=2), circuit_breaker=breaker).init_funcs()
+        await node.ainvoke(tool_calls(("echo", {})))
+        await anyio.sleep(0.06)
+        [probe] = await node.ainvoke(tool_calls(("echo", {})))
+    assert probe.response_metadata["error"] == "ConnectionError"
+    assert breaker.state == "open"
+    assert breaker.transitions[("half_open", "open")] == 1
+
+
+async def test_tool_errors_and_timeouts_count_differently(server):
+    breaker = CircuitBreaker("fake", failure_threshold=2)
+    async with connect(server) as session:
+        node = await McpToolNode(session, circuit_breaker=breaker, timeout=0.05).init_funcs()
+        # The server answered, it is alive
+        await node.ainvoke(tool_calls(("fail", {}), ("fail", {})))
+        assert (breaker.state, breaker.failures) == ("closed", 0)
+
+        # The server took the calls and never answered
+        await node.ainvoke(tool_calls(("sleep", {"seconds": 1}), ("sleep", {"seconds": 1})))
+    assert breaker.state == "open"
@@ -0,0 +1,46 @@
+import asyncio
+
+import anyio
+import pytest
+
+from src.tool_node.rpc import call_tool
+from tests.tool_node.fake_server import connect
+
+pytestmark = pytest.mark.anyio
+
+INTERNALS_CHANGED = "mcp's BaseSession internals changed, update rpc._allocated_request_id and rpc._drop_response_stream"
+
+
+async def test_a_cancelled_call_is_cancelled_on_the_server(server):
+    async with connect(server) as session:
+        task = asyncio.create_task(call_tool(session, "sleep", {"seconds": 0.2}))
+        await anyio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        [(request_id, _, _)] = server.calls
+        assert server.cancelled == [request_id], INTERNALS_CHANGED
+        assert request_id not in session._response_streams, INTERNALS_CHANGED
+
+        # The late response is drained, the session keeps answering
+        await anyio.sleep(0.3)
+        with anyio.fail_after(1):
+            result = await call_tool(session, "echo", {"text": "after"})
+        assert result.content[0].text == "after"
+
+
+async def test_concurrent_senders_cancel_only_their_own_requests(server):
+    async with connect(server) as session:
+        tasks = [asyncio.create_task(call_tool(session, "sleep", {"seconds": 0.1 + i / 1000})) for i in range(20)]
+        await anyio.sleep(0.05)
+        for task in tasks[::2]:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        ids_by_seconds = {arguments["seconds"]: request_id for request_id, _, arguments in server.calls}
+        assert sorted(server.cancelled) == sorted(ids_by_seconds[0.1 + i / 1000] for i in range(0, 20, 2))
+        for i, result in enumerate(results):
+            if i % 2:
+                assert result.content[0].text == f"slept {0.1 + i / 1000}"
+            else:
+                assert isinstance(result, asyncio.CancelledError)
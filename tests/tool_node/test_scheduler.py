@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import anyio
+import pytest
+
+from src.tool_node.mcp_tool_node import McpToolNode
+from src.tool_node.scheduler import ToolCallScheduler, ToolLimit
+from tests.tool_node.fake_server import connect, tool_calls
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_queued_calls_are_admitted_round_robin_across_tools():
+    scheduler = ToolCallScheduler(1)
+    admitted = []
+
+    async def call(tool_name):
+        async with scheduler.slot(tool_name):
+            admitted.append(tool_name)
+
+    async with anyio.create_task_group() as tg:
+        async with scheduler.slot("hold"):
+            for tool_name in ["a", "a", "a", "b", "b", "c"]:
+                tg.start_soon(call, tool_name)
+            await anyio.sleep(0.01)
+            assert scheduler.queue_depth == 6
+
+    assert admitted == ["a", "b", "c", "a", "b", "a"]
+    assert (scheduler.in_flight, scheduler.queue_depth) == (0, 0)
+
+
+async def test_per_tool_concurrency_does_not_hold_back_other_tools(server):
+    scheduler = ToolCallScheduler(4, tool_limits={"sleep": ToolLimit(max_concurrency=1)})
+    async with connect(server) as session:
+        node = await McpToolNode(session, scheduler=scheduler).init_funcs()
+        with anyio.fail_after(0.5):
+            messages = await node.ainvoke(
+                tool_calls(("sleep", {"seconds": 0.1}), ("sleep", {"seconds": 0.1}), ("echo", {"text": "fast"}))
+            )
+    assert [message.status for message in messages] == ["success"] * 3
+    # Never two sleeps at once, but the echo ran beside one
+    assert server.max_running == 2
+    sleeps = [message.response_metadata["timing"] for message in messages[:2]]
+    assert max(timing["queue_wait"] for timing in sleeps) >= 0.09
+    assert messages[2].response_metadata["timing"]["queue_wait"] < 0.05
+
+
+async def test_rate_limit_spaces_out_calls_after_the_burst():
+    scheduler = ToolCallScheduler(8, tool_limits={"search": ToolLimit(rate=20, burst=2)})
+    started = []
+
+    async def call():
+        async with scheduler.slot("search"):
+            started.append(time.monotonic())
+
+    begin = time.monotonic()
+    async with anyio.create_task_group() as tg:
+        for _ in range(4):
+            tg.start_soon(call)
+
+    offsets = [t - begin for t in started]
+    # Two calls from the burst at once, then one per 50ms
+    assert offsets[1] < 0.02
+    assert offsets[2] >= 0.04 and offsets[3] >= 0.09
+
+
+async def test_cancelled_calls_release_their_slot_and_queue_entry():
+    scheduler = ToolCallScheduler(1)
+    holding = anyio.Event()
+
+    async def hold():
+        async with scheduler.slot("a"):
+            holding.set()
+            await anyio.sleep_forever()
+
+    async def queued():
+        async with scheduler.slot("b"):
+            pytest.fail("admitted after being cancelled")
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(hold)
+        await holding.wait()
+        async with anyio.create_task_group() as waiting:
+            waiting.start_soon(queued)
+            await anyio.sleep(0.01)
+            assert scheduler.queue_depth == 1
+            waiting.cancel_scope.cancel()
+        assert scheduler.queue_depth == 0
+        tg.cancel_scope.cancel()
+
+    assert scheduler.in_flight == 0
+    with anyio.fail_after(0.1):
+        async with scheduler.slot("c"):
+            assert scheduler.in_flight == 1
+
+
+async def test_timed_out_calls_free_their_slot(server):
+    async with connect(server) as session:
+        node = await McpToolNode(session, scheduler=ToolCallScheduler(1), tool_timeouts={"sleep": 0.05}).init_funcs()
+        with anyio.fail_after(0.5):
+            timed_out, echoed = await node.ainvoke(tool_calls(("sleep", {"seconds": 1}), ("echo", {"text": "next"})))
+    assert timed_out.response_metadata["error"] == "ToolCallTimeoutError"
+    assert echoed.status == "success"
+    assert node.scheduler.in_flight == 0
+
+
+def test_scheduler_belongs_to_the_loop_it_first_ran_on():
+    scheduler = ToolCallScheduler(1)
+
+    async def call():
+        async with scheduler.slot("a"):
+            pass
+
+    first, second = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        first.run_until_complete(call())
+        with pytest.raises(RuntimeError, match="another event loop"):
+            second.run_until_complete(call())
+    finally:
+        first.close()
+        second.close()
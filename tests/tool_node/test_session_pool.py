@@ -0,0 +1,86 @@
+import asyncio
+
+import anyio
+import pytest
+
+from src.tool_node.session_pool import PooledSession, WorkerClosedError
+
+pytestmark = pytest.mark.anyio
+
+
+def pool(server, size=2) -> PooledSession:
+    return PooledSession("fake", {}, size=size, health_check_interval=None, transport_factory=server.transport)
+
+
+async def test_requests_go_to_the_worker_with_the_fewest_outstanding(server):
+    session = await pool(server, size=3).start()
+    try:
+        calls = [asyncio.ensure_future(session.call_tool("sleep", {"seconds": 0.1})) for _ in range(6)]
+        await anyio.sleep(0.02)
+        assert [worker.outstanding for worker in session.workers] == [2, 2, 2]
+        assert server.max_running == 6
+
+        await asyncio.gather(*calls)
+        assert session.stats()["outstanding"] == 0
+        # Once the others are free, a busy worker is skipped
+        busy = asyncio.ensure_future(session.call_tool("sleep", {"seconds": 0.1}))
+        await anyio.sleep(0.02)
+        [busy_worker] = [worker for worker in session.workers if worker.outstanding]
+        await session.call_tool("echo", {"text": "x"})
+        assert busy_worker.outstanding == 1
+        await busy
+    finally:
+        await session.aclose()
+
+
+async def test_an_exited_worker_fails_its_requests_and_is_respawned(server):
+    session = await pool(server).start()
+    try:
+        calls = [asyncio.ensure_future(session.call_tool("sleep", {"seconds": 0.1})) for _ in range(2)]
+        await anyio.sleep(0.02)
+        await server.disconnect(0)
+        results = await asyncio.gather(*calls, return_exceptions=True)
+        assert sorted(type(result).__name__ for result in results) == ["CallToolResult", "WorkerClosedError"]
+
+        with anyio.fail_after(1):
+            while session.respawns < 1 or session.stats()["healthy"] < 2:
+                await anyio.sleep(0.01)
+        assert len(server.connections) == 3
+        results = await asyncio.gather(*(session.call_tool("echo", {"text": str(i)}) for i in range(4)))
+        assert [result.content[0].text for result in results] == ["0", "1", "2", "3"]
+    finally:
+        await session.aclose()
+
+
+async def test_a_request_right_after_the_only_worker_exits_gets_a_new_one(server):
+    session = await pool(server, size=1).start()
+    try:
+        [worker] = session.workers
+        await server.disconnect(0)
+        with anyio.fail_after(1):
+            while worker.healthy:
+                await anyio.sleep(0.01)
+
+        result = await session.call_tool("echo", {"text": "back"})
+        assert result.content[0].text == "back"
+        assert session.respawns == 1 and session.workers != [worker]
+    finally:
+        await session.aclose()
+
+
+async def test_health_check_tops_the_pool_back_up(server):
+    session = await pool(server).start()
+    try:
+        await session.workers.pop().aclose()
+        await session.check_health()
+        assert session.stats()["workers"] == 2 and session.stats()["healthy"] == 2
+    finally:
+        await session.aclose()
+
+
+async def test_requests_on_a_closed_pool_worker_fail_fast(server):
+    session = await pool(server, size=1).start()
+    [worker] = session.workers
+    await session.aclose()
+    with pytest.raises(WorkerClosedError):
+        await worker.request(lambda s: s.send_ping())
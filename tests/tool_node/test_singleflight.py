@@ -0,0 +1,94 @@
+import asyncio
+
+import anyio
+import pytest
+
+from src.tool_node.mcp_tool_node import McpToolNode
+from src.tool_node.singleflight import SingleFlight
+from tests.tool_node.fake_server import connect, tool_calls
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_identical_concurrent_calls_reach_the_server_once(server):
+    async with connect(server) as session:
+        node = await McpToolNode(session, single_flight=SingleFlight()).init_funcs()
+        messages = await node.ainvoke(
+            tool_calls(("sleep", {"seconds": 0.05}), ("sleep", {"seconds": 0.05}), ("sleep", {"seconds": 0.01}))
+        )
+    assert [message.status for message in messages] == ["success"] * 3
+    assert server.calls_of("sleep") == [{"seconds": 0.05}, {"seconds": 0.01}]
+    assert [message.response_metadata.get("coalesced", False) for message in messages] == [False, True, False]
+    assert node.single_flight.coalesced == 1
+    assert node.single_flight.in_flight == 0
+
+
+async def test_only_listed_tools_are_coalesced(server):
+    async with connect(server) as session:
+        node = await McpToolNode(session, single_flight=SingleFlight(tools=["sleep"])).init_funcs()
+        await node.ainvoke(tool_calls(("echo", {"text": "write"}), ("echo", {"text": "write"})))
+    assert server.calls_of("echo") == [{"text": "write"}, {"text": "write"}]
+
+
+async def test_an_error_reaches_every_waiter():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fail():
+        nonlocal calls
+        calls += 1
+        await anyio.sleep(0.01)
+        raise ConnectionError("server gone")
+
+    results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+    assert calls == 1
+    assert [type(result) for result in results] == [ConnectionError, ConnectionError]
+    # The failed flight is forgotten, the next caller tries again
+    with pytest.raises(ConnectionError):
+        await flight.do("k", fail)
+    assert calls == 2
+
+
+async def test_a_cancelled_waiter_leaves_the_call_running_for_the_others():
+    flight = SingleFlight()
+    release = anyio.Event()
+
+    async def slow():
+        await release.wait()
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", slow))
+    second = asyncio.ensure_future(flight.do("k", slow))
+    await anyio.sleep(0)
+    first.cancel()
+    await anyio.sleep(0)
+    release.set()
+
+    assert await second == ("done", True)
+    assert first.cancelled()
+
+
+async def test_the_call_is_cancelled_once_every_waiter_is():
+    flight = SingleFlight()
+    cancelled = anyio.Event()
+
+    async def slow():
+        try:
+            await anyio.sleep_forever()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiters = [asyncio.ensure_future(flight.do("k", slow)) for _ in range(2)]
+    await anyio.sleep(0)
+    waiters[0].cancel()
+    await anyio.sleep(0.01)
+    assert not cancelled.is_set()
+
+    waiters[1].cancel()
+    with anyio.fail_after(1):
+        await cancelled.wait()
+    await asyncio.gather(*waiters, return_exceptions=True)
+    # The flight is forgotten once the cancelled call has unwound
+    await anyio.sleep(0.01)
+    assert flight.in_flight == 0
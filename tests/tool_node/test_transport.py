@@ -0,0 +1,91 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import anyio
+import pytest
+from mcp import ClientSession, StdioServerParameters
+
+from src.tool_node import transport
+from src.tool_node.rpc import call_tool
+from src.tool_node.transport import batched_stdio_client
+
+pytestmark = pytest.mark.anyio
+
+# Without a working parser initialize never completes, fail instead of hanging
+TIME_LIMIT = 20
+
+SERVER = StdioServerParameters(command=sys.executable, args=[str(Path(__file__).with_name("stdio_server.py"))])
+
+
+@pytest.fixture(params=["orjson", "pydantic"])
+def parser(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(transport, "orjson", None)
+    return request.param
+
+
+@pytest.mark.parametrize("window", [0.0, 0.01])
+async def test_concurrent_calls_get_their_own_responses(parser, window):
+    with anyio.fail_after(TIME_LIMIT):
+        async with batched_stdio_client(SERVER, window=window) as streams, ClientSession(*streams) as session:
+            await session.initialize()
+            results = await asyncio.gather(*(call_tool(session, "echo", {"text": f"call {i}"}) for i in range(50)))
+    assert [result.content[0].text for result in results] == [f"call {i}" for i in range(50)]
+
+
+async def test_messages_larger_than_a_read_are_reassembled(parser):
+    text = "x" * 300_000 + "é"
+    with anyio.fail_after(TIME_LIMIT):
+        async with batched_stdio_client(SERVER, max_batch_bytes=1024) as streams, ClientSession(*streams) as session:
+            await session.initialize()
+            small, large = await asyncio.gather(
+                call_tool(session, "echo", {"text": "a"}), call_tool(session, "echo", {"text": text})
+            )
+    assert small.content[0].text == "a"
+    assert large.content[0].text == text
+
+
+@pytest.fixture
+def stdin_writes(monkeypatch):
+    """Sizes of the writes to the server's stdin."""
+    writes = []
+    open_process = anyio.open_process
+
+    async def recording_open_process(*args, **kwargs):
+        process = await open_process(*args, **kwargs)
+        send = process.stdin.send
+
+        async def recording_send(data):
+            writes.append(len(data))
+            await send(data)
+
+        monkeypatch.setattr(process.stdin, "send", recording_send)
+        return process
+
+    monkeypatch.setattr(transport.anyio, "open_process", recording_open_process)
+    return writes
+
+
+async def test_calls_sent_within_the_window_share_one_write(stdin_writes):
+    with anyio.fail_after(TIME_LIMIT):
+        async with batched_stdio_client(SERVER, window=0.05) as streams, ClientSession(*streams) as session:
+            await session.initialize()
+            before = len(stdin_writes)
+            await asyncio.gather(*(call_tool(session, "echo", {"text": f"call {i}"}) for i in range(20)))
+    assert len(stdin_writes) - before == 1
+
+
+async def test_batches_are_written_once_they_reach_max_batch_bytes(stdin_writes):
+    with anyio.fail_after(TIME_LIMIT):
+        async with batched_stdio_client(SERVER, window=0.05, max_batch_bytes=1024) as streams, ClientSession(*streams) as session:
+            await session.initialize()
+            before = len(stdin_writes)
+            results = await asyncio.gather(*(call_tool(session, "echo", {"text": "x" * 200}) for _ in range(20)))
+    assert all(result.content[0].text == "x" * 200 for result in results)
+    batches = stdin_writes[before:]
+    assert len(batches) > 1
+    # A batch stops taking messages once it reaches the limit
+    assert max(batches) < 1024 + 400
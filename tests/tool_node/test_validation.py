@@ -0,0 +1,124 @@
+import logging
+
+import pytest
+
+from src.tool_node.validation import ArgumentValidationError, compile_validator, validate_arguments
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string", "minLength": 1},
+        "attendees": {"type": "array", "items": {"type": "string"}, "maxItems": 2},
+        "count": {"type": "integer", "minimum": 1},
+        "all_day": {"type": "boolean"},
+        "color": {"enum": ["red", "blue"]},
+    },
+    "required": ["summary"],
+    "additionalProperties": False,
+}
+
+
+def validate(schema, args):
+    return validate_arguments(compile_validator(schema), args)
+
+
+def test_valid_arguments_are_returned_as_is():
+    args = {"summary": "Standup", "attendees": ["a@x.com"], "count": 2, "all_day": False, "color": "red"}
+    assert validate(SCHEMA, args) is args
+
+
+def test_none_is_no_arguments():
+    assert validate({"type": "object", "properties": {}}, None) == {}
+
+
+def test_safe_coercions_copy_only_what_changes():
+    args = {"summary": "Standup", "count": "3", "all_day": "true", "attendees": ["a@x.com"]}
+    result = validate(SCHEMA, args)
+    assert result == {"summary": "Standup", "count": 3, "all_day": True, "attendees": ["a@x.com"]}
+    assert result is not args
+    assert result["attendees"] is args["attendees"]
+    assert args["count"] == "3"
+
+
+def test_integral_float_is_coerced_to_integer():
+    assert validate(SCHEMA, {"summary": "s", "count": 2.0}) == {"summary": "s", "count": 2}
+
+
+@pytest.mark.parametrize(
+    ("args", "path", "message"),
+    [
+        ({}, "args", "missing required property 'summary'"),
+        ({"summary": "s", "room": 1}, "args", "unexpected property 'room'"),
+        ({"summary": ""}, "args.summary", "at least 1 characters"),
+        ({"summary": "s", "count": "three"}, "args.count", "expected integer"),
+        ({"summary": "s", "count": 0}, "args.count", "violates minimum 1"),
+        ({"summary": "s", "attendees": ["a", 1]}, "args.attendees[1]", "expected string"),
+        ({"summary": "s", "attendees": ["a", "b", "c"]}, "args.attendees", "at most 2 items"),
+        ({"summary": "s", "color": "green"}, "args.color", "expected one of"),
+    ],
+)
+def test_errors_name_the_offending_path(args, path, message):
+    with pytest.raises(ArgumentValidationError) as info:
+        validate(SCHEMA, args)
+    assert info.value.path == path
+    assert message in str(info.value)
+
+
+def test_enum_doesnt_confuse_booleans_and_integers():
+    schema = {"enum": [1, 2]}
+    assert validate(schema, 1) == 1
+    with pytest.raises(ArgumentValidationError):
+        validate(schema, True)
+
+
+def test_any_of_prefers_an_exact_match_over_a_coerced_one():
+    schema = {"anyOf": [{"type": "integer"}, {"type": "string"}]}
+    assert validate(schema, "3") == "3"
+    assert validate({"anyOf": [{"type": "integer"}, {"type": "null"}]}, "3") == 3
+    with pytest.raises(ArgumentValidationError, match="matches none of the allowed schemas"):
+        validate({"anyOf": [{"type": "integer"}, {"type": "null"}]}, "x")
+
+
+def test_false_schema_rejects_any_value():
+    schema = {"type": "object", "properties": {"legacy": False}}
+    with pytest.raises(ArgumentValidationError, match="no value is allowed"):
+        validate(schema, {"legacy": 1})
+
+
+def test_recursive_local_ref():
+    schema = {
+        "$ref": "#/$defs/node",
+        "$defs": {
+            "node": {
+                "type": "object",
+                "properties": {"value": {"type": "integer"}, "children": {"type": "array", "items": {"$ref": "#/$defs/node"}}},
+            }
+        },
+    }
+    args = {"value": 1, "children": [{"value": "2", "children": []}]}
+    assert validate(schema, args) == {"value": 1, "children": [{"value": 2, "children": []}]}
+
+
+def test_unresolvable_ref_is_not_checked(caplog):
+    schema = {"type": "object", "properties": {"when": {"$ref": "#/$defs/missing"}}}
+    with caplog.at_level(logging.WARNING):
+        validator = compile_validator(schema)
+    assert validate_arguments(validator, {"when": 1}) == {"when": 1}
+    assert "#/$defs/missing" in caplog.text
+
+
+def test_pattern_python_cant_compile_is_not_checked(caplog):
+    schema = {"type": "object", "properties": {"name": {"type": "string", "pattern": r"^\p{L}+$", "maxLength": 5}}}
+    with caplog.at_level(logging.WARNING):
+        validator = compile_validator(schema)
+    assert validate_arguments(validator, {"name": "123"}) == {"name": "123"}
+    with pytest.raises(ArgumentValidationError, match="at most 5 characters"):
+        validate_arguments(validator, {"name": "abcdef"})
+    assert "Not validating against pattern" in caplog.text
+
+
+def test_pattern_is_searched_not_matched():
+    schema = {"type": "string", "pattern": "[0-9]{4}"}
+    assert validate(schema, "year 2025") == "year 2025"
+    with pytest.raises(ArgumentValidationError, match="does not match"):
+        validate(schema, "no year")